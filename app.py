@@ -1,31 +1,102 @@
 # app.py
 import os
+import hmac
 import uuid
-from flask import Flask, render_template, request, jsonify
+import threading
+from flask import Flask, Response, render_template, request, jsonify, make_response
 from dotenv import load_dotenv
 
 # Load environment variables from .env file FIRST
 load_dotenv()
 
 # Now import the bot logic which depends on the loaded variables
-from bot_logic import BotLogic, logger
+from bot_logic import BotLogic, LAZY_START, logger
+from assets import AssetManifest
+from metrics import REGISTRY, SamplingProfiler
+from parking_stream import TooManySubscribers
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY")
+# Fingerprinted, precompressed static files from `python assets.py`; plain /static URLs without a build
+ASSETS = AssetManifest()
+app.jinja_env.globals.update(asset_url=ASSETS.url, asset_srcset=ASSETS.srcset)
 
-# Initialize the bot logic once when the application starts      
-bot_logic = BotLogic()
-logger.info("BotLogic initialized for the web application.")
+ASK_SECONDS = REGISTRY.histogram("tiruchendur_ask_seconds", "Time to answer /ask, per server.", ("server",))
+# Opt-in: a request with "X-Profile: 1" is run under the sampling profiler and its reply carries the stacks
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "false").lower() in ("1", "true", "yes")
+PROFILE_HEADER = "X-Profile"
+# Shared secret that gate counters send as "Authorization: Bearer <token>"; ingest is off while unset
+PARKING_INGEST_TOKEN = os.getenv("PARKING_INGEST_TOKEN", "")
+# Token the Prometheus scraper sends as "Authorization: Bearer <token>"; /metrics is not served while unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+MAX_EVENTS_PER_BATCH = 5000
+# Keep parking replies on the page current over /parking/stream. Off by default: each open page holds a connection
+PARKING_STREAM_ENABLED = os.getenv("PARKING_STREAM_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# The bot (Firestore client, cached data) is created on the first request that needs it,
+# so cold starts that only serve the landing page or static files never touch Firestore.
+_bot_logic = None
+_bot_logic_lock = threading.Lock()
+
+def get_bot_logic() -> BotLogic:
+    global _bot_logic
+    if _bot_logic is None:
+        with _bot_logic_lock:
+            if _bot_logic is None:
+                _bot_logic = BotLogic()
+                logger.info("BotLogic initialized for the web application.")
+    return _bot_logic
+
+if not LAZY_START:
+    get_bot_logic()
+
+def _visitor_id():
+    """Reuses the visitor's user_id cookie so page reloads don't mint a new session each time."""
+    try:
+        return str(uuid.UUID(request.cookies.get('user_id', '')))
+    except ValueError:
+        return str(uuid.uuid4())
+
+def visitor_location(data):
+    """(lat, lon) if the frontend sent the browser's position with the message, else None."""
+    try:
+        lat, lon = float(data['lat']), float(data['lon'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+
+def wants_profile(header_value) -> bool:
+    return REQUEST_PROFILING and header_value == "1"
+
+def profiled(answer):
+    """Runs answer() under the sampling profiler; the reply gets a 'profile' entry with its folded stacks."""
+    with SamplingProfiler() as profiler:
+        reply = answer()
+    stacks = profiler.folded()
+    if stacks: logger.info(f"Request profile ({profiler.samples} samples), hottest stack: {stacks[0][0]}")
+    return dict(reply, profile={"samples": profiler.samples, "interval_ms": profiler.interval * 1000,
+                                "stacks": [{"stack": stack, "samples": n} for stack, n in stacks]})
 
 @app.route('/')
 def index():
-    """Renders the main page. A unique user_id is generated for the session."""
-    user_id = str(uuid.uuid4())
-    return render_template('index.html', user_id=user_id)
+    """Renders the main page with the visitor's user_id."""
+    user_id = _visitor_id()
+    response = make_response(render_template('index.html', user_id=user_id, parking_stream_enabled=PARKING_STREAM_ENABLED))
+    response.set_cookie('user_id', user_id, max_age=7 * 24 * 3600, httponly=True, samesite='Lax')
+    return response
+
+@app.route('/assets/<path:filename>')
+def built_asset(filename):
+    """Files of the asset build, cached by browsers for a year; a changed file gets a new name."""
+    return ASSETS.send(filename)
 
 @app.route('/ask', methods=['POST'])
 def ask():
     """API endpoint to handle all user questions from the frontend."""
+    with ASK_SECONDS.time("flask"):
+        return _ask()
+
+def _ask():
     data = request.get_json()
     user_id = data.get('user_id')
     user_input = data.get('question', '').strip()
@@ -40,16 +111,75 @@ def ask():
     input_type = 'start_command' if user_input == "" else 'text'
 
     # Get the full response dictionary from the bot logic
-    response_dict = bot_logic.process_user_input(
+    answer = lambda: get_bot_logic().process_user_input(
         user_id=user_id,
         input_type=input_type,
         data=user_input,
-        user_name=user_name
+        user_name=user_name,
+        location=visitor_location(data)
     )
+    response_dict = profiled(answer) if wants_profile(request.headers.get(PROFILE_HEADER)) else answer()
 
     # Return the entire dictionary (text, photos, buttons) to the frontend
     return jsonify(response_dict)
 
+def bearer_authorized(header_value, token: str) -> bool:
+    return bool(token) and hmac.compare_digest(header_value or "", f"Bearer {token}")
+
+def ingest_authorized(header_value) -> bool:
+    return bearer_authorized(header_value, PARKING_INGEST_TOKEN)
+
+def metrics_status(header_value) -> int:
+    """200 if a /metrics scrape may be served, 404 while METRICS_TOKEN is unset, 401 for a wrong token."""
+    if not METRICS_TOKEN: return 404
+    return 200 if bearer_authorized(header_value, METRICS_TOKEN) else 401
+
+@app.route('/parking/events', methods=['POST'])
+def parking_events():
+    """
+    Gate counters push {"batch_id": "...", "events": [{"lot_id", "type": "entry"|"exit", "count"}]}.
+    Counts show up in parking replies at once and reach Firestore with the next flush. A repeated
+    batch_id (a retry) is acknowledged without being counted again by the worker that accepted it;
+    dedupe is per worker process (see parking_ingest.py). A batch with no accepted events is not
+    remembered, so it can be retried under the same batch_id.
+    """
+    if not ingest_authorized(request.headers.get('Authorization')):
+        return jsonify({'error': 'Unauthorized'}), 401
+    data = request.get_json(silent=True)
+    events = data.get('events') if isinstance(data, dict) else None
+    if not isinstance(events, list):
+        return jsonify({'error': 'Expected {"events": [...]}'}), 400
+    if len(events) > MAX_EVENTS_PER_BATCH:
+        return jsonify({'error': f'At most {MAX_EVENTS_PER_BATCH} events per batch'}), 413
+    batch_id = data.get('batch_id')
+    result = get_bot_logic().ingest.record(events, batch_id=str(batch_id) if batch_id is not None else None)
+    return jsonify(result), 202
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+@app.route('/parking/stream')
+def parking_stream():
+    """Server-Sent Events with parking changes for ?route=...&lang=..., used to keep a parking reply current."""
+    broadcaster = get_bot_logic().parking_stream
+    try:
+        sub = broadcaster.subscribe(request.args.get('route', 'any'), request.args.get('lang', 'en'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except TooManySubscribers:
+        return jsonify({'error': 'Too many live parking streams, try again later'}), 503
+    response = Response(broadcaster.events(sub), mimetype='text/event-stream', headers=SSE_HEADERS)
+    # Also covers a client that disconnects before the stream is first read
+    response.call_on_close(lambda: broadcaster.unsubscribe(sub))
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint, behind METRICS_TOKEN."""
+    status = metrics_status(request.headers.get('Authorization'))
+    if status != 200:
+        return jsonify({'error': 'Not found' if status == 404 else 'Unauthorized'}), status
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     # Use '0.0.0.0' to make it accessible on your network
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,130 @@
+# asgi.py
+"""
+ASGI entry point: serves POST /ask on an event loop and hands every other path to the Flask app.
+
+Run it with any ASGI server, e.g. `uvicorn asgi:app --workers 2`. /ask keeps the same JSON
+contract and the same BotLogic instance as app.py, but a waiting request costs a coroutine
+instead of a worker thread, so one process can hold many more concurrent chatters.
+The remaining routes (landing page, static files) are the Flask app, mounted with `asgiref`.
+The bot is built on a worker thread at lifespan startup (or by the first request that needs it).
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, get_bot_logic, visitor_location, ASK_SECONDS, PROFILE_HEADER, SSE_HEADERS, metrics_status, profiled, wants_profile
+from bot_logic import BotLogic
+from metrics import REGISTRY
+from parking_stream import TooManySubscribers
+
+_flask_asgi = WsgiToAsgi(flask_app)
+
+MAX_BODY_BYTES = 64 * 1024
+_bot_logic = None
+
+async def _get_bot_logic() -> BotLogic:
+    """get_bot_logic() for the event loop: the first call builds the bot (and may connect to Firestore) on a worker thread."""
+    global _bot_logic
+    if _bot_logic is None: _bot_logic = await asyncio.get_running_loop().run_in_executor(None, get_bot_logic)
+    return _bot_logic
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES: raise ValueError("Request body too large")
+        if not message.get("more_body"): return body
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+def _header(scope, name: str):
+    name = name.lower().encode("latin-1")
+    return next((v.decode("latin-1") for k, v in scope.get("headers", ()) if k.lower() == name), None)
+
+async def ask(scope, receive, send):
+    """Async twin of app.ask()."""
+    with ASK_SECONDS.time("asgi"):
+        await _ask(scope, receive, send)
+
+async def _ask(scope, receive, send):
+    try:
+        data = json.loads(await _read_body(receive) or b"{}")
+        if not isinstance(data, dict): raise ValueError("Expected a JSON object")
+    except ValueError:
+        return await _send_json(send, 400, {'error': 'Invalid JSON body'})
+    user_id = data.get('user_id')
+    user_input = str(data.get('question', '')).strip()
+    if not user_id:
+        return await _send_json(send, 400, {'error': 'Missing user_id'})
+
+    input_type = 'start_command' if user_input == "" else 'text'
+    bot = await _get_bot_logic()
+    if wants_profile(_header(scope, PROFILE_HEADER)):
+        # Profiled requests run on a worker thread so the profiler samples only this request
+        answer = lambda: bot.process_user_input(user_id, input_type, user_input, 'Visitor', visitor_location(data))
+        response_dict = await asyncio.get_running_loop().run_in_executor(None, profiled, answer)
+    else:
+        response_dict = await bot.process_user_input_async(
+            user_id=user_id, input_type=input_type, data=user_input, user_name='Visitor',
+            location=visitor_location(data))
+    await _send_json(send, 200, response_dict)
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect": pass
+
+async def parking_stream(scope, receive, send):
+    """Async twin of app.parking_stream(): each open stream is a coroutine rather than a thread."""
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    broadcaster = (await _get_bot_logic()).parking_stream
+    try:
+        sub = broadcaster.subscribe(query.get("route", ["any"])[0], query.get("lang", ["en"])[0], loop=asyncio.get_running_loop())
+    except ValueError as e:
+        return await _send_json(send, 400, {'error': str(e)})
+    except TooManySubscribers:
+        return await _send_json(send, 503, {'error': 'Too many live parking streams, try again later'})
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    disconnected.add_done_callback(lambda _: sub.close())
+    try:
+        headers = [(b"content-type", b"text/event-stream; charset=utf-8")] + [(k.lower().encode(), v.encode()) for k, v in SSE_HEADERS.items()]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        async for chunk in broadcaster.events_async(sub):
+            await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+    finally:
+        disconnected.cancel()
+        broadcaster.unsubscribe(sub)
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await _get_bot_logic()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] == "http" and scope["path"] == "/ask":
+        if scope["method"] != "POST":
+            return await _send_json(send, 405, {'error': 'Method not allowed'})
+        return await ask(scope, receive, send)
+    if scope["type"] == "http" and scope["path"] == "/parking/stream":
+        return await parking_stream(scope, receive, send)
+    if scope["type"] == "http" and scope["path"] == "/metrics":
+        status = metrics_status(_header(scope, "Authorization"))
+        if status != 200:
+            return await _send_json(send, status, {'error': 'Not found' if status == 404 else 'Unauthorized'})
+        body = REGISTRY.render().encode("utf-8")
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8"), (b"content-length", str(len(body)).encode())]})
+        return await send({"type": "http.response.body", "body": body})
+    return await _flask_asgi(scope, receive, send)
@@ -0,0 +1,241 @@
+# assets.py
+# -*- coding: utf-8 -*-
+"""
+Build-time asset stage, and the Flask side that serves its output.
+
+`python assets.py` reads every file under static/ and writes into static/dist/:
+
+* each file under a content-hashed name (index.3f2a9c1b0d4e.css), so it can be cached forever;
+* .br and .gz copies of text assets, when they save at least MIN_SAVING (.br needs the
+  `brotli` package);
+* WebP copies of raster images at the IMAGE_WIDTHS narrower than the original (needs Pillow);
+* manifest.json, mapping each source name ("index.css", "tiruchendur_temple.webp") to its
+  hashed file and variants.
+
+Identical files share one output, so duplicated images are shipped once. The deployment
+(vercel.json) uses the @vercel/python builder, which has no hook to run this, so static/dist
+is committed: rerun this with brotli and Pillow installed and commit the result whenever
+static/ changes. Keep static/ to files the page links to; everything in it ends up in the
+deployment twice.
+tests/test_assets.py fails while the committed build is out of date. Without a build the
+templates fall back to the plain /static URLs.
+
+At runtime AssetManifest.url() and .srcset() (Jinja globals asset_url / asset_srcset) point
+templates at the hashed files. AssetManifest.send() serves them from /assets/ with
+`Cache-Control: immutable`, a strong ETag and 304s, picking the .br or .gz copy the
+client accepts.
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Optional
+
+from flask import Response, abort, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+mimetypes.add_type("image/webp", ".webp")  # missing from older mimetypes tables
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+# Source directory -> prefix of the names its files are looked up by
+SOURCE_DIRS = {STATIC_DIR: ""}
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+URL_PREFIX = "/assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+HASH_LENGTH = 12
+COMPRESSIBLE = {".css", ".js", ".mjs", ".svg", ".html", ".json", ".txt", ".xml", ".map", ".ico"}
+RASTER = {".png", ".jpg", ".jpeg", ".webp"}
+# Widths (px) of the resized copies offered in srcset
+IMAGE_WIDTHS = (480, 960, 1440)
+WEBP_QUALITY = 80
+# A compressed or resized copy is only kept if it is at least this much smaller
+MIN_SAVING = 0.1
+# Preferred first; suffix of each precompressed copy
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compress(data: bytes) -> Dict[str, bytes]:
+    compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None: compressed["br"] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in compressed.items() if len(body) <= len(data) * (1 - MIN_SAVING)}
+
+
+def _resize(data: bytes, widths) -> List[Dict[str, Any]]:
+    """WebP copies at each of `widths` narrower than the image: [{"width", "body"}], plus the original's width."""
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        width, height = image.size
+        if image.mode not in ("RGB", "RGBA"): image = image.convert("RGBA")
+        copies = []
+        for target in sorted(w for w in widths if w < width):
+            buffer = io.BytesIO()
+            image.resize((target, max(1, round(height * target / width))), Image.LANCZOS).save(buffer, "WEBP", quality=WEBP_QUALITY, method=6)
+            if buffer.tell() <= len(data) * (1 - MIN_SAVING): copies.append({"width": target, "body": buffer.getvalue()})
+    return [{"width": width}] + copies
+
+
+def _is_build_dir(path: str, out_dir: str) -> bool:
+    return any(path == d or path.startswith(d + ".") for d in (out_dir, DIST_DIR))
+
+
+def _source_files(sources: Dict[str, str], out_dir: str):
+    for directory, prefix in sources.items():
+        for root, dirs, files in os.walk(directory):
+            # Skips the build itself, and its staging and previous copies (dist.<pid>.tmp / .old)
+            dirs[:] = sorted(d for d in dirs if not d.startswith(".") and not _is_build_dir(os.path.join(root, d), out_dir))
+            for filename in sorted(files):
+                if filename.startswith("."): continue
+                path = os.path.join(root, filename)
+                yield prefix + os.path.relpath(path, directory).replace(os.sep, "/"), path
+
+
+def build(out_dir: str = DIST_DIR, sources: Optional[Dict[str, str]] = None, widths=IMAGE_WIDTHS) -> Dict[str, Any]:
+    """Writes the hashed, compressed and resized copies plus the manifest into `out_dir`; returns the manifest."""
+    inputs = list(_source_files(SOURCE_DIRS if sources is None else sources, out_dir))
+    staging = f"{out_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    assets, files = {}, {}
+
+    def write(name: str, body: bytes, content_type: str, encodings=None):
+        if name in files: return  # identical content under another source name
+        with open(os.path.join(staging, name), "wb") as f: f.write(body)
+        files[name] = {"type": content_type, "hash": hashlib.sha256(body).hexdigest()[:2 * HASH_LENGTH],
+                       "bytes": len(body), "encodings": {}}
+        for encoding, compressed in (encodings or {}).items():
+            with open(os.path.join(staging, name + dict(ENCODINGS)[encoding]), "wb") as f: f.write(compressed)
+            files[name]["encodings"][encoding] = len(compressed)
+
+    for source_name, path in inputs:
+        with open(path, "rb") as f: data = f.read()
+        stem, ext = os.path.splitext(os.path.basename(source_name))
+        ext = ext.lower()
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        content_type = mimetypes.guess_type(source_name)[0] or "application/octet-stream"
+        hashed = f"{stem}.{digest}{ext}"
+        write(hashed, data, content_type, _compress(data) if ext in COMPRESSIBLE else None)
+        entry = {"file": hashed, "bytes": len(data)}
+        if ext in RASTER and Image is not None:
+            try:
+                original, *copies = _resize(data, widths)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not resize {source_name}: {e}")
+            else:
+                entry["width"], entry["variants"] = original["width"], []
+                for copy in copies:
+                    name = f"{stem}.{digest}.{copy['width']}w.webp"
+                    write(name, copy["body"], "image/webp")
+                    entry["variants"].append({"width": copy["width"], "file": name, "bytes": len(copy["body"])})
+        assets[source_name] = entry
+
+    manifest = {"format": MANIFEST_FORMAT, "assets": assets, "files": files}
+    with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f: json.dump(manifest, f, indent=1, sort_keys=True)
+    # Swap the finished build in, so a server never sees a half-written one
+    previous = f"{out_dir}.{os.getpid()}.old"
+    if os.path.exists(out_dir): os.replace(out_dir, previous)
+    os.replace(staging, out_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+class AssetManifest:
+    """The build's manifest, loaded on first use; an empty one if there is no build."""
+
+    def __init__(self, directory: str = DIST_DIR, url_prefix: str = URL_PREFIX):
+        self.directory, self.url_prefix = directory, url_prefix
+        self._lock = threading.Lock()
+        self._manifest: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._manifest is not None: return self._manifest
+        with self._lock:
+            if self._manifest is None:
+                path, manifest = os.path.join(self.directory, MANIFEST_FILE), {}
+                try:
+                    with open(path, encoding="utf-8") as f: manifest = json.load(f)
+                except FileNotFoundError:
+                    logger.info(f"No asset build in {self.directory}; serving assets from /static")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable asset manifest {path}: {e}")
+                if manifest.get("format") != MANIFEST_FORMAT: manifest = {}
+                self._manifest = {"assets": manifest.get("assets", {}), "files": manifest.get("files", {})}
+        return self._manifest
+
+    def reload(self):
+        with self._lock: self._manifest = None
+
+    def url(self, name: str) -> str:
+        """URL of the hashed copy of a source file (e.g. "index.css"), or its /static URL without a build."""
+        entry = self._load()["assets"].get(name)
+        return self.url_prefix + entry["file"] if entry else url_for("static", filename=name)
+
+    def srcset(self, name: str) -> str:
+        """A srcset of the resized copies of an image plus the original; "" if there are none."""
+        entry = self._load()["assets"].get(name)
+        if not entry or not entry.get("variants"): return ""
+        candidates = [(v["width"], v["file"]) for v in entry["variants"]] + [(entry["width"], entry["file"])]
+        return ", ".join(f"{self.url_prefix}{file} {width}w" for width, file in candidates)
+
+    def send(self, filename: str) -> Response:
+        """Serves a built file for the current request: immutable caching, ETag/304 and precompressed bodies."""
+        info = self._load()["files"].get(filename)
+        if info is None: abort(404)  # only files of the build are served, so the path needs no further checks
+        encoding = next((e for e, _ in ENCODINGS if e in info["encodings"] and request.accept_encodings[e]), None)
+        etag = info["hash"] + (f"-{encoding}" if encoding else "")
+        headers = {"Cache-Control": IMMUTABLE, "ETag": f'"{etag}"'}
+        if info["encodings"]: headers["Vary"] = "Accept-Encoding"
+        if request.if_none_match.contains_weak(etag): return Response(status=304, headers=headers)
+        path = os.path.join(self.directory, filename + (dict(ENCODINGS)[encoding] if encoding else ""))
+        response = send_file(path, mimetype=info["type"], conditional=False, etag=False, last_modified=None)
+        response.headers.update(headers)
+        response.headers.pop("Content-Disposition", None)  # would name the .gz/.br file
+        if encoding: response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def _kb(n: int) -> str:
+    return f"{n / 1024:.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=DIST_DIR)
+    args = parser.parse_args()
+    if brotli is None: print("brotli is not installed: writing gzip copies only (pip install brotli)")
+    if Image is None: print("Pillow is not installed: images are not resized (pip install Pillow)")
+    manifest = build(args.out)
+    files = manifest["files"]
+    print(f"{'source':<40}{'original':>12}{'smallest':>12}  served as")
+    for name, entry in sorted(manifest["assets"].items()):
+        info = files[entry["file"]]
+        smallest = min([entry["bytes"], *info["encodings"].values(), *(v["bytes"] for v in entry.get("variants", []))])
+        forms = [e for e, _ in ENCODINGS if e in info["encodings"]] + [f"{v['width']}w" for v in entry.get("variants", [])]
+        print(f"{name:<40}{_kb(entry['bytes']):>12}{_kb(smallest):>12}  {entry['file']}{' (' + ', '.join(forms) + ')' if forms else ''}")
+    sources = sum(entry["bytes"] for entry in manifest["assets"].values())
+    unique = sum(info["bytes"] for name, info in files.items() if name in {entry["file"] for entry in manifest["assets"].values()})
+    print(f"\n{len(manifest['assets'])} source files ({_kb(sources)}) -> {len(files)} files in {args.out} "
+          f"({_kb(sources - unique)} of duplicates dropped); see benchmarks/bench_page_weight.py for the page itself")
+
+
+if __name__ == "__main__":
+    main()
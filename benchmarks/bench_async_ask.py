@@ -0,0 +1,119 @@
+# benchmarks/bench_async_ask.py
+# -*- coding: utf-8 -*-
+"""
+Sync (Flask on a thread pool) vs async (asgi.py on one event loop) /ask under many concurrent sessions.
+
+`--sessions` chatters (default 1000) each walk the same conversation - language select,
+options 3-8, then parking for a route - all starting at once against a freshly started bot
+whose FakeFirestore answers every read after `--latency` seconds. The sync side models a
+threaded WSGI server: each request waits for one of `--threads` workers. The async side
+calls the ASGI app directly on the loop. Both run in-process, so the numbers exclude HTTP parsing.
+
+    python benchmarks/bench_async_ask.py [--sessions 1000] [--threads 32] [--latency 0.05] [--save results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+import bot_logic
+from bot_logic import BotLogic, INFO_CATEGORIES
+from fake_firestore import FakeFirestore
+
+CONVERSATION = ["", "en", "3", "4", "5", "6", "7", "8", "1", "2"]
+
+
+def make_db(latency):
+    lots = {f"lot{i}": {"Parking_name_en": f"Lot {i}", "IsParkingAvailable": "TRUE", "Latitude": 8.49 + i / 1000,
+                        "Longitude": 78.11 + i / 1000, "Route_en": ["Tirunelveli", "Thoothukudi", "Nagercoil"][i % 3],
+                        "Total_Space": 40 + i, "TotalCapacity": 200, "Priority": i % 5} for i in range(60)}
+    local_info = {name: {"items": [{"Name_en": f"{name} {i}", "Notes_en": "Open 24 hours"} for i in range(20)]} for name in INFO_CATEGORIES}
+    return FakeFirestore({"local_info": local_info, "parking_lots": lots}, latency=latency)
+
+
+def fresh_bot(web_app, latency):
+    bot_logic.LAZY_START = True
+    web_app._bot_logic = BotLogic(db=make_db(latency))
+
+
+async def run_sync(web_app, sessions, threads):
+    clients = threading.local()
+    pool = ThreadPoolExecutor(max_workers=threads)
+    loop = asyncio.get_running_loop()
+
+    def post(user_id, question):
+        if not hasattr(clients, "client"): clients.client = web_app.app.test_client()
+        return clients.client.post("/ask", json={"user_id": user_id, "question": question}).status_code
+
+    async def chatter(n, latencies):
+        for question in CONVERSATION:
+            started = time.perf_counter()
+            assert await loop.run_in_executor(pool, post, f"sync-{n}", question) == 200
+            latencies.append(time.perf_counter() - started)
+
+    try: return await drive(chatter, sessions)
+    finally: pool.shutdown()
+
+
+async def run_async(asgi_app, sessions):
+    async def post(user_id, question):
+        body = json.dumps({"user_id": user_id, "question": question}).encode()
+        sent = []
+        async def receive(): return {"type": "http.request", "body": body, "more_body": False}
+        async def send(message): sent.append(message)
+        await asgi_app({"type": "http", "method": "POST", "path": "/ask", "headers": []}, receive, send)
+        return sent[0]["status"]
+
+    async def chatter(n, latencies):
+        for question in CONVERSATION:
+            started = time.perf_counter()
+            assert await post(f"async-{n}", question) == 200
+            latencies.append(time.perf_counter() - started)
+
+    return await drive(chatter, sessions)
+
+
+async def drive(chatter, sessions):
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(chatter(n, latencies) for n in range(sessions)))
+    elapsed = time.perf_counter() - started
+    return {"requests": len(latencies), "seconds": round(elapsed, 3), "requests_per_second": round(len(latencies) / elapsed, 1),
+            **common.latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=32, help="worker threads of the simulated WSGI server")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per FakeFirestore read")
+    parser.add_argument("--save", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    import app as web_app
+    import asgi
+    results = {}
+    fresh_bot(web_app, args.latency)
+    results["sync"] = asyncio.run(run_sync(web_app, args.sessions, args.threads))
+    fresh_bot(web_app, args.latency)
+    results["async"] = asyncio.run(run_async(asgi.app, args.sessions))
+
+    print(f"{args.sessions} concurrent sessions, {len(CONVERSATION)} requests each")
+    print(f"{'':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['requests_per_second']:>10.0f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}")
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "sessions": args.sessions, "threads": args.threads, "read_latency_s": args.latency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
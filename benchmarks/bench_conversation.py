@@ -0,0 +1,190 @@
+# benchmarks/bench_conversation.py
+# -*- coding: utf-8 -*-
+"""
+Load test for the /ask conversation flow.
+
+Simulated visitors walk seeded, multi-turn conversations - language select, main menu,
+parking by route, category lists (options 3-8), temple info, nearby search and free text -
+through BotLogic.process_user_input ("bot") and through the Flask /ask route ("flask").
+Firestore is a FakeFirestore holding `--lots` parking lots and `--items` entries per
+local_info category, with `--latency` seconds per read; `--ttl` shortens the cache TTLs so
+background refreshes happen during the run.
+
+Each target runs in a fresh interpreter and reports throughput, p50/p95/p99 latency per
+menu path, peak allocation per request (from a tracemalloc pass) and peak RSS.
+
+    python benchmarks/bench_conversation.py [--conversations 2000] [--threads 8] [--save results.json]
+    python benchmarks/bench_conversation.py --baseline old.json   # exits 1 on a regression
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+
+TARGETS = ("bot", "flask")
+ROUTE_INPUTS = ["1", "2", "3", "tirunelveli", "Thoothukudi", "nagercoil", "any"]
+FREE_TEXT = ["where is the nearest first aid", "toilet near the temple", "bus stand for nagercoil",
+             "parking on tirunelveli road", "annadhanam timings", "help centre near the beach"]
+
+
+def make_db(lots, items, latency):
+    from bot_logic import INFO_CATEGORIES
+    from fake_firestore import FakeFirestore
+    rng = random.Random(7)
+    parking = {f"lot{i}": {"Parking_name_en": f"Lot {i}", "IsParkingAvailable": "TRUE",
+                           "Latitude": 8.45 + rng.random() / 10, "Longitude": 78.05 + rng.random() / 10,
+                           "Route_en": rng.choice(["Tirunelveli", "Thoothukudi", "Nagercoil", "Tirunelveli, Nagercoil"]),
+                           "Total_Space": rng.randint(0, 300), "TotalCapacity": 300, "Priority": rng.randint(1, 9)} for i in range(lots)}
+    local_info = {name: {"items": [{"Name_en": f"{name} {i}", "Notes_en": "Open 24 hours during the festival",
+                                    "RouteInfo_en": "Near the temple", "ContactInfo_en": "04639 242221"} for i in range(items)]}
+                  for name in INFO_CATEGORIES}
+    return FakeFirestore({"parking_lots": parking, "local_info": local_info}, latency=latency)
+
+
+def conversation(rng, steps):
+    """[(path, question), ...] for one visitor: start, language, then `steps` menu actions."""
+    turns = [("start", ""), ("language_select", rng.choice(["en", "en", "en", "ta"]))]
+    for _ in range(steps):
+        kind = rng.choice(["parking", "category", "category", "category", "temple_info", "nearby_search", "free_text", "main_menu"])
+        if kind == "parking": turns += [("parking_menu", "1"), ("parking_route", rng.choice(ROUTE_INPUTS))]
+        elif kind == "category": turns.append(("category_list", rng.choice(["3", "4", "5", "6", "7", "8"])))
+        elif kind == "temple_info": turns += [("temple_info", "2"), ("temple_info", rng.choice(["1", "2", "3"])), ("temple_info", "4")]
+        elif kind == "nearby_search": turns += [("nearby_search", "9"), ("nearby_search", rng.choice(FREE_TEXT))]
+        elif kind == "free_text": turns.append(("free_text", rng.choice(FREE_TEXT)))
+        else: turns.append(("main_menu", rng.choice(["11", "0"])))
+    return turns
+
+
+def child(args):
+    os.environ["LAZY_START"] = "true"  # app.py must not build its own bot on import
+    if args.ttl is not None:
+        os.environ["LOCAL_INFO_CACHE_TTL"] = os.environ["PARKING_CACHE_TTL"] = str(args.ttl)
+    import bot_logic
+    if args.target == "flask": import app as web_app
+    bot_logic.LAZY_START = False
+    bot = bot_logic.BotLogic(db=make_db(args.lots, args.items, args.latency))
+
+    if args.target == "flask":
+        web_app._bot_logic = bot
+        clients = threading.local()
+        def ask(user_id, input_type, question):
+            if not hasattr(clients, "client"): clients.client = web_app.app.test_client()
+            response = clients.client.post("/ask", json={"user_id": user_id, "question": question})
+            assert response.status_code == 200, response.status_code
+    else:
+        def ask(user_id, input_type, question):
+            bot.process_user_input(user_id, input_type, question, "Visitor")
+
+    rng = random.Random(args.seed)
+    scripts = [conversation(rng, args.steps) for _ in range(args.conversations)]
+    latencies = defaultdict(list)
+
+    def run(n, script, sink):
+        for path, question in script:
+            started = time.perf_counter()
+            ask(f"visitor-{n}", "start_command" if path == "start" else "text", question)
+            sink[path].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(lambda item: run(item[0], item[1], latencies), enumerate(scripts)))
+    elapsed = time.perf_counter() - started
+    total = sum(len(samples) for samples in latencies.values())
+
+    # Allocation pass: single-threaded, so each request's tracemalloc peak is its own
+    allocations = defaultdict(list)
+    tracemalloc.start()
+    for n, script in enumerate(scripts[:args.alloc_conversations]):
+        for path, question in script:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            ask(f"alloc-{n}", "start_command" if path == "start" else "text", question)
+            allocations[path].append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    paths = {path: {**common.latency_summary(samples),
+                    "peak_alloc_kb": round(sum(allocations[path]) / max(len(allocations[path]), 1) / 1024, 2)}
+             for path, samples in sorted(latencies.items())}
+    print(json.dumps({"requests": total, "seconds": round(elapsed, 3), "requests_per_second": round(total / elapsed, 1),
+                      "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                      "firestore_reads": bot.db.read_count, "paths": paths}))
+
+
+def run_target(target, args) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", "--target", target]
+    for name in ("conversations", "steps", "threads", "lots", "items", "latency", "seed", "alloc_conversations", "ttl"):
+        value = getattr(args, name)
+        if value is not None: cmd += [f"--{name.replace('_', '-')}", str(value)]
+    out = subprocess.run(cmd, cwd=common.REPO_ROOT, capture_output=True, text=True)
+    if out.returncode != 0: raise RuntimeError(f"{target} run failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance) -> list:
+    """Regressions against a saved run: throughput down, or p95 up, by more than `tolerance` percent."""
+    regressions = []
+    for target, r in results.items():
+        old = baseline.get("results", {}).get(target)
+        if not old: continue
+        if r["requests_per_second"] < old["requests_per_second"] * (1 - tolerance / 100):
+            regressions.append(f"{target}: throughput {old['requests_per_second']:.0f} -> {r['requests_per_second']:.0f} req/s")
+        for path, p in r["paths"].items():
+            old_p = old["paths"].get(path)
+            if old_p and p["p95_ms"] > old_p["p95_ms"] * (1 + tolerance / 100) and p["p95_ms"] - old_p["p95_ms"] > 0.05:
+                regressions.append(f"{target} {path}: p95 {old_p['p95_ms']:.3f} -> {p['p95_ms']:.3f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma-separated subset of: bot, flask")
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=6, help="menu actions per conversation after language select")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lots", type=int, default=200)
+    parser.add_argument("--items", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per FakeFirestore read")
+    parser.add_argument("--ttl", type=float, help="override both cache TTLs (seconds)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--alloc-conversations", type=int, default=200)
+    parser.add_argument("--save", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="percent change treated as a regression")
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child: return child(args)
+
+    results = {target: run_target(target, args) for target in args.targets.split(",")}
+    for target, r in results.items():
+        print(f"\n{target}: {r['requests']} requests in {r['seconds']:.2f}s = {r['requests_per_second']:,.0f} req/s, "
+              f"peak RSS {r['peak_rss_mb']} MB, {r['firestore_reads']} Firestore reads")
+        print(f"  {'path':<18}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'alloc KB':>10}")
+        for path, p in r["paths"].items():
+            print(f"  {path:<18}{p['count']:>8}{p['p50_ms']:>10.3f}{p['p95_ms']:>10.3f}{p['p99_ms']:>10.3f}{p['peak_alloc_kb']:>10.1f}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "config": {k: v for k, v in vars(args).items() if k not in ("child", "target", "save", "baseline")},
+                       "results": results}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f: regressions = compare(results, json.load(f), args.tolerance)
+        print("\nNo regressions against the baseline." if not regressions else "\nRegressions:\n  " + "\n  ".join(regressions))
+        if regressions: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
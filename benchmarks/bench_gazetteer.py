@@ -0,0 +1,81 @@
+# benchmarks/bench_gazetteer.py
+# -*- coding: utf-8 -*-
+"""
+Origin-to-route resolution: gazetteer build time, lookup latency and accuracy on a labelled set.
+
+The labelled set mixes exact names, misspellings, Tamil script, full sentences and inputs
+that must not match anything. The run exits with status 1 if accuracy drops below
+--min-accuracy, so it can gate changes to gazetteer.py or its route tables.
+
+    python benchmarks/bench_gazetteer.py [--repeat 200] [--min-accuracy 0.95]
+"""
+
+import argparse
+import sys
+import time
+
+import common
+from gazetteer import Gazetteer
+
+# (group, input, expected route or None for "no match")
+LABELLED = [
+    ("exact", "Tirunelveli", "tirunelveli"), ("exact", "Thoothukkudi", "thoothukudi"), ("exact", "Nagercoil", "nagercoil"),
+    ("exact", "Kovilpatti", "thoothukudi"), ("exact", "Srivaikuntam", "tirunelveli"), ("exact", "Tenkasi", "tirunelveli"),
+    ("exact", "Kanniyakumari", "nagercoil"), ("exact", "Madurai", "thoothukudi"), ("exact", "Udangudi", "nagercoil"),
+    ("exact", "Chennai", "thoothukudi"), ("exact", "Tiruchendur", "any"), ("exact", "Sankarankoil", "tirunelveli"),
+    ("exact", "Ambasamudram", "tirunelveli"), ("exact", "Colachel", "nagercoil"), ("exact", "Ettayapuram", "thoothukudi"),
+    ("alias", "Tuticorin", "thoothukudi"), ("alias", "Kanyakumari", "nagercoil"), ("alias", "Thoothukudi", "thoothukudi"),
+    ("alias", "Kolachal", "nagercoil"), ("alias", "Sankarankovil", "tirunelveli"), ("alias", "Madras", "thoothukudi"),
+    ("alias", "Nellai", "tirunelveli"), ("alias", "Trivandrum", "nagercoil"), ("alias", "Sengottai", "tirunelveli"),
+    ("misspelt", "kovilpati", "thoothukudi"), ("misspelt", "tirunelvely", "tirunelveli"), ("misspelt", "Nagarkovil", "nagercoil"),
+    ("misspelt", "srivaikundam", "tirunelveli"), ("misspelt", "thoothukodi", "thoothukudi"), ("misspelt", "maduri", "thoothukudi"),
+    ("misspelt", "ettaiyapuram", "thoothukudi"), ("misspelt", "kanyakumary", "nagercoil"), ("misspelt", "thenkasi", "tirunelveli"),
+    ("misspelt", "thisaiyanvilai", "nagercoil"), ("misspelt", "banglore", "thoothukudi"), ("misspelt", "Tirunelvelli", "tirunelveli"),
+    ("tamil", "திருநெல்வேலி", "tirunelveli"), ("tamil", "தூத்துக்குடி", "thoothukudi"), ("tamil", "நாகர்கோவில்", "nagercoil"),
+    ("tamil", "கோவில்பட்டி", "thoothukudi"), ("tamil", "மதுரை", "thoothukudi"), ("tamil", "தென்காசி", "tirunelveli"),
+    ("tamil", "கன்னியாகுமரி", "nagercoil"), ("tamil", "ஸ்ரீவைகுண்டம்", "tirunelveli"), ("tamil", "உடன்குடி", "nagercoil"),
+    ("tamil", "கோவில்பட்டியிலிருந்து வருகிறோம்", "thoothukudi"), ("tamil", "திருநெல்வேலியிலிருந்து", "tirunelveli"),
+    ("sentence", "coming from Kovilpatti", "thoothukudi"), ("sentence", "we are from srivaikuntam side", "tirunelveli"),
+    ("sentence", "driving down from Madurai", "thoothukudi"), ("sentence", "Nagercoil road", "nagercoil"),
+    ("sentence", "via Tenkasi", "tirunelveli"), ("sentence", "from kanyakumari by car", "nagercoil"),
+    ("no match", "hello", None), ("no match", "parking please", None), ("no match", "yes", None), ("no match", "10", None),
+    ("no match", "I don't know", None), ("no match", "ok", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="timed lookups per labelled input")
+    parser.add_argument("--min-accuracy", type=float, default=0.95)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    gazetteer = Gazetteer.from_csv()
+    print(f"built gazetteer of {gazetteer.size} names in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    failures, timings = [], {}
+    for group, text, expected in LABELLED:
+        got = gazetteer.resolve_route(text)
+        if got != expected: failures.append((group, text, expected, got))
+        samples = timings.setdefault(group, [])
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            gazetteer.resolve_route(text)
+            samples.append(time.perf_counter() - t0)
+
+    print(f"{'group':<10}{'cases':>7}{'correct':>9}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}")
+    for group, samples in timings.items():
+        cases = sum(1 for g, _, _ in LABELLED if g == group)
+        wrong = sum(1 for f in failures if f[0] == group)
+        s = common.latency_summary(samples)
+        print(f"{group:<10}{cases:>7}{cases - wrong:>9}{s['p50_ms'] * 1000:>10.1f}{s['p95_ms'] * 1000:>10.1f}{s['p99_ms'] * 1000:>10.1f}")
+
+    accuracy = 1 - len(failures) / len(LABELLED)
+    print(f"\naccuracy {accuracy:.1%} ({len(LABELLED) - len(failures)}/{len(LABELLED)})")
+    for group, text, expected, got in failures:
+        print(f"  MISS [{group}] {text!r}: expected {expected}, got {got}")
+    if accuracy < args.min_accuracy: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_intent_engine.py
+# -*- coding: utf-8 -*-
+"""
+Accuracy and latency of the offline intent engine on a held-out split of dataset/intents*.json.
+
+Trains on the deterministic 80% split, round-trips the model through the binary artifact,
+then reports intent / entity accuracy (overall and for Tamil-script utterances), per-query
+latency and artifact load time. `--model` skips training and measures an existing artifact
+(e.g. the shipped dataset/intent_model.bin.gz, which has also seen the held-out split).
+
+    python benchmarks/bench_intent_engine.py [--limit 500] [--epochs 8] [--save model.bin.gz] [--model PATH]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import common
+from intent_engine import IntentEngine, load_samples, split_samples
+
+
+def is_tamil(text):
+    return any("஀" <= ch <= "௿" for ch in text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=0, help="train on at most this many utterances (0: all)")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--save", help="also write the trained artifact here")
+    parser.add_argument("--model", help="evaluate this artifact instead of training one")
+    args = parser.parse_args()
+    train, held_out = split_samples(load_samples())
+    if args.limit: train = train[:args.limit]
+    if args.model:
+        path, train_seconds = args.model, None
+    else:
+        started = time.perf_counter()
+        trained = IntentEngine.train(train, epochs=args.epochs)
+        train_seconds = time.perf_counter() - started
+        path = args.save or os.path.join(tempfile.mkdtemp(), "intent_model.bin.gz")
+        trained.save(path)
+    load_times = []
+    for _ in range(20):
+        started = time.perf_counter()
+        engine = IntentEngine.load(path)
+        load_times.append(time.perf_counter() - started)
+
+    latencies, intent_ok, slots_ok, slots_total = [], 0, 0, 0
+    tamil_total = tamil_ok = 0
+    for sample in held_out:
+        started = time.perf_counter()
+        prediction = engine.predict(sample["text"])
+        latencies.append(time.perf_counter() - started)
+        correct = prediction["intent"] == sample["intent"]
+        intent_ok += correct
+        if is_tamil(sample["text"]):
+            tamil_total += 1
+            tamil_ok += correct
+        for slot, value in (sample.get("entities") or {}).items():
+            slots_total += 1
+            slots_ok += prediction["entities"].get(slot) == str(value)
+
+    summary = common.latency_summary(latencies)
+    trained_note = f"trained in {train_seconds:.1f}s" if train_seconds is not None else f"loaded from {path}"
+    print(f"train / held-out utterances: {len(train)} / {len(held_out)} ({trained_note})")
+    print(f"artifact: {os.path.getsize(path) / 1024:.0f} KB, load p50 {common.latency_summary(load_times)['p50_ms']:.1f} ms")
+    print(f"intent accuracy:             {intent_ok / len(held_out):.3f}")
+    print(f"intent accuracy (Tamil):     {tamil_ok / max(tamil_total, 1):.3f} over {tamil_total}")
+    print(f"entity slot accuracy:        {slots_ok / max(slots_total, 1):.3f} over {slots_total} labelled slots")
+    print(f"latency per query:           p50 {summary['p50_ms']:.2f} ms, p99 {summary['p99_ms']:.2f} ms")
+    print(f"throughput:                  {len(latencies) / sum(latencies):,.0f} queries/s (single thread)")
+
+
+if __name__ == "__main__":
+    main()
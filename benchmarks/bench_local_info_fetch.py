@@ -0,0 +1,61 @@
+# benchmarks/bench_local_info_fetch.py
+# -*- coding: utf-8 -*-
+"""
+Wall time of one local_info refresh against FakeFirestore with injected latency:
+serial per-document gets (the old _preload_data loop) versus BotLogic's concurrent
+and batched (get_all) fetch modes, plus the per-category latency each mode records.
+
+    python benchmarks/bench_local_info_fetch.py [--latency 0.05] [--jitter 0.05] [--runs 5]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import bot_logic
+from bot_logic import BotLogic, INFO_CATEGORIES
+from fake_firestore import FakeFirestore
+
+
+def make_db(latency, jitter, seed=3):
+    rng = random.Random(seed)
+    db = FakeFirestore({"local_info": {name: {"items": [{"Name_en": f"{name} {i}"} for i in range(5)]} for name in INFO_CATEGORIES}},
+                       latency=latency)
+    db.path_latency = {f"local_info/{name}": rng.uniform(0, jitter) for name in INFO_CATEGORIES}
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per round trip")
+    parser.add_argument("--jitter", type=float, default=0.05, help="max extra seconds per document")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    bot_logic.LAZY_START = False
+
+    db = make_db(args.latency, args.jitter)
+    serial = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        for name in INFO_CATEGORIES: db.collection("local_info").document(name).get()
+        serial.append(time.perf_counter() - started)
+    print(f"{'serial gets':<12} {statistics.median(serial) * 1000:8.1f} ms per refresh, {len(INFO_CATEGORIES)} round trips")
+
+    for mode in ("concurrent", "batch"):
+        bot_logic.LOCAL_INFO_FETCH_MODE = mode
+        db = make_db(args.latency, args.jitter)
+        bot = BotLogic(db=db)
+        times = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            bot.data.refresh("local_info")
+            times.append(time.perf_counter() - started)
+        per_category = ", ".join(f"{key.split('/', 1)[1]} {t['avg_seconds'] * 1000:.0f}"
+                                 for key, t in sorted(bot.data.fetch_timings().items()))
+        print(f"{mode:<12} {statistics.median(times) * 1000:8.1f} ms per refresh; per-category avg ms: {per_category}")
+
+
+if __name__ == "__main__":
+    main()
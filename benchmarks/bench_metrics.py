@@ -0,0 +1,81 @@
+# benchmarks/bench_metrics.py
+# -*- coding: utf-8 -*-
+"""
+Cost of the metrics layer: requests/sec through BotLogic.process_user_input and the Flask
+/ask route with metrics off and on, the time to render one /metrics scrape, and the slowdown
+of a request answered under the sampling profiler.
+
+    python benchmarks/bench_metrics.py [--requests 20000] [--repeat 3]
+"""
+
+import argparse
+import itertools
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import bot_logic
+import metrics
+from bot_logic import BotLogic
+from bench_render_cache import OPTIONS, make_db
+
+
+def run_bot(bot, requests):
+    started = time.perf_counter()
+    for option, _ in zip(itertools.cycle(OPTIONS), range(requests)):
+        bot.process_user_input("bench", "text", option)
+    return requests / (time.perf_counter() - started)
+
+
+def run_flask(client, requests, headers=None):
+    started = time.perf_counter()
+    for option, _ in zip(itertools.cycle(OPTIONS), range(requests)):
+        client.post("/ask", json={"user_id": "bench", "question": option}, headers=headers)
+    return requests / (time.perf_counter() - started)
+
+
+def compare(repeat, fn):
+    """Best req/s with metrics off and on, alternating the two so drift affects both alike."""
+    results = {False: 0.0, True: 0.0}
+    for _ in range(repeat):
+        for enabled in (False, True):
+            metrics.METRICS_ENABLED = enabled
+            results[enabled] = max(results[enabled], fn())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per configuration; the best is reported")
+    args = parser.parse_args()
+
+    import app as web_app  # imported before LAZY_START is switched off, so it doesn't build its own bot
+    bot_logic.LAZY_START = False
+    bot = BotLogic(db=make_db(25))
+    web_app._bot_logic = bot
+    for question in ("", "en"): bot.process_user_input("bench", "text" if question else "start_command", question)
+    client = web_app.app.test_client()
+
+    flask_requests = max(args.requests // 10, 100)
+    for label, measure in (("process_user_input", lambda: run_bot(bot, args.requests)),
+                           ("Flask /ask", lambda: run_flask(client, flask_requests))):
+        results = compare(args.repeat, measure)
+        overhead = (results[False] / results[True] - 1) * 100
+        print(f"{label:<20} metrics off {results[False]:>9,.0f} req/s   on {results[True]:>9,.0f} req/s   "
+              f"(overhead {overhead:+.1f}%)")
+
+    web_app.METRICS_TOKEN = "bench"
+    started = time.perf_counter()
+    scrape = client.get("/metrics", headers={"Authorization": "Bearer bench"}).get_data(as_text=True)
+    print(f"\n/metrics scrape       {(time.perf_counter() - started) * 1000:.2f} ms, {len(scrape.splitlines())} lines")
+
+    web_app.REQUEST_PROFILING = True
+    plain = run_flask(client, flask_requests)
+    profiled = run_flask(client, max(flask_requests // 10, 20), headers={web_app.PROFILE_HEADER: "1"})
+    reply = client.post("/ask", json={"user_id": "bench", "question": "3"}, headers={web_app.PROFILE_HEADER: "1"}).get_json()
+    print(f"X-Profile: 1          {profiled:,.0f} req/s vs {plain:,.0f} req/s unprofiled, "
+          f"{reply['profile']['samples']} samples in one profiled request")
+
+
+if __name__ == "__main__":
+    main()
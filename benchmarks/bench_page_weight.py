@@ -0,0 +1,90 @@
+# benchmarks/bench_page_weight.py
+# -*- coding: utf-8 -*-
+"""
+Landing-page weight with and without the asset build (assets.py), as the Flask app serves it.
+
+For each mode the page is loaded through the test client the way a browser would: the HTML,
+then every stylesheet, script and image it references from /static or /assets. Requests
+send "Accept-Encoding: br, gzip". Images use the srcset candidate a screen `--viewport`
+device pixels wide would pick.
+
+A repeat visit reloads the HTML. Files without a build are revalidated with If-None-Match,
+which costs a round trip each even when the answer is 304. Files from the build are
+immutable and are not requested again.
+
+    python benchmarks/bench_page_weight.py [--viewport 720]
+"""
+
+import argparse
+import re
+import shutil
+import tempfile
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import app as web_app
+import assets
+from assets import AssetManifest, IMMUTABLE
+
+LOCAL_URL = re.compile(r'(?:href|src)="(/(?:static|assets)/[^"]+)"')
+SRCSET = re.compile(r'srcset="([^"]+)"')
+
+
+def use(manifest: AssetManifest):
+    web_app.ASSETS = manifest
+    web_app.app.jinja_env.globals.update(asset_url=manifest.url, asset_srcset=manifest.srcset)
+
+
+def page_urls(html: str, viewport: int):
+    urls = LOCAL_URL.findall(html)
+    for srcset in SRCSET.findall(html):
+        candidates = sorted((int(width[:-1]), url) for url, width in (c.split() for c in srcset.split(", ")))
+        chosen = next((url for width, url in candidates if width >= viewport), candidates[-1][1])
+        # The browser fetches the srcset candidate instead of the src
+        urls = [chosen if url == candidates[-1][1] else url for url in urls]
+    return urls
+
+
+def visit(client, viewport: int, cached=None):
+    """Loads the page; with `cached` ({url: etag} from a first visit) behaves like a repeat visit."""
+    headers = {"Accept-Encoding": "br, gzip"}
+    page = client.get("/", headers=headers)
+    requests, body_bytes, etags = 1, len(page.data), {}
+    for url in page_urls(page.get_data(as_text=True), viewport):
+        if cached is not None:
+            if cached[url][1] == IMMUTABLE: continue  # still fresh: no request at all
+            response = client.get(url, headers={**headers, "If-None-Match": cached[url][0]})
+        else:
+            response = client.get(url, headers=headers)
+        assert response.status_code in (200, 304), (url, response.status_code)
+        requests += 1
+        body_bytes += len(response.data)
+        etags[url] = (response.headers.get("ETag"), response.headers.get("Cache-Control"))
+        response.close()
+    return requests, body_bytes, etags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--viewport", type=int, default=720, help="device pixels across the image")
+    args = parser.parse_args()
+    client = web_app.app.test_client()
+    build_dir, empty_dir = tempfile.mkdtemp(prefix="asset-build-"), tempfile.mkdtemp(prefix="no-build-")
+    try:
+        manifest = assets.build(build_dir)
+        print(f"build: {len(manifest['files'])} files, brotli {'on' if assets.brotli else 'off'}, "
+              f"image resizing {'on' if assets.Image else 'off (Pillow not installed)'}\n")
+        print(f"{'':<26}{'requests':>10}{'transferred':>14}")
+        for label, directory in (("no build", empty_dir), ("build", build_dir)):
+            use(AssetManifest(directory))
+            requests, first, cached = visit(client, args.viewport)
+            print(f"{label + ', first visit':<26}{requests:>10}{first / 1024:>11.1f} KB")
+            requests, repeat, _ = visit(client, args.viewport, cached)
+            print(f"{label + ', repeat visit':<26}{requests:>10}{repeat / 1024:>11.1f} KB")
+    finally:
+        use(AssetManifest())
+        shutil.rmtree(build_dir, ignore_errors=True)
+        shutil.rmtree(empty_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_parking_index.py
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: per-request scan/parse/sort of every parking lot (the old
+find_available_parking) versus a ParkingIndex built once per refresh.
+
+    python benchmarks/bench_parking_index.py [--lots 10000] [--repeat 200]
+"""
+
+import argparse
+import random
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from parking_index import ParkingIndex, haversine_km
+
+ROUTES = ("tirunelveli", "thoothukudi", "nagercoil")
+ORIGIN = (8.4967, 78.1245)
+THRESHOLD = 95.0
+
+
+def make_lots(n, seed=7):
+    rng = random.Random(seed)
+    lots = []
+    for i in range(n):
+        capacity = rng.randint(20, 500)
+        lots.append((f"lot{i}", {
+            "Parking_name_en": f"Lot {i}", "Route_en": rng.choice(ROUTES).capitalize(),
+            "IsParkingAvailable": rng.choice(["TRUE", "TRUE", "TRUE", "FALSE"]),
+            "Total_Space": str(rng.randint(0, capacity)), "TotalCapacity": str(capacity),
+            "Latitude": str(ORIGIN[0] + rng.uniform(-0.05, 0.05)), "Longitude": str(ORIGIN[1] + rng.uniform(-0.05, 0.05)),
+            "Priority": str(rng.randint(1, 20)),
+        }))
+    return lots
+
+
+def legacy_query(lots, route):
+    """The pre-index algorithm: filter, parse and sort every lot on every request."""
+    processed = []
+    for _, lot in lots:
+        if route.lower() not in str(lot.get("Route_en", "any")).lower(): continue
+        lot = dict(lot)
+        if str(lot.get('IsParkingAvailable', 'FALSE')).upper() not in ['TRUE', '1']: continue
+        available, capacity = int(lot.get('Total_Space', 0)), int(lot.get('TotalCapacity', 0))
+        if capacity <= 0: continue
+        percentage_full = (capacity - available) / capacity * 100
+        if available > 0 and percentage_full < THRESHOLD:
+            lot.update({"Availability": available, "PercentageFull": percentage_full,
+                        "Distance": haversine_km(ORIGIN[0], ORIGIN[1], float(lot['Latitude']), float(lot['Longitude']))})
+            processed.append(lot)
+    return sorted(processed, key=lambda x: (x['PercentageFull'], int(x.get('Priority', 99))))[:10]
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat): fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lots", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    lots = make_lots(args.lots)
+    build = timed(lambda: ParkingIndex.from_documents(lots, ROUTES, ORIGIN, THRESHOLD), 5)
+    index = ParkingIndex.from_documents(lots, ROUTES, ORIGIN, THRESHOLD)
+    legacy = timed(lambda: legacy_query(lots, "tirunelveli"), max(args.repeat // 20, 3))
+    indexed = timed(lambda: index.top("tirunelveli", limit=10), args.repeat * 10)
+    rng = random.Random(1)
+    updates = [(doc_id, {**data, "Total_Space": str(rng.randint(1, int(data["TotalCapacity"])))}) for doc_id, data in rng.sample(lots, 1000)]
+    start = time.perf_counter()
+    for doc_id, data in updates: index.upsert(doc_id, data)
+    update = (time.perf_counter() - start) / len(updates)
+
+    assert [l.doc_id for l in index.top("tirunelveli", 10)] == [l.doc_id for l in ParkingIndex.from_documents(
+        [(d, u) for d, u in dict(lots + updates).items()], ROUTES, ORIGIN, THRESHOLD).top("tirunelveli", 10)]
+    print(f"lots: {args.lots}, usable in index: {len(index)}")
+    print(f"index build (once per refresh): {build * 1e3:9.2f} ms")
+    print(f"legacy scan + sort per query:   {legacy * 1e3:9.2f} ms")
+    print(f"index top-10 per query:         {indexed * 1e6:9.2f} us  ({legacy / indexed:,.0f}x faster)")
+    print(f"index single-lot update:        {update * 1e6:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
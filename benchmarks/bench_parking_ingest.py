@@ -0,0 +1,130 @@
+# benchmarks/bench_parking_ingest.py
+# -*- coding: utf-8 -*-
+"""
+Gate-event ingest: events/sec through ParkingIngest.record (from `--gates` threads) and
+through the Flask /parking/events route, and the Firestore writes the write-behind flush
+needs compared with one write per event.
+
+The run also checks correctness against FakeFirestore and fails if any check does not hold:
+every lot's Gate_Delta equals the net of its events, replies built from a fresh read
+match the in-memory counts, a retried batch_id is not counted twice, and a flush whose
+acknowledgement is lost is not applied twice when it is retried.
+
+    python benchmarks/bench_parking_ingest.py [--lots 200] [--events 200000] [--batch-size 50] [--gates 8]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import bot_logic
+from bot_logic import BotLogic
+from bench_parking_index import make_lots
+from fake_firestore import FakeFirestore
+from parking_index import GATE_DELTA_FIELD
+
+TOKEN = "bench-token"
+
+
+def make_batches(lot_ids, events, batch_size, rng):
+    batches, net = [], dict.fromkeys(lot_ids, 0)
+    for start in range(0, events, batch_size):
+        batch = []
+        for _ in range(min(batch_size, events - start)):
+            lot_id, kind = rng.choice(lot_ids), rng.choice(("entry", "exit"))
+            net[lot_id] += -1 if kind == "entry" else 1
+            batch.append({"lot_id": lot_id, "type": kind})
+        batches.append(batch)
+    return batches, net
+
+
+def run_threads(record, batches, gates):
+    chunks = [batches[i::gates] for i in range(gates)]
+    threads = [threading.Thread(target=lambda chunk=chunk: [record(b) for b in chunk]) for chunk in chunks]
+    started = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return time.perf_counter() - started
+
+
+def firestore_deltas(db):
+    return {doc.id: doc.to_dict().get(GATE_DELTA_FIELD, 0) for doc in db.collection("parking_lots").stream()}
+
+
+def shown(index):
+    return {lot.doc_id: lot.available for lot in index.top()}
+
+
+def check(label, ok):
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    if not ok: raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lots", type=int, default=200)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--gates", type=int, default=8, help="threads posting batches concurrently")
+    parser.add_argument("--flush-interval", type=float, default=0.2)
+    args = parser.parse_args()
+    rng = random.Random(11)
+
+    import app as web_app  # imported before LAZY_START is switched off, so it doesn't build its own bot
+    bot_logic.LAZY_START = False
+    lots = {doc_id: dict(data, IsParkingAvailable="TRUE") for doc_id, data in make_lots(args.lots)}
+    db = FakeFirestore({"parking_lots": lots})
+    bot = BotLogic(db=db)
+    bot.ingest.flush_interval = args.flush_interval
+    web_app._bot_logic, web_app.PARKING_INGEST_TOKEN = bot, TOKEN
+    lot_ids = sorted(lots)
+
+    batches, net = make_batches(lot_ids, args.events, args.batch_size, rng)
+    writes_before = db.write_count
+    elapsed = run_threads(bot.ingest.record, batches, args.gates)
+    print(f"{'ParkingIngest.record':<24} {args.events / elapsed:>11,.0f} events/s  ({args.gates} gates, batches of {args.batch_size})")
+
+    client = web_app.app.test_client()
+    http_batches, http_net = make_batches(lot_ids, max(args.events // 10, args.batch_size), args.batch_size, rng)
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    started = time.perf_counter()
+    for i, batch in enumerate(http_batches):
+        response = client.post("/parking/events", json={"batch_id": f"http-{i}", "events": batch}, headers=headers)
+        assert response.status_code == 202, response.get_json()
+    http_events = sum(len(b) for b in http_batches)
+    print(f"{'Flask /parking/events':<24} {http_events / (time.perf_counter() - started):>11,.0f} events/s  (1 client)")
+    for lot_id, delta in http_net.items(): net[lot_id] += delta
+
+    # Retried batch: acknowledged, not counted again
+    retry = client.post("/parking/events", json={"batch_id": "http-0", "events": http_batches[0]}, headers=headers).get_json()
+
+    # A flush that commits but loses its acknowledgement is retried and must not be applied twice
+    bot.ingest.stop()
+    bot.ingest.record([{"lot_id": lot_ids[0], "type": "exit", "count": 3}])
+    net[lot_ids[0]] += 3
+    db.lose_write_acks = True
+    bot.ingest.flush()
+    db.lose_write_acks = False
+    bot.ingest.flush()
+
+    total_events = args.events + http_events + 3
+    flush_writes = db.write_count - writes_before
+    print(f"\nFirestore writes: {flush_writes:,} for {total_events:,} events "
+          f"({total_events / max(flush_writes, 1):,.0f}x fewer than one write per event), "
+          f"{bot.ingest.flushes_committed} flushes")
+
+    print("\nchecks:")
+    check("a retried batch_id is acknowledged without being counted", retry["duplicate"] and retry["accepted"] == 0)
+    deltas = firestore_deltas(db)
+    check("Firestore Gate_Delta equals the net of every lot's events", all(deltas.get(i, 0) == net[i] for i in lot_ids))
+    before = shown(bot.parking_index())
+    bot.data.refresh("parking_lots")
+    check("in-memory counts match a fresh read after the flush", shown(bot.parking_index()) == before)
+    stats = bot.ingest.stats()
+    check("nothing left unflushed", stats["unflushed_lots"] == 0 and stats["flushes_pending"] == 0)
+
+
+if __name__ == "__main__":
+    main()
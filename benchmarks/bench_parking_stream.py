@@ -0,0 +1,181 @@
+# benchmarks/bench_parking_stream.py
+# -*- coding: utf-8 -*-
+"""
+Concurrent /parking/stream subscribers in one worker process: memory per open stream and
+the time from a parking change to its delivery to every subscriber.
+
+"asgi" runs each subscriber as a coroutine through asgi.app, the way uvicorn would. "threads"
+gives each subscriber its own thread consuming ParkingBroadcaster.events(), the way Flask
+serves a stream. Each round changes a few lots through the ingest path and runs one producer
+tick; a subscriber counts as delivered once it has received the channel's new version.
+
+    python benchmarks/bench_parking_stream.py [--asgi 1000,5000,10000] [--threads 100,500] [--rounds 5]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+import common
+import bot_logic
+from bot_logic import BotLogic, OVERALL_ROUTE_MY_MAPS, SUPPORTED_LANGUAGES
+from bench_parking_index import make_lots
+from fake_firestore import FakeFirestore
+
+CHANNELS = [(route, lang) for route in ["any", *OVERALL_ROUTE_MY_MAPS] for lang in SUPPORTED_LANGUAGES]
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            import os
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return 0.0
+
+
+def change_lots(bot, lot_ids, rng):
+    # Enough exits to change what every channel shows, without filling lots up
+    bot.ingest.record([{"lot_id": lot_id, "type": "exit", "count": 1} for lot_id in rng.sample(lot_ids, 20)])
+
+
+def channel_versions(bot):
+    channels = bot.parking_stream._channels
+    return {key: channels[key].version for key in channels}
+
+
+def summarize(label, n, memory_mb, rounds):
+    latencies = [d for r in rounds for d in r["delivery"]]
+    s = common.latency_summary(latencies)
+    publish = max(r["publish_ms"] for r in rounds)
+    print(f"{label:<8}{n:>8,}{memory_mb * 1000 / n:>10.1f} KB{publish:>12.1f} ms{s['p50_ms']:>10.1f} ms{s['p99_ms']:>10.1f} ms{s['max_ms']:>10.1f} ms")
+
+
+async def run_asgi(bot, asgi_app, n, rounds, lot_ids, rng):
+    received = [{} for _ in range(n)]  # subscriber -> {version: arrival time}
+    stop = asyncio.Event()
+    subscribed = asyncio.Semaphore(0)
+
+    async def subscriber(i):
+        route, lang = CHANNELS[i % len(CHANNELS)]
+        first = True
+
+        async def receive():
+            await stop.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal first
+            body = message.get("body", b"")
+            if body.startswith(b"event: parking"):
+                received[i][json.loads(body.split(b"data: ", 1)[1])["version"]] = time.perf_counter()
+                if first:
+                    first = False
+                    subscribed.release()
+
+        scope = {"type": "http", "path": "/parking/stream", "method": "GET", "headers": [],
+                 "query_string": f"route={route}&lang={lang}".encode()}
+        await asgi_app(scope, receive, send)
+
+    before = rss_mb()
+    tasks = [asyncio.ensure_future(subscriber(i)) for i in range(n)]
+    for _ in range(n): await subscribed.acquire()
+    memory = rss_mb() - before
+
+    loop, results = asyncio.get_running_loop(), []
+    for _ in range(rounds):
+        change_lots(bot, lot_ids, rng)
+        started = time.perf_counter()
+        await loop.run_in_executor(None, bot.parking_stream.publish_once)
+        publish_ms = (time.perf_counter() - started) * 1000
+        versions = channel_versions(bot)
+        targets = [versions[CHANNELS[i % len(CHANNELS)]] for i in range(n)]
+        waiting = set(range(n))
+        while waiting:
+            waiting = {i for i in waiting if targets[i] not in received[i]}
+            await asyncio.sleep(0.005)
+        results.append({"publish_ms": publish_ms, "delivery": [received[i][t] - started for i, t in enumerate(targets)]})
+
+    stop.set()
+    await asyncio.gather(*tasks)
+    assert len(bot.parking_stream) == 0, "subscribers were not released on disconnect"
+    return memory, results
+
+
+def run_threads(bot, n, rounds, lot_ids, rng):
+    broadcaster = bot.parking_stream
+    received = [{} for _ in range(n)]
+    ready, done = threading.Barrier(n + 1), threading.Event()
+
+    def subscriber(i):
+        route, lang = CHANNELS[i % len(CHANNELS)]
+        events = broadcaster.events(broadcaster.subscribe(route, lang))
+        first = True
+        for chunk in events:
+            if chunk.startswith("event: parking"):
+                received[i][json.loads(chunk.split("data: ", 1)[1])["version"]] = time.perf_counter()
+                if first:
+                    first = False
+                    ready.wait()
+            if done.is_set(): break
+        events.close()
+
+    before = rss_mb()
+    threads = [threading.Thread(target=subscriber, args=(i,), daemon=True) for i in range(n)]
+    for t in threads: t.start()
+    ready.wait()
+    memory = rss_mb() - before
+
+    results = []
+    for r in range(rounds):
+        change_lots(bot, lot_ids, rng)
+        if r == rounds - 1: done.set()
+        started = time.perf_counter()
+        broadcaster.publish_once()
+        publish_ms = (time.perf_counter() - started) * 1000
+        versions = channel_versions(bot)
+        targets = [versions[CHANNELS[i % len(CHANNELS)]] for i in range(n)]
+        waiting = set(range(n))
+        while waiting:
+            waiting = {i for i in waiting if targets[i] not in received[i]}
+            time.sleep(0.005)
+        results.append({"publish_ms": publish_ms, "delivery": [received[i][t] - started for i, t in enumerate(targets)]})
+    for t in threads: t.join()
+    assert len(broadcaster) == 0, "subscribers were not released"
+    return memory, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--asgi", default="1000,5000,10000", help="subscriber counts for the ASGI run")
+    parser.add_argument("--threads", default="100,500", help="subscriber counts for the thread-per-stream run")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--lots", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(5)
+
+    import app  # noqa: F401  (imported before LAZY_START is switched off, so it doesn't build its own bot)
+    import asgi
+    bot_logic.LAZY_START = False
+    lots = {doc_id: dict(data, IsParkingAvailable="TRUE", Total_Space="40", TotalCapacity="100")
+            for doc_id, data in make_lots(args.lots)}
+    bot = BotLogic(db=FakeFirestore({"parking_lots": lots}))
+    app._bot_logic = bot
+    # Ticks are driven by the benchmark; the producer thread only sleeps
+    bot.parking_stream.interval, bot.parking_stream.max_subscribers = 3600, 10 ** 6
+    lot_ids = sorted(lots)
+
+    print(f"{'server':<8}{'streams':>8}{'memory':>13}{'producer':>15}{'p50':>13}{'p99':>13}{'max':>13}")
+    for n in [int(x) for x in args.asgi.split(",") if x]:
+        memory, rounds = asyncio.run(run_asgi(bot, asgi.app, n, args.rounds, lot_ids, rng))
+        summarize("asgi", n, memory, rounds)
+    for n in [int(x) for x in args.threads.split(",") if x]:
+        memory, rounds = run_threads(bot, n, args.rounds, lot_ids, rng)
+        summarize("threads", n, memory, rounds)
+
+
+if __name__ == "__main__":
+    main()
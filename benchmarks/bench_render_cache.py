@@ -0,0 +1,77 @@
+# benchmarks/bench_render_cache.py
+# -*- coding: utf-8 -*-
+"""
+Requests/sec for main-menu options 3-8 with the render cache off ("before") and on ("after").
+
+Drives BotLogic.process_user_input directly, and the Flask /ask route through the test
+client when Flask is installed. Data comes from FakeFirestore with `--items` entries in
+every local_info category.
+
+    python benchmarks/bench_render_cache.py [--items 25] [--requests 5000]
+"""
+
+import argparse
+import itertools
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import bot_logic
+from bot_logic import BotLogic, INFO_CATEGORIES
+from fake_firestore import FakeFirestore
+
+OPTIONS = ["3", "4", "5", "6", "7", "8"]
+
+
+def make_db(items):
+    return FakeFirestore({"local_info": {name: {"items": [
+        {"Name_en": f"{name} {i}", "Notes_en": "Open 24 hours during the festival", "RouteInfo_en": "Tirunelveli Road",
+         "ActiveDuring_en": "Kanda Sashti", "Timings_en": "12:00-15:00", "ContactInfo_en": "04639 242221"}
+        for i in range(items)]} for name in INFO_CATEGORIES}})
+
+
+def run_bot(bot, requests):
+    bot.process_user_input("bench", "start_command", "")
+    bot.process_user_input("bench", "text", "en")
+    started = time.perf_counter()
+    for option, _ in zip(itertools.cycle(OPTIONS), range(requests)):
+        bot.process_user_input("bench", "text", option)
+    return requests / (time.perf_counter() - started)
+
+
+def run_flask(bot, requests):
+    import app as web_app
+    web_app._bot_logic = bot
+    client = web_app.app.test_client()
+    for question in ("", "en"): client.post("/ask", json={"user_id": "bench", "question": question})
+    started = time.perf_counter()
+    for option, _ in zip(itertools.cycle(OPTIONS), range(requests)):
+        client.post("/ask", json={"user_id": "bench", "question": option})
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=25)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    try:
+        import app  # noqa: F401  (imported before LAZY_START is switched off, so it doesn't build its own bot)
+        runners = [("process_user_input", run_bot), ("Flask /ask", run_flask)]
+    except ImportError:
+        runners = [("process_user_input", run_bot)]
+        print("Flask is not installed; skipping the /ask measurement.")
+    bot_logic.LAZY_START = False
+
+    for label, runner in runners:
+        results = {}
+        for enabled in (False, True):
+            bot = BotLogic(db=make_db(args.items))
+            bot.render_cache.enabled = enabled
+            results[enabled] = runner(bot, args.requests)
+        print(f"{label:<20} before {results[False]:>9,.0f} req/s   after {results[True]:>9,.0f} req/s   "
+              f"({results[True] / results[False]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# benchmarks/bench_session_store.py
+# -*- coding: utf-8 -*-
+"""
+Load test for the session stores: simulates N one-off visitors (a start message
+followed by a language choice, as the web page sends) and samples traced memory
+as they arrive. With a bounded store the curve should flatten at max_sessions.
+
+    python benchmarks/bench_session_store.py [--sessions 1000000] [--max-sessions 50000]
+    python benchmarks/bench_session_store.py --store sqlite:////tmp/sessions.db --sessions 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+import uuid
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from session_store import create_session_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default="memory")
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--max-sessions", type=int, default=50_000)
+    parser.add_argument("--samples", type=int, default=10)
+    args = parser.parse_args()
+
+    store = create_session_store(args.store, ttl=1800, max_sessions=args.max_sessions)
+    step = max(args.sessions // args.samples, 1)
+    tracemalloc.start()
+    start = time.perf_counter()
+    print(f"{'sessions seen':>14} {'stored':>8} {'traced MB':>10} {'ops/s':>10}")
+    for i in range(1, args.sessions + 1):
+        user_id = str(uuid.uuid4())
+        store.put(user_id, {"lang": "en", "menu_level": "language_select"})
+        state = store.get(user_id)
+        state["menu_level"] = "main_menu"
+        store.put(user_id, state)
+        if i % step == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"{i:>14,} {len(store):>8,} {current / 2**20:>10.1f} {3 * i / (time.perf_counter() - start):>10,.0f}")
+    _, peak = tracemalloc.get_traced_memory()
+    print(f"peak traced memory: {peak / 2**20:.1f} MB")
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_snapshot.py
+# -*- coding: utf-8 -*-
+"""
+Local data snapshots (snapshot_store.py): how fast a bot boots from them, and what it
+answers while Firestore is unreachable.
+
+* restore: snapshot size on disk and the time DataLayer.restore_snapshots() takes to load it.
+* first data reply: with LAZY_START on, the time from constructing the bot to the first
+  category answer. Firestore takes `--init-delay` seconds to initialize and `--latency`
+  seconds per read. Runs cold (no snapshot) and warm (from the snapshot).
+* outage: Firestore never comes up. Without a snapshot the bot has nothing to show; with
+  one it answers from disk with a staleness notice. When Firestore returns, the next
+  refresh replaces the data, clears the notice and rewrites the snapshot.
+
+    python benchmarks/bench_snapshot.py [--lots 2000] [--items 200] [--init-delay 0.4] [--latency 0.08] [--runs 5]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import bot_logic
+from bot_logic import BotLogic, INFO_CATEGORIES
+from bench_parking_index import make_lots
+from fake_firestore import FakeFirestore
+
+HELP_CENTRES = "3"
+
+
+def make_data(lots, items):
+    local_info = {name: {"items": [{"Name_en": f"{name} {i}", "Name_ta": f"{name} {i} (ta)", "Notes_en": "Open 24 hours"}
+                                   for i in range(items)]} for name in INFO_CATEGORIES}
+    return {"local_info": local_info, "parking_lots": dict(make_lots(lots))}
+
+
+def first_data_reply(bot) -> str:
+    for question in ("", "en"): bot.process_user_input("bench", "text" if question else "start_command", question)
+    return bot.process_user_input("bench", "text", HELP_CENTRES)["text"]
+
+
+def bot_class(connect):
+    """BotLogic whose Firestore initialization is `connect(bot)` instead of the Firebase SDK."""
+    return type("BenchBot", (BotLogic,), {"initialize_firestore": lambda self: connect(self)})
+
+
+def time_first_reply(data, snapshot_dir, args) -> float:
+    def connect(bot):
+        time.sleep(args.init_delay)
+        bot.db = FakeFirestore(data, latency=args.latency)
+    started = time.perf_counter()
+    first_data_reply(bot_class(connect)(snapshot_dir=snapshot_dir))
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lots", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=200, help="items per local_info category")
+    parser.add_argument("--init-delay", type=float, default=0.4)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    data = make_data(args.lots, args.items)
+    directory = tempfile.mkdtemp(prefix="snapshots-")
+    try:
+        # Writes the snapshot, the way a running bot does after each refresh
+        bot_logic.LAZY_START = False
+        bot = BotLogic(db=FakeFirestore(data), snapshot_dir=directory)
+        restores = []
+        for _ in range(args.runs):
+            for src in bot.data._sources.values(): src.has_value = False
+            started = time.perf_counter()
+            restored = bot.data.restore_snapshots()
+            restores.append((time.perf_counter() - started) * 1000)
+        sizes = {name: os.path.getsize(bot.data.snapshots.path(name)) for name in restored}
+        print(f"restore: {statistics.median(restores):.1f} ms for "
+              + ", ".join(f"{name} ({size / 1024:.0f} KB)" for name, size in sizes.items())
+              + f"  [{args.lots} lots, {args.items} items x {len(INFO_CATEGORIES)} categories]")
+
+        bot_logic.LAZY_START = True
+        cold = [time_first_reply(data, "", args) for _ in range(args.runs)]
+        warm = [time_first_reply(data, directory, args) for _ in range(args.runs)]
+        print(f"\nfirst data reply (median of {args.runs}, init {args.init_delay * 1000:.0f} ms, {args.latency * 1000:.0f} ms per read):")
+        print(f"  cold boot, no snapshot   {statistics.median(cold):>9.1f} ms")
+        print(f"  warm boot from snapshot  {statistics.median(warm):>9.1f} ms")
+
+        print("\noutage (Firestore never initializes):")
+        down = bot_class(lambda bot: None)
+        bot_logic.LAZY_START = False
+        reply = first_data_reply(down(snapshot_dir=""))
+        print(f"  no snapshot:   {reply.splitlines()[0]}")
+        # Pretend the snapshot was taken an hour before the outage
+        for name in sizes: os.utime(bot.data.snapshots.path(name), (time.time() - 3600,) * 2)
+        outage = down(snapshot_dir=directory)
+        reply = first_data_reply(outage)
+        notice = next(line for line in reply.splitlines() if line.startswith("⚠️"))
+        print(f"  from snapshot: {reply.count('➡️')} items, with notice: {notice}")
+
+        # Firestore comes back with changed data
+        data["local_info"]["Help_Centres"]["items"] = [{"Name_en": "Reopened centre"}]
+        restored_db = FakeFirestore(data)
+        down.initialize_firestore = lambda self: setattr(self, "db", restored_db)
+        outage._next_connect_attempt = 0.0
+        for src in outage.data._sources.values(): src.retry_after = 0.0
+        outage.process_user_input("bench", "text", HELP_CENTRES)  # stale: starts the background refresh
+        deadline = time.time() + 5
+        while outage.data.stats()["local_info"]["from_snapshot"] and time.time() < deadline: time.sleep(0.01)
+        reply = outage.process_user_input("bench", "text", HELP_CENTRES)["text"]
+        print(f"  reconnected:   fresh data {'Reopened centre' in reply}, notice {'⚠️' in reply}, "
+              f"snapshot rewritten {time.time() - os.path.getmtime(outage.data.snapshots.path('local_info')) < 60}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
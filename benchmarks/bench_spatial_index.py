@@ -0,0 +1,83 @@
+# benchmarks/bench_spatial_index.py
+# -*- coding: utf-8 -*-
+"""
+k-nearest queries over `--points` places (default 100k) spread around Tiruchendur:
+the grid SpatialIndex (with and without NumPy) against a full haversine scan.
+
+Every index answer is checked against the full scan, so a wrong result fails the run.
+
+    python benchmarks/bench_spatial_index.py [--points 100000] [--queries 2000] [--k 5]
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+import common
+import spatial_index
+from parking_index import haversine_km
+from spatial_index import Place, SpatialIndex
+
+KINDS = ["parking", "Help_Centres", "First_Aid_Stations", "Temp_Bus_Stands", "Toilets_Near_Temple", "Annadhanam_Details"]
+CENTER = (8.4967, 78.1245)
+
+
+def make_places(n, spread, rng):
+    # Mostly clustered around the temple, with a long tail along the approach roads
+    places = []
+    for i in range(n):
+        scale = spread if rng.random() < 0.8 else spread * 6
+        places.append(Place(rng.choice(KINDS), f"p{i}", {"en": f"Place {i}"},
+                            CENTER[0] + rng.gauss(0, scale), CENTER[1] + rng.gauss(0, scale)))
+    return places
+
+
+def scan(places, lat, lon, k, kinds=None):
+    candidates = (p for p in places if kinds is None or p.kind in kinds)
+    return heapq.nsmallest(k, ((haversine_km(lat, lon, p.latitude, p.longitude), p) for p in candidates), key=lambda hit: hit[0])
+
+
+def timed(fn, queries):
+    samples, answers = [], []
+    for lat, lon, kinds in queries:
+        started = time.perf_counter()
+        answers.append(fn(lat, lon, kinds))
+        samples.append(time.perf_counter() - started)
+    return common.latency_summary(samples), answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--spread", type=float, default=0.02, help="std-dev of the point cloud, in degrees")
+    args = parser.parse_args()
+    rng = random.Random(3)
+    places = make_places(args.points, args.spread, rng)
+    queries = [(CENTER[0] + rng.gauss(0, args.spread * 2), CENTER[1] + rng.gauss(0, args.spread * 2),
+                None if rng.random() < 0.5 else [rng.choice(KINDS)]) for _ in range(args.queries)]
+
+    scan_queries = queries[:max(args.queries // 20, 20)]
+    scan_stats, expected = timed(lambda lat, lon, kinds: scan(places, lat, lon, args.k, kinds), scan_queries)
+    print(f"{'full scan':<22} p50 {scan_stats['p50_ms']:>9.3f} ms   p95 {scan_stats['p95_ms']:>9.3f} ms   ({len(scan_queries)} queries)")
+
+    numpy_module = spatial_index._numpy()
+    for label, use_numpy in (("grid + NumPy", True), ("grid, pure Python", False)):
+        if use_numpy and numpy_module is None:
+            print(f"{label:<22} skipped: NumPy is not installed")
+            continue
+        spatial_index._numpy_module = numpy_module if use_numpy else None
+        started = time.perf_counter()
+        index = SpatialIndex(places)
+        build_ms = (time.perf_counter() - started) * 1000
+        stats, answers = timed(lambda lat, lon, kinds: index.nearest(lat, lon, args.k, kinds), queries)
+        for got, want in zip(answers, expected):
+            assert [round(d, 9) for d, _ in got] == [round(d, 9) for d, _ in want], (got, want)
+        print(f"{label:<22} p50 {stats['p50_ms']:>9.3f} ms   p95 {stats['p95_ms']:>9.3f} ms   build {build_ms:.0f} ms")
+    spatial_index._numpy_module = numpy_module
+
+
+if __name__ == "__main__":
+    main()
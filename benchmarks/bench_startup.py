@@ -0,0 +1,85 @@
+# benchmarks/bench_startup.py
+# -*- coding: utf-8 -*-
+"""
+Cold-start benchmark for app.py: import time, time-to-first-byte of the landing page
+and of the first data-bearing /ask, with LAZY_START on and off.
+
+Every measurement runs in a fresh interpreter. Firestore is replaced by FakeFirestore with
+`--init-delay` seconds of client start-up and `--latency` seconds per read, so the numbers
+reflect the app's own start-up path rather than the network.
+
+    python benchmarks/bench_startup.py [--runs 5] [--save benchmarks/results/startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import common
+
+
+def child(init_delay: float, latency: float):
+    started = time.perf_counter()
+    import bot_logic
+    from fake_firestore import FakeFirestore
+
+    def fake_initialize(self):
+        time.sleep(init_delay)
+        self.db = FakeFirestore({"local_info": {name: {"items": [{"Name_en": name}]} for name in bot_logic.INFO_CATEGORIES},
+                                 "parking_lots": {}}, latency=latency)
+    # Patched before app is imported, since eager mode builds the bot at import time
+    bot_logic.BotLogic.initialize_firestore = fake_initialize
+    import app as web_app
+    imported = time.perf_counter()
+
+    client = web_app.app.test_client()
+    t0 = time.perf_counter()
+    client.get("/")
+    t1 = time.perf_counter()
+    for question in ("", "en"): client.post("/ask", json={"user_id": "bench", "question": question})
+    t2 = time.perf_counter()
+    client.post("/ask", json={"user_id": "bench", "question": "3"})
+    t3 = time.perf_counter()
+    print(json.dumps({"import_ms": (imported - started) * 1000, "index_ttfb_ms": (t1 - t0) * 1000,
+                      "first_menu_ms": (t2 - t1) * 1000, "first_data_ask_ms": (t3 - t2) * 1000,
+                      "total_to_first_data_ms": (t3 - started) * 1000}))
+
+
+def run_mode(lazy: bool, args) -> dict:
+    # No snapshots: every run starts cold, and the fake data never reaches the real snapshot directory
+    env = dict(os.environ, LAZY_START="true" if lazy else "false", DATA_SNAPSHOT_DIR="")
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--init-delay", str(args.init_delay),
+                              "--latency", str(args.latency)], env=env, cwd=common.REPO_ROOT, capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--init-delay", type=float, default=0.4)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--save", help="write the medians as JSON to this path")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child: return child(args.init_delay, args.latency)
+
+    results = {"eager": run_mode(False, args), "lazy": run_mode(True, args)}
+    print(f"{'median ms':<24}{'eager':>10}{'lazy':>10}")
+    for key in results["eager"]:
+        print(f"{key:<24}{results['eager'][key]:>10.1f}{results['lazy'][key]:>10.1f}")
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "init_delay_s": args.init_delay, "read_latency_s": args.latency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# benchmarks/common.py
+# -*- coding: utf-8 -*-
+"""Helpers shared by the benchmark scripts. Importing this puts the repo root on sys.path."""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path: sys.path.insert(0, REPO_ROOT)
+
+
+def percentile(sorted_samples, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples: return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_samples) + 0.5)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def latency_summary(samples_seconds) -> dict:
+    """p50/p95/p99/max in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples_seconds)
+    return {
+        "count": len(ordered),
+        **{f"p{p}_ms": round(percentile(ordered, p) * 1000, 3) for p in (50, 95, 99)},
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
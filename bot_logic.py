@@ -2,20 +2,34 @@
 # -*- coding: utf-8 -*-
 
 import os
+import asyncio
+import html
 import logging
-import time
 import json
-from typing import List, Dict, Any, Optional
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
-# --- Firestore / Firebase Admin Imports ---
-import firebase_admin
-from firebase_admin import credentials, firestore
-
-from math import radians, sin, cos, sqrt, atan2
 from collections import defaultdict
 from urllib.parse import quote_plus
 
+from data_layer import DataLayer
+from parking_index import ParkingIndex, haversine_km
+from parking_ingest import ParkingIngest
+from parking_stream import ParkingBroadcaster
+from parking_view import ParkingView
+from session_store import MemorySessionStore, create_session_store
+from snapshot_store import SnapshotStore
+from intent_engine import load_engine
+from render_cache import RenderCache
+from spatial_index import Place, SpatialIndex
+from gazetteer import load_gazetteer
+from metrics import REGISTRY, timed
+
 load_dotenv()
 
 # --- Configuration ---
@@ -23,6 +37,45 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 # This file is only used as a fallback for local testing
 FIRESTORE_CREDENTIALS_FILE = os.path.join(BASE_DIR, os.getenv("GOOGLE_SHEETS_CREDENTIALS_FILE", "credentials.json"))
+# Connect to Firestore and preload data in a background thread so construction returns immediately
+LAZY_START = os.getenv("LAZY_START", "true").lower() in ("1", "true", "yes")
+FIRESTORE_INIT_TIMEOUT = float(os.getenv("FIRESTORE_INIT_TIMEOUT", "20"))
+PRELOAD_WORKERS = int(os.getenv("PRELOAD_WORKERS", "6"))
+# Seconds between attempts to reconnect after Firestore failed to initialize
+FIRESTORE_RETRY_INTERVAL = float(os.getenv("FIRESTORE_RETRY_INTERVAL", "60"))
+# Last-known-good copies of local_info and parking_lots, loaded at start-up and served while Firestore is unreachable; empty disables.
+# Each Firebase project gets its own subdirectory, so deployments sharing a host never read each other's data
+DATA_SNAPSHOT_DIR = os.getenv("DATA_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "tiruchendur-bot"))
+# Seconds before cached Firestore data is considered stale and refreshed in the background
+LOCAL_INFO_CACHE_TTL = float(os.getenv("LOCAL_INFO_CACHE_TTL", "300"))
+# "batch" reads all local_info documents with one get_all call; "concurrent" issues parallel gets
+LOCAL_INFO_FETCH_MODE = os.getenv("LOCAL_INFO_FETCH_MODE", "batch")
+LOCAL_INFO_FETCH_TIMEOUT = float(os.getenv("LOCAL_INFO_FETCH_TIMEOUT", "10"))
+PARKING_CACHE_TTL = float(os.getenv("PARKING_CACHE_TTL", "30"))
+# Opt-in: stream parking_lots changes with an on_snapshot listener instead of polling
+PARKING_LIVE_UPDATES = os.getenv("PARKING_LIVE_UPDATES", "false").lower() in ("1", "true", "yes")
+# Off (0) by default: a listener sends nothing while parking_lots is unchanged, so silence alone is not a dead stream.
+# Set to N to distrust the live view after N seconds without a snapshot and poll instead.
+PARKING_LIVE_MAX_SILENCE = float(os.getenv("PARKING_LIVE_MAX_SILENCE", "0"))
+# Seconds between write-behind flushes of gate-counter events to parking_lots
+PARKING_FLUSH_INTERVAL = float(os.getenv("PARKING_FLUSH_INTERVAL", "2"))
+# Live parking streams (/parking/stream): seconds between checks for changes, keep-alive period, open streams per process
+PARKING_STREAM_INTERVAL = float(os.getenv("PARKING_STREAM_INTERVAL", "1"))
+PARKING_STREAM_HEARTBEAT = float(os.getenv("PARKING_STREAM_HEARTBEAT", "15"))
+PARKING_STREAM_MAX_SUBSCRIBERS = int(os.getenv("PARKING_STREAM_MAX_SUBSCRIBERS", "5000"))
+# Most parking lots listed in a single reply
+PARKING_MAX_RESULTS = int(os.getenv("PARKING_MAX_RESULTS", "10"))
+# Where conversation state lives: "memory" (per process) or "sqlite:///path" (shared by workers on one host)
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "memory")
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "50000"))
+# Typed questions at the main menu are answered by the offline intent model above this confidence
+INTENT_MODEL_ENABLED = os.getenv("INTENT_MODEL_ENABLED", "true").lower() in ("1", "true", "yes")
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.6"))
+# Memoize formatted category and parking replies per (language, data version)
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# How many places a "nearest to me" reply lists when the browser shares its location
+NEARBY_MAX_RESULTS = int(os.getenv("NEARBY_MAX_RESULTS", "5"))
 
 # Centralized logging
 logging.basicConfig(
@@ -31,6 +84,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+HANDLER_SECONDS = REGISTRY.histogram("tiruchendur_handler_seconds", "Time spent in each _handle_* menu handler.", ("handler",))
+FIRESTORE_READS = REGISTRY.counter("tiruchendur_firestore_reads_total", "Documents read from Firestore, per collection.", ("collection",))
+LOADER_SECONDS = REGISTRY.histogram("tiruchendur_data_load_seconds", "Time each data layer loader spent reading Firestore, per source.", ("source",))
+FETCH_SECONDS = REGISTRY.histogram("tiruchendur_firestore_fetch_seconds", "Latency of single-document reads inside loaders, by document and outcome.", ("document", "outcome"))
+
 # --- All Constants and Menu Texts ---
 GOOGLE_FORM_FEEDBACK_LINK = "https://docs.google.com/forms/d/e/1FAIpQLSempmuc0_3KkCX3JK3wCZTod51Zw3o8ZkG78kQpcMTmVTGsPg/viewform?usp=header"
 MENU_TEXTS = {
@@ -67,6 +125,7 @@ MENU_TEXTS = {
         "local_info_item_format_annadhanam": "\n🍚 {ItemName}\n🗺️ {ViewMapLink}\n🕒 Timings: {Timings}\n📞 Contact: {ContactInfo}\n📝 Notes: {Notes}",
         "no_local_info_found": "No information currently available for {category_name} in Tiruchendur.",
         "fetching_data_error": "Sorry, I couldn't fetch the latest information.",
+        "stale_data_notice": "\n\n⚠️ Live updates are unavailable right now. This information was last updated {age} ago.",
         "parking_route_prompt": "Which route are you primarily arriving from for parking?\n(Type the number or name)\n1. Tirunelveli Route\n2. Thoothukudi Route\n3. Nagercoil Route\n4. Other/Already in Tiruchendur",
         "parking_for_route_title": "--- Parking Options for {RouteName} Route ---",
         "parking_info_title": "--- Tiruchendur Parking Availability ---",
@@ -77,7 +136,10 @@ MENU_TEXTS = {
         "temple_dress_code_details": "Dress Code: Traditional Indian attire is recommended. Men: Dhoti/Pants. Women: Saree/Salwar Kameez.",
         "goodbye_message": "Nandri! Vanakkam!",
         "nearest_place_intro": "📍 Here are results for {place_type_display_name} in the Tiruchendur area:",
-        "place_details_maps": "\n{name}\nAddress: {address}\n🗺️ {maps_url}"
+        "place_details_maps": "\n{name}\nAddress: {address}\n🗺️ {maps_url}",
+        "nearest_results_title": "📍 Nearest {place_type_display_name} to you:",
+        "nearest_place_format": "\n➡️ {name} ({kind})\n📍 {distance:.1f} km away\n🗺️ {ViewMapLink}",
+        "parking_place_kind": "Parking"
     },
     "ta": {
         # ... (Add full Tamil translations here for a complete experience)
@@ -91,6 +153,23 @@ INFO_CATEGORIES = {
     "Toilets_Near_Temple": ("option_toilets_temple", "local_info_item_format", "View Map & Directions"),
     "Annadhanam_Details": ("option_annadhanam", "local_info_item_format_annadhanam", "View Map & Directions"),
 }
+MENU_KEYS = {
+    "main_menu": ["main_menu_prompt", "option_parking_availability", "option_temple_info", "option_help_centres", "option_first_aid", "option_temp_bus_stands", "option_toilets_temple", "option_annadhanam", "option_emergency_contacts", "option_nearby_facilities", "option_change_language", "option_feedback", "option_end_conversation_text"],
+    "temple_info_menu": ["temple_info_menu_prompt", "temple_timings_menu_item", "temple_dress_code_menu_item", "temple_seva_tickets_menu_item", "option_go_back_text"]
+}
+# Answers to parking_route_prompt that are taken literally before any town-name matching
+ROUTE_MENU_CHOICES = {"1": "tirunelveli", "2": "thoothukudi", "3": "nagercoil", "4": "any"}
+PARKING_PLACE_KIND = "parking"
+# Words in a nearby-search query that select which kinds of places to rank by distance
+NEARBY_KEYWORDS = {
+    PARKING_PLACE_KIND: ["parking", "park my", "car park", "பார்க்கிங்", "வாகன நிறுத்த"],
+    "Help_Centres": ["help centre", "help center", "help desk", "enquiry", "inquiry", "உதவி மைய"],
+    "First_Aid_Stations": ["first aid", "hospital", "medical", "doctor", "clinic", "ambulance", "முதலுதவி", "மருத்துவ"],
+    "Temp_Bus_Stands": ["bus", "பேருந்து"],
+    "Toilets_Near_Temple": ["toilet", "restroom", "washroom", "bathroom", "கழிப்பறை", "கழிவறை"],
+    "Annadhanam_Details": ["annadhanam", "annadanam", "free food", "meal", "அன்னதான"],
+}
+TEMPLE_INFO_KEYS = {"timings": "temple_timings_details", "dress_code": "temple_dress_code_details", "seva_details": "temple_seva_tickets_menu_item"}
 OVERALL_ROUTE_MY_MAPS = {
     "thoothukudi": "1RTKvzXANpeJXI5wsW28WGclXkO2T7kw",
     "tirunelveli": "1cROpQnVd_Jk7B6KPDyhreS98ek1GDrQ",
@@ -98,30 +177,109 @@ OVERALL_ROUTE_MY_MAPS = {
 }
 
 class BotLogic:
-    def __init__(self):
+    def __init__(self, db=None, session_store=None, snapshot_dir=None):
+        """
+        `snapshot_dir` defaults to the project's directory under DATA_SNAPSHOT_DIR when the bot connects to Firestore itself;
+        a bot handed a client (a fake one in benchmarks) keeps no snapshots unless given a directory.
+        """
         logger.info("Initializing BotLogic...")
-        self.user_states = {}
+        self.sessions = session_store if session_store is not None else create_session_store(SESSION_STORE_URL, ttl=SESSION_TTL, max_sessions=SESSION_MAX)
+        self._local = threading.local()
+        self.intents = load_engine() if INTENT_MODEL_ENABLED else None
+        self.gazetteer = None
+        self._menu_texts = self._compile_menus()
+        self.render_cache = RenderCache(enabled=RENDER_CACHE_ENABLED)
+        self._places, self._places_lock = None, threading.Lock()
         self.TIRUCHENDUR_COORDS = (8.4967, 78.1245)
-        self.LOCAL_INFO_CACHE, self.LAST_LOCAL_INFO_FETCH_TIME = {}, {}
-        self.PARKING_LOTS_CACHE, self.LAST_PARKING_LOTS_FETCH_TIME = [], 0
-        self.CACHE_DURATION = 300 # 5 minutes
         self.PARKING_FULL_THRESHOLD_PERCENT = 95.0
-        self.db = None
-        self.initialize_firestore()
+        self.db = db
+        self._connect_lock, self._next_connect_attempt = threading.Lock(), 0.0
+        self.ingest = ParkingIngest(self._firestore, self.parking_index, flush_interval=PARKING_FLUSH_INTERVAL)
+        if snapshot_dir is None: snapshot_dir = self._default_snapshot_dir() if db is None else ""
+        self.data = DataLayer(snapshots=SnapshotStore(snapshot_dir) if snapshot_dir else None)
+        self.data.register("local_info", self._load_local_info, ttl=LOCAL_INFO_CACHE_TTL, default={}, restore=self._restore_local_info)
+        self.data.register("parking_lots", self._load_parking_lots, ttl=PARKING_CACHE_TTL, default=self._new_parking_index(),
+                           dump=ParkingIndex.documents, restore=self._new_parking_index)
+        # Milliseconds, and no network: replies have data before Firestore is even connected
+        self.data.restore_snapshots()
+        self.parking_view, self._next_listener_attempt = None, 0.0
+        self.parking_stream = ParkingBroadcaster(self.parking_index, self._render_parking_lot, OVERALL_ROUTE_MY_MAPS.keys(),
+                                                 SUPPORTED_LANGUAGES.keys(), limit=PARKING_MAX_RESULTS, interval=PARKING_STREAM_INTERVAL,
+                                                 heartbeat=PARKING_STREAM_HEARTBEAT, max_subscribers=PARKING_STREAM_MAX_SUBSCRIBERS)
+        self._register_metrics()
+        self._firestore_ready = threading.Event()
+        if self.db is not None: self._firestore_ready.set()
+        if LAZY_START:
+            threading.Thread(target=self._warm_up, name="bot-warm-up", daemon=True).start()
+        else:
+            self._warm_up()
+
+    def _warm_up(self):
+        """Loads the gazetteer, connects to Firestore and preloads data; runs in the background when LAZY_START is on."""
+        # Local and quick, so route answers don't wait on (or get lost with) the Firestore connection
+        self.gazetteer = load_gazetteer()
+        try:
+            if self.db is None: self.initialize_firestore()
+        finally:
+            self._next_connect_attempt = time.time() + FIRESTORE_RETRY_INTERVAL
+            self._firestore_ready.set()
         self._preload_data()
+        if PARKING_LIVE_UPDATES: self._start_parking_listener()
+
+    def _register_metrics(self):
+        """Scrape-time views of counters the session store, data layer and render cache already keep."""
+        REGISTRY.callback("tiruchendur_active_sessions", "Conversations currently held by the session store.", "gauge",
+                          lambda: {(): len(self.sessions)})
+        REGISTRY.callback("tiruchendur_parking_stream_subscribers", "Open /parking/stream connections.", "gauge",
+                          lambda: {(): len(self.parking_stream)})
+        REGISTRY.callback("tiruchendur_render_cache_requests_total", "Render cache lookups by result.", "counter",
+                          lambda: {("hit",): self.render_cache.hits, ("miss",): self.render_cache.misses}, ("result",))
+        REGISTRY.callback("tiruchendur_data_cache_requests_total", "Data layer reads by source and result.", "counter",
+                          lambda: {(name, result): s[key] for name, s in self.data.stats().items()
+                                   for result, key in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses"))},
+                          ("source", "result"))
+        REGISTRY.callback("tiruchendur_data_age_seconds", "Age of the data each source is serving.", "gauge",
+                          lambda: {(name,): s["age_seconds"] for name, s in self.data.stats().items() if s["age_seconds"] is not None},
+                          ("source",))
+        REGISTRY.callback("tiruchendur_data_refreshes_total", "Data layer refreshes by source and outcome.", "counter",
+                          lambda: {(name, outcome): s[key] for name, s in self.data.stats().items()
+                                   for outcome, key in (("ok", "refreshes"), ("failed", "failures"))},
+                          ("source", "outcome"))
+        REGISTRY.callback("tiruchendur_data_last_refresh_seconds", "Duration of each source's last successful refresh.", "gauge",
+                          lambda: {(name,): s["last_refresh_seconds"] for name, s in self.data.stats().items() if s["last_refresh_seconds"] is not None},
+                          ("source",))
+
+    def _firestore(self):
+        """The Firestore client, waiting for a background initialization that is still running."""
+        if not self._firestore_ready.wait(FIRESTORE_INIT_TIMEOUT):
+            logger.warning("Firestore is still initializing; answering without data.")
+        elif self.db is None:
+            self._reconnect_firestore()
+        return self.db
+
+    def _reconnect_firestore(self):
+        """Retries a failed initialization, at most every FIRESTORE_RETRY_INTERVAL seconds; callers never wait on another's attempt."""
+        if time.time() < self._next_connect_attempt or not self._connect_lock.acquire(blocking=False): return
+        try:
+            if self.db is not None: return
+            self._next_connect_attempt = time.time() + FIRESTORE_RETRY_INTERVAL
+            self.initialize_firestore()
+            if self.db is None: return
+            logger.info("Reconnected to Firestore.")
+            if PARKING_LIVE_UPDATES and self.parking_view is None: self._start_parking_listener()
+        finally:
+            self._connect_lock.release()
 
     def initialize_firestore(self):
+        # Imported lazily: the Firebase Admin SDK is slow to import and only needed for data-bearing requests
+        import firebase_admin
+        from firebase_admin import credentials, firestore
         if firebase_admin._apps:
             if not self.db: self.db = firestore.client()
             return
         logger.info("Initializing Firebase Admin SDK...")
-        google_creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
         try:
-            if google_creds_json: creds_dict = json.loads(google_creds_json)
-            else:
-                with open(FIRESTORE_CREDENTIALS_FILE, 'r') as f:
-                    creds_dict = json.load(f)
-            cred = credentials.Certificate(creds_dict)
+            cred = credentials.Certificate(self._read_credentials())
             firebase_admin.initialize_app(cred)
             self.db = firestore.client()
             logger.info("Firestore client initialized successfully.")
@@ -131,42 +289,171 @@ class BotLogic:
             logger.error(f"Failed to initialize Firestore: {e}", exc_info=True)
             self.db = None
 
+    @staticmethod
+    def _read_credentials() -> Dict[str, Any]:
+        """The service account from GOOGLE_CREDENTIALS_JSON, else from FIRESTORE_CREDENTIALS_FILE."""
+        google_creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
+        if google_creds_json: return json.loads(google_creds_json)
+        with open(FIRESTORE_CREDENTIALS_FILE, 'r') as f:
+            return json.load(f)
+
+    @classmethod
+    def _default_snapshot_dir(cls) -> str:
+        """DATA_SNAPSHOT_DIR/<project id>, read from the credentials without connecting; DATA_SNAPSHOT_DIR if there is none."""
+        if not DATA_SNAPSHOT_DIR: return ""
+        try: project_id = str(cls._read_credentials().get("project_id") or "")
+        except (OSError, ValueError, AttributeError): project_id = ""
+        project_id = re.sub(r"[^\w.-]", "_", project_id).lstrip(".")
+        return os.path.join(DATA_SNAPSHOT_DIR, project_id) if project_id else DATA_SNAPSHOT_DIR
+
     def _preload_data(self):
-        if not self.db: return
+        if not self.db:
+            restored = [name for name, s in self.data.stats().items() if s["from_snapshot"]]
+            if restored: logger.warning(f"Firestore is unavailable; serving {restored} from local snapshots")
+            return
         logger.info("Pre-loading all data from Firestore...")
-        for name in INFO_CATEGORIES.keys():
-            self.fetch_local_info(name, force_refresh=True)
-        self.fetch_all_parking_lots(force_refresh=True)
+        self.data.refresh_all(max_workers=PRELOAD_WORKERS)
         logger.info("Pre-loading complete.")
 
+    def _start_parking_listener(self):
+        """Opt-in push mode: keep parking availability current from an on_snapshot listener."""
+        if not self.db: return
+        try:
+            self.parking_view = ParkingView(OVERALL_ROUTE_MY_MAPS.keys(), self.TIRUCHENDUR_COORDS, self.PARKING_FULL_THRESHOLD_PERCENT,
+                                            offsets=self.ingest.offset, max_silence=PARKING_LIVE_MAX_SILENCE)
+            self.parking_view.subscribe(self.db)
+            logger.info("Subscribed to live parking updates.")
+        except Exception as e:
+            logger.error(f"Could not subscribe to parking updates, falling back to polling: {e}", exc_info=True)
+            self.parking_view = None
+
+    def _live_parking_view(self) -> Optional[ParkingView]:
+        """The push-mode view while it is live; a listener whose stream died is replaced, at most every FIRESTORE_RETRY_INTERVAL."""
+        view = self.parking_view
+        if view is None or view.is_live(): return view
+        if not view.listening and time.time() >= self._next_listener_attempt and self._connect_lock.acquire(blocking=False):
+            try:
+                self._next_listener_attempt = time.time() + FIRESTORE_RETRY_INTERVAL
+                logger.warning("Live parking listener stopped; polling until it is resubscribed.")
+                view.close()
+                self._start_parking_listener()
+            finally:
+                self._connect_lock.release()
+        view = self.parking_view
+        return view if view is not None and view.is_live() else None
+
     def fetch_firestore_collection(self, collection_name: str) -> List[Dict[str, Any]]:
-        if not self.db: return []
+        db = self._firestore()
+        if not db: return []
         try:
-            return [doc.to_dict() for doc in self.db.collection(collection_name).stream()]
+            docs = [doc.to_dict() for doc in db.collection(collection_name).stream()]
+            FIRESTORE_READS.inc(collection_name, amount=len(docs))
+            return docs
         except Exception as e:
             logger.error(f"Error fetching Firestore collection '{collection_name}': {e}", exc_info=True)
             return []
-            
-    def fetch_local_info(self, category_name: str, force_refresh: bool = False):
-        last_fetch_attr = f"LAST_LOCAL_INFO_FETCH_TIME_{category_name}"
-        if not hasattr(self, last_fetch_attr): setattr(self, last_fetch_attr, 0)
-        if (not force_refresh) and (time.time() - getattr(self, last_fetch_attr, 0) < self.CACHE_DURATION) and self.LOCAL_INFO_CACHE.get(category_name):
-            return
-        if not self.db: return
+
+    # --- Loaders used by the data layer. They raise on errors so the last good copy is kept. ---
+
+    def _require_firestore(self):
+        db = self._firestore()
+        if not db: raise ConnectionError("Firestore is not connected")
+        return db
+
+    @timed("local_info", LOADER_SECONDS)
+    def _load_local_info(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Reads every INFO_CATEGORIES document from `local_info` in one batched round trip
+        (or concurrently when LOCAL_INFO_FETCH_MODE is "concurrent"). Categories that fail
+        keep their previous items; the refresh only fails if no category could be read.
+        """
+        db = self._require_firestore()
+        items_by_category = dict(self.data.peek("local_info"))
+        refs = [db.collection("local_info").document(name) for name in INFO_CATEGORIES]
+        if LOCAL_INFO_FETCH_MODE == "concurrent":
+            fetched = self._fetch_local_info_concurrently(refs)
+        else:
+            fetched = self._fetch_local_info_batch(db, refs)
+            # A batch that broke off partway: fetch what it didn't return one by one, so one bad document doesn't drop the rest
+            unread = [ref for ref in refs if ref.id not in fetched]
+            if unread: fetched.update(self._fetch_local_info_concurrently(unread))
+        missing = [name for name in INFO_CATEGORIES if name not in fetched]
+        if len(missing) == len(INFO_CATEGORIES): raise RuntimeError("No local_info category could be fetched")
+        if missing: logger.warning(f"Keeping previous local_info for categories that failed to load: {missing}")
+        items_by_category.update(fetched)
+        return items_by_category
+
+    def _fetch_local_info_batch(self, db, refs) -> Dict[str, List[Dict[str, Any]]]:
+        fetched, started = {}, time.perf_counter()
         try:
-            doc = self.db.collection("local_info").document(category_name).get()
-            items = doc.to_dict().get("items", []) if doc.exists else []
-            self.LOCAL_INFO_CACHE[category_name] = items
-            setattr(self, last_fetch_attr, time.time())
+            for doc in db.get_all(refs, timeout=LOCAL_INFO_FETCH_TIMEOUT):
+                fetched[doc.id] = doc.to_dict().get("items", []) if doc.exists else []
+                FIRESTORE_READS.inc("local_info")
+                self._record_fetch(f"local_info/{doc.id}", time.perf_counter() - started)
         except Exception as e:
-            logger.error(f"Error fetching Firestore doc '{category_name}': {e}", exc_info=True)
+            logger.error(f"Batched local_info read failed after {len(fetched)} of {len(refs)} documents: {e}", exc_info=True)
+            for ref in refs:
+                if ref.id not in fetched: self._record_fetch(f"local_info/{ref.id}", time.perf_counter() - started, ok=False)
+        return fetched
+
+    def _fetch_local_info_concurrently(self, refs) -> Dict[str, List[Dict[str, Any]]]:
+        def fetch(ref):
+            started = time.perf_counter()
+            try:
+                doc = ref.get(timeout=LOCAL_INFO_FETCH_TIMEOUT)
+            except Exception:
+                self._record_fetch(f"local_info/{ref.id}", time.perf_counter() - started, ok=False)
+                raise
+            self._record_fetch(f"local_info/{ref.id}", time.perf_counter() - started)
+            FIRESTORE_READS.inc("local_info")
+            return doc.to_dict().get("items", []) if doc.exists else []
+
+        fetched = {}
+        pool = ThreadPoolExecutor(max_workers=PRELOAD_WORKERS, thread_name_prefix="local-info")
+        futures = {pool.submit(fetch, ref): ref.id for ref in refs}
+        try:
+            for future in as_completed(futures, timeout=LOCAL_INFO_FETCH_TIMEOUT):
+                try: fetched[futures[future]] = future.result()
+                except Exception as e: logger.error(f"Error fetching Firestore doc '{futures[future]}': {e}")
+        except FuturesTimeout:
+            logger.error(f"Timed out waiting for local_info documents after {LOCAL_INFO_FETCH_TIMEOUT}s")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return fetched
+
+    def _record_fetch(self, key: str, seconds: float, ok: bool = True):
+        self.data.record_fetch(key, seconds, ok=ok)
+        FETCH_SECONDS.observe(seconds, key, "ok" if ok else "failed")
+
+    @staticmethod
+    def _restore_local_info(snapshot: Any) -> Dict[str, List[Dict[str, Any]]]:
+        if not isinstance(snapshot, dict): raise ValueError("local_info snapshot is not an object")
+        return {category: items for category, items in snapshot.items() if category in INFO_CATEGORIES and isinstance(items, list)}
+
+    def _new_parking_index(self, docs=()) -> ParkingIndex:
+        return ParkingIndex.from_documents(docs, OVERALL_ROUTE_MY_MAPS.keys(), self.TIRUCHENDUR_COORDS,
+                                           self.PARKING_FULL_THRESHOLD_PERCENT, offsets=self.ingest.offset)
+
+    @timed("parking_lots", LOADER_SECONDS)
+    def _load_parking_lots(self) -> ParkingIndex:
+        db = self._require_firestore()
+        docs = [(doc.id, doc.to_dict()) for doc in db.collection("parking_lots").stream()]
+        FIRESTORE_READS.inc("parking_lots", amount=len(docs))
+        return self._new_parking_index(docs)
+
+    def fetch_local_info(self, category_name: str, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        if force_refresh: self.data.refresh("local_info")
+        return self.data.get("local_info").get(category_name, [])
+
+    def fetch_all_parking_lots(self, force_refresh: bool = False) -> ParkingIndex:
+        if force_refresh: self.data.refresh("parking_lots")
+        return self.data.get("parking_lots")
+
+    def parking_index(self) -> ParkingIndex:
+        """The live view's index once it has synced, otherwise the polled one."""
+        view = self._live_parking_view()
+        return view.index if view is not None else self.fetch_all_parking_lots()
 
-    def fetch_all_parking_lots(self, force_refresh: bool = False):
-        if (not force_refresh) and (time.time() - self.LAST_PARKING_LOTS_FETCH_TIME < self.CACHE_DURATION) and self.PARKING_LOTS_CACHE:
-            return
-        self.PARKING_LOTS_CACHE = self.fetch_firestore_collection("parking_lots")
-        self.LAST_PARKING_LOTS_FETCH_TIME = time.time()
-    
     def _generate_embed_link(self, query: str = "", my_map_id: str = "") -> str:
         """Generates a URL for embedding inside the webpage's iframe."""
         if my_map_id:
@@ -176,10 +463,13 @@ class BotLogic:
         return ""
 
     def _get_formatted_firestore_data(self, user_id: str, category_name: str) -> str:
-        self.fetch_local_info(category_name, force_refresh=True)
-        data_items = self.LOCAL_INFO_CACHE.get(category_name, [])
-        lang = self.user_states[user_id].get("lang", "en")
-        
+        items_by_category, version = self.data.get_versioned("local_info")
+        lang = self._state(user_id).get("lang", "en")
+        reply = self.render_cache.get_or_render(("local_info", category_name, lang, version),
+            lambda: self._render_local_info(user_id, category_name, items_by_category.get(category_name, []), lang))
+        return reply + self._stale_notice(user_id, "local_info")
+
+    def _render_local_info(self, user_id: str, category_name: str, data_items: List[Dict[str, Any]], lang: str) -> str:
         category_key, item_format_key, link_text = INFO_CATEGORIES.get(category_name, ("", "", ""))
         if not category_key: return "Error: Unknown data category."
         
@@ -209,54 +499,24 @@ class BotLogic:
             reply_parts.append(item_template.format_map(format_kwargs))
         return "".join(reply_parts)
         
+    @timed()
     def find_available_parking(self, user_id: str, route_preference: Optional[str] = None) -> str:
-        self.fetch_all_parking_lots(force_refresh=True)
-        current_lang = self.user_states[user_id].get("lang", "en")
-        
-        applicable_lots = [lot for lot in self.PARKING_LOTS_CACHE if (not route_preference or route_preference == "any" or route_preference.lower() in str(lot.get("Route_en", "any")).lower())]
-        if not applicable_lots: return self.get_text(user_id, "no_parking_available")
+        current_lang = self._state(user_id).get("lang", "en")
+        view = self._live_parking_view()
+        index = view.index if view is not None else self.fetch_all_parking_lots()
+        reply = self.render_cache.get_or_render(("parking", route_preference, current_lang, index.state),
+            lambda: self._render_parking(user_id, index, route_preference, current_lang))
+        return reply if view is not None else reply + self._stale_notice(user_id, "parking_lots")
 
-        processed_lots = []
-        for lot in applicable_lots:
-            try:
-                is_open = str(lot.get('IsParkingAvailable', 'FALSE')).upper() in ['TRUE', '1']
-                if not is_open: continue
-                available = int(lot.get('Total_Space', 0))
-                capacity = int(lot.get('TotalCapacity', 0))
-                if capacity <= 0: continue
-                percentage_full = ((capacity - available) / capacity * 100) if capacity > 0 else 100
-                if available > 0 and percentage_full < self.PARKING_FULL_THRESHOLD_PERCENT:
-                    lot.update({
-                        "Availability": available, "PercentageFull": percentage_full,
-                        "Distance": self.haversine(self.TIRUCHENDUR_COORDS[0], self.TIRUCHENDUR_COORDS[1], float(lot['Latitude']), float(lot['Longitude']))
-                    })
-                    processed_lots.append(lot)
-            except (ValueError, TypeError):
-                logger.warning(f"Skipping parking lot due to invalid data: {lot.get('Parking_name_en')}")
-        
-        if not processed_lots: return self.get_text(user_id, "no_parking_available")
+    def _render_parking(self, user_id: str, index: ParkingIndex, route_preference: Optional[str], current_lang: str) -> str:
+        route = route_preference if route_preference in OVERALL_ROUTE_MY_MAPS else None
+        sorted_lots = index.top(route, limit=PARKING_MAX_RESULTS)
+        if not sorted_lots: return self.get_text(user_id, "no_parking_available")
 
-        sorted_lots = sorted(processed_lots, key=lambda x: (x['PercentageFull'], int(x.get('Priority', 99))))
-        
         title = self.get_text(user_id, "parking_for_route_title" if route_preference and route_preference != "any" else "parking_info_title", RouteName=route_preference.capitalize())
-        
-        details_list = []
-        for lot in sorted_lots:
-            parking_name = lot.get(f"Parking_name_{current_lang}", lot.get("Parking_name_en"))
-            
-            embed_url = self._generate_embed_link(query=f"{parking_name}, Tiruchendur")
-            view_map_link = f'<a href="{embed_url}" data-embed="true">View Map & Get Directions</a>'
-            
-            details_list.append(self.get_text(user_id, "parking_lot_details_format", 
-                ParkingName=parking_name, 
-                ViewMapLink=view_map_link,
-                Distance=lot['Distance'], 
-                Availability=lot['Availability'], 
-                TotalCapacity=lot['TotalCapacity'], 
-                PercentageFull=lot['PercentageFull']
-            ))
-        
-        final_response = f"{title}\n" + "\n".join(details_list)
+        # The lots sit in a .parking-view that the page keeps current from /parking/stream
+        lots_html = "".join(self._render_parking_lot(lot, current_lang) for lot in sorted_lots)
+        final_response = f'{title}<span class="parking-view" data-route="{route or "any"}" data-lang="{current_lang}">{lots_html}</span>'
 
         if route_preference and route_preference in OVERALL_ROUTE_MY_MAPS:
             overall_map_embed_url = self._generate_embed_link(my_map_id=OVERALL_ROUTE_MY_MAPS[route_preference])
@@ -264,16 +524,73 @@ class BotLogic:
                 overall_map_url=overall_map_embed_url, RouteName=route_preference.capitalize())
         return final_response
     
+    def _stale_notice(self, user_id, source: str) -> str:
+        """Says how old the data is when it may be out of date (see DataLayer.staleness)."""
+        age = self.data.staleness(source)
+        if age is None: return ""
+        minutes = int(age // 60)
+        when = f"{minutes // 1440} d" if minutes >= 1440 else (f"{minutes // 60} h {minutes % 60} min" if minutes >= 60 else f"{max(minutes, 1)} min")
+        return self.get_text(user_id, "stale_data_notice", age=when)
+
+    def _render_parking_lot(self, lot, lang: str) -> str:
+        """One lot's details, wrapped so a streamed update can replace it in place."""
+        parking_name = lot.name(lang)
+        embed_url = self._generate_embed_link(query=f"{parking_name}, Tiruchendur")
+        view_map_link = f'<a href="{embed_url}" data-embed="true">View Map & Get Directions</a>'
+        details = self._lookup_text(lang, "parking_lot_details_format").format(
+            ParkingName=parking_name,
+            ViewMapLink=view_map_link,
+            Distance=lot.distance,
+            Availability=lot.available,
+            TotalCapacity=lot.capacity,
+            PercentageFull=lot.percentage_full
+        )
+        return f'<span data-lot="{html.escape(lot.doc_id)}">\n{details}</span>'
+
     # --- The rest of the file (handlers, helpers) is correct and included for completeness ---
     
     def _get_response_structure(self, text="", photos=None, buttons=None):
         return {"text": text, "photos": photos or [], "buttons": buttons or []}
 
-    def process_user_input(self, user_id: str, input_type: str, data: Any, user_name: str = "User") -> Dict:
-        if input_type == 'start_command' or user_id not in self.user_states:
-            self.user_states[user_id] = {"lang": "en", "menu_level": "language_select"}
-            return self._change_language(user_id, is_initial=True, user_name=user_name)
-        state = self.user_states[user_id]
+    def process_user_input(self, user_id: str, input_type: str, data: Any, user_name: str = "User",
+                           location: Optional[Tuple[float, float]] = None) -> Dict:
+        state = None if input_type == 'start_command' else self.sessions.get(user_id)
+        is_new_session = state is None
+        if is_new_session: state = {"lang": "en", "menu_level": "language_select"}
+        self._local.session, self._local.location = (user_id, state), location
+        try:
+            if is_new_session: reply = self._change_language(user_id, is_initial=True, user_name=user_name)
+            else: reply = self._process_session_input(user_id, state, data, user_name)
+        finally:
+            self._local.session = self._local.location = None
+        # An emptied state means the conversation was ended
+        if state: self.sessions.put(user_id, state)
+        else: self.sessions.delete(user_id)
+        return reply
+
+    async def process_user_input_async(self, user_id: str, input_type: str, data: Any, user_name: str = "User",
+                                       location: Optional[Tuple[float, float]] = None) -> Dict:
+        """
+        process_user_input for an event loop. Replies are rendered from in-memory data, so once Firestore
+        is connected and every source has loaded once, the state machine runs inline on the loop; until
+        then, or with a disk-backed session store, the call runs on a worker thread instead.
+        """
+        if self._would_block():
+            return await asyncio.get_running_loop().run_in_executor(None, self.process_user_input, user_id, input_type, data, user_name, location)
+        return self.process_user_input(user_id, input_type, data, user_name, location)
+
+    def _would_block(self) -> bool:
+        """True if answering now could wait on Firestore or on disk."""
+        if not self._firestore_ready.is_set() or not isinstance(self.sessions, MemorySessionStore): return True
+        return not all(self.data.is_loaded(name) for name in self.data.names())
+
+    def _state(self, user_id) -> Dict[str, Any]:
+        """The session of the user whose message is being processed, loaded once per request."""
+        active = getattr(self._local, "session", None)
+        if active is not None and active[0] == user_id: return active[1]
+        return (self.sessions.get(user_id) if user_id else None) or {}
+
+    def _process_session_input(self, user_id: str, state: Dict[str, Any], data: Any, user_name: str) -> Dict:
         if state.get("menu_level") == "language_select":
             lang_choice = str(data).strip().lower()
             if lang_choice in SUPPORTED_LANGUAGES:
@@ -284,14 +601,13 @@ class BotLogic:
                 return self._change_language(user_id, user_name=user_name)
         text_input = str(data).strip()
         if text_input.lower() == 'x':
-            lang = state.get("lang", "en")
-            if user_id in self.user_states: del self.user_states[user_id]
+            state.clear()
             return self._get_response_structure(self.get_text(user_id, "goodbye_message"))
         handler = getattr(self, f"_handle_{state.get('menu_level', 'main_menu')}", self._handle_invalid_state)
-        return handler(user_id, text_input)
+        with HANDLER_SECONDS.time(handler.__name__): return handler(user_id, text_input)
 
     def _handle_invalid_state(self, user_id, text_input):
-        self.user_states[user_id]["menu_level"] = "main_menu"
+        self._state(user_id)["menu_level"] = "main_menu"
         return self._get_response_structure(f"{self.get_text(user_id, 'invalid_menu_option')}\n\n{self._get_menu_text('main_menu', user_id)}")
 
     def _handle_main_menu(self, user_id, choice):
@@ -309,7 +625,7 @@ class BotLogic:
         }
         new_level, action = menu_actions.get(choice, (None, None))
         if new_level:
-            self.user_states[user_id]["menu_level"] = new_level
+            self._state(user_id)["menu_level"] = new_level
             prompt_map = {"parking_awaiting_route": "parking_route_prompt", "temple_info_menu": "temple_info_menu_prompt", "nearby_search": "freestyle_query_prompt"}
             response_text = self._get_menu_text(new_level, user_id) if new_level == "temple_info_menu" else self.get_text(user_id, prompt_map[new_level])
             return self._get_response_structure(response_text)
@@ -317,40 +633,93 @@ class BotLogic:
             if choice == "10": return action()
             result = action()
             return self._get_response_structure(f"{result}\n\n{self._get_menu_text('main_menu', user_id)}")
+        if not choice.isdigit():
+            free_text_reply = self._handle_free_text(user_id, choice)
+            if free_text_reply: return free_text_reply
         return self._handle_invalid_state(user_id, choice)
 
+    def _handle_free_text(self, user_id, text_input) -> Optional[Dict]:
+        """Answers a typed question using the intent model; returns None to fall back to the menu."""
+        if self.intents is None: return None
+        prediction = self.intents.predict(text_input)
+        logger.info(f"Free-text query classified as {prediction['intent']} ({prediction['confidence']:.2f}) {prediction['entities']}")
+        if prediction["confidence"] < INTENT_MIN_CONFIDENCE: return None
+        intent, entities = prediction["intent"], prediction["entities"]
+        if intent == "goodbye":
+            self._state(user_id).clear()
+            return self._get_response_structure(self.get_text(user_id, "goodbye_message"))
+        if intent in ("greet", "bot_help", "user_confused"):
+            return self._get_response_structure(self._get_menu_text("main_menu", user_id))
+        if intent == "find_parking": return self._handle_main_menu(user_id, "1")
+        if intent == "get_temple_info":
+            info_key = TEMPLE_INFO_KEYS.get(entities.get("info_type"))
+            if not info_key: return self._handle_main_menu(user_id, "2")
+            return self._get_response_structure(f"{self.get_text(user_id, info_key)}\n\n{self._get_menu_text('main_menu', user_id)}")
+        nearest_kind = {"restroom": "Toilets_Near_Temple", "hospital": "First_Aid_Stations"}.get(entities.get("facility_type")) if intent == "find_facility" else None
+        nearest = self._nearest_places_reply(user_id, [nearest_kind]) if nearest_kind and self._user_location() else None
+        if nearest: return self._get_response_structure(f"{nearest}\n\n{self._get_menu_text('main_menu', user_id)}")
+        if intent == "find_facility" and entities.get("facility_type") == "restroom": return self._handle_main_menu(user_id, "6")
+        search_query = self._free_text_search_query(intent, entities)
+        if not search_query: return None
+        return self._get_response_structure(f"{self.find_nearby_place(search_query, user_id=user_id)}\n\n{self._get_menu_text('main_menu', user_id)}")
+
+    def _free_text_search_query(self, intent: str, entities: Dict[str, str]) -> str:
+        if intent == "find_facility":
+            facility = {"atm": "ATM", "hospital": "hospital"}.get(entities.get("facility_type"), "")
+            if facility == "ATM" and entities.get("bank_name"): facility = f"{entities['bank_name']} ATM"
+        elif intent == "find_hotel":
+            facility = "vegetarian restaurants" if entities.get("food_preference") == "veg" else "restaurants"
+        elif intent == "find_lodge":
+            facility = "lodges"
+        elif intent == "get_directions":
+            return entities.get("landmark", "")
+        else:
+            return ""
+        return f"{facility} near {entities['landmark']}" if facility and entities.get("landmark") else facility
+
     def _handle_temple_info_menu(self, user_id, choice):
         if choice == "0": 
-            self.user_states[user_id]["menu_level"] = "main_menu"
+            self._state(user_id)["menu_level"] = "main_menu"
             return self._get_response_structure(self._get_menu_text("main_menu", user_id))
         text_key = {"1": "temple_timings_details", "2": "temple_dress_code_details", "3": "temple_seva_tickets_menu_item"}.get(choice, "invalid_menu_option")
         text = self.get_text(user_id, text_key)
         return self._get_response_structure(f"{text}\n\n{self._get_menu_text('temple_info_menu', user_id)}")
 
     def _handle_parking_awaiting_route(self, user_id, text_input):
-        self.user_states[user_id]["menu_level"] = "main_menu"
-        route_pref = "any"
-        if "1" in text_input or "tirunelveli" in text_input: route_pref = "tirunelveli"
-        elif "2" in text_input or "thoothukudi" in text_input: route_pref = "thoothukudi"
-        elif "3" in text_input or "nagercoil" in text_input: route_pref = "nagercoil"
+        self._state(user_id)["menu_level"] = "main_menu"
+        route_pref = self._resolve_route(text_input)
         parking_reply = self.find_available_parking(user_id, route_preference=route_pref)
         return self._get_response_structure(f"{parking_reply}\n\n{self._get_menu_text('main_menu', user_id)}")
 
+    def _resolve_route(self, text_input: str) -> str:
+        """
+        Maps a menu number, a route name or the visitor's home town to a parking route ("any" if unknown).
+        Until the gazetteer has loaded, only route names are recognised.
+        """
+        text = text_input.strip().lower()
+        # "1", "1.", "(2)", "option 3": a menu number as the first or second word
+        choice = next((word for word in re.findall(r"\w+", text)[:2] if word.isdigit()), None)
+        if choice in ROUTE_MENU_CHOICES: return ROUTE_MENU_CHOICES[choice]
+        if self.gazetteer is not None:
+            route = self.gazetteer.resolve_route(text_input)
+            if route: return route
+        return next((route for route in OVERALL_ROUTE_MY_MAPS if route in text), "any")
+
     def _handle_nearby_search(self, user_id, text_input):
-        self.user_states[user_id]["menu_level"] = "main_menu"
+        self._state(user_id)["menu_level"] = "main_menu"
         search_reply = self.find_nearby_place(text_input, user_id=user_id)
         return self._get_response_structure(f"{search_reply}\n\n{self._get_menu_text('main_menu', user_id)}")
 
     def _change_language(self, user_id, is_initial=False, user_name="User"):
-        self.user_states[user_id]['menu_level'] = 'language_select'
+        self._state(user_id)['menu_level'] = 'language_select'
         text = (self.get_text(user_id, "welcome_tiruchendur", user_name=user_name) + "\n") if is_initial else ""
         text += self.get_text(user_id, "select_language_prompt")
         buttons = [{"text": d["name"], "payload": c} for c, d in SUPPORTED_LANGUAGES.items()]
         return self._get_response_structure(text=text, buttons=buttons)
 
+    @timed()
     def get_text(self, user_id, key, **kwargs):
-        lang = self.user_states.get(user_id, {}).get("lang", "en")
-        template_string = MENU_TEXTS.get(lang, MENU_TEXTS.get("en", {})).get(key, f"<{key}_MISSING>")
+        template_string = self._lookup_text(self._state(user_id).get("lang", "en"), key)
         if kwargs:
             try: return template_string.format(**kwargs)
             except KeyError as e:
@@ -358,21 +727,70 @@ class BotLogic:
                 return f"Error: Data for '{e}' is missing."
         return template_string
 
+    def _lookup_text(self, lang, key):
+        return MENU_TEXTS.get(lang, MENU_TEXTS.get("en", {})).get(key, f"<{key}_MISSING>")
+
+    def _compile_menus(self):
+        """Menus never change at runtime, so each one is joined once per language at startup."""
+        return {(menu_type, lang): "\n".join(self._lookup_text(lang, k) for k in keys)
+                for menu_type, keys in MENU_KEYS.items() for lang in SUPPORTED_LANGUAGES}
+
     def _get_menu_text(self, menu_type, user_id):
-        keys = {
-            "main_menu": ["main_menu_prompt", "option_parking_availability", "option_temple_info", "option_help_centres", "option_first_aid", "option_temp_bus_stands", "option_toilets_temple", "option_annadhanam", "option_emergency_contacts", "option_nearby_facilities", "option_change_language", "option_feedback", "option_end_conversation_text"], 
-            "temple_info_menu": ["temple_info_menu_prompt", "temple_timings_menu_item", "temple_dress_code_menu_item", "temple_seva_tickets_menu_item", "option_go_back_text"]
-        }.get(menu_type, [])
-        return "\n".join([self.get_text(user_id, k) for k in keys])
+        return self._menu_texts.get((menu_type, self._state(user_id).get("lang", "en")), "")
         
     def haversine(self, lat1, lon1, lat2, lon2):
-        R = 6371; dLat, dLon = radians(lat2 - lat1), radians(lon2 - lon1)
-        a = sin(dLat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dLon / 2)**2
-        return R * 2 * atan2(sqrt(a), sqrt(1 - a))
+        return haversine_km(lat1, lon1, lat2, lon2)
+
+    def _user_location(self) -> Optional[Tuple[float, float]]:
+        """The (lat, lon) the browser sent with the message being processed, if any."""
+        return getattr(self._local, "location", None)
+
+    def places_index(self) -> SpatialIndex:
+        """Spatial index over usable parking lots and local_info items, rebuilt when either changes."""
+        local_info, version = self.data.get_versioned("local_info")
+        parking = self.parking_index()
+        key = (version, parking.state)
+        with self._places_lock:
+            if self._places is None or self._places[0] != key:
+                places = [Place(PARKING_PLACE_KIND, lot.doc_id, lot.names, lot.latitude, lot.longitude) for lot in parking.top()]
+                for category, items in local_info.items():
+                    for i, item in enumerate(items):
+                        place = Place.from_item(category, f"{category}/{i}", item)
+                        if place is not None: places.append(place)
+                self._places = (key, SpatialIndex(places))
+            return self._places[1]
+
+    def _nearby_kinds(self, search_query: str) -> List[str]:
+        query = search_query.lower()
+        return [kind for kind, words in NEARBY_KEYWORDS.items() if any(word in query for word in words)]
+
+    def _place_kind_name(self, user_id, kind: str) -> str:
+        if kind == PARKING_PLACE_KIND: return self.get_text(user_id, "parking_place_kind")
+        return self.get_text(user_id, INFO_CATEGORIES[kind][0]).split('. ', 1)[-1]
+
+    def _nearest_places_reply(self, user_id, kinds: List[str]) -> Optional[str]:
+        """The places of `kinds` nearest to the user; None if none of them has coordinates, so the caller falls back."""
+        latitude, longitude = self._user_location()
+        index = self.places_index()
+        located = [kind for kind in kinds if kind in index.kinds()]
+        hits = index.nearest(latitude, longitude, k=NEARBY_MAX_RESULTS, kinds=located)
+        if not hits: return None
+        display_name = ", ".join(self._place_kind_name(user_id, kind) for kind in located)
+        lang = self._state(user_id).get("lang", "en")
+        reply_parts = [self.get_text(user_id, "nearest_results_title", place_type_display_name=display_name)]
+        for distance, place in hits:
+            embed_url = self._generate_embed_link(query=f"{place.latitude},{place.longitude}")
+            view_map_link = f'<a href="{embed_url}" data-embed="true">View Map & Get Directions</a>' if embed_url else "Map not available"
+            reply_parts.append(self.get_text(user_id, "nearest_place_format", name=place.name(lang),
+                kind=self._place_kind_name(user_id, place.kind), distance=distance, ViewMapLink=view_map_link))
+        return "".join(reply_parts)
 
     def find_nearby_place(self, search_query: str, user_id=None) -> str:
+        kinds = self._nearby_kinds(search_query)
+        nearest = self._nearest_places_reply(user_id, kinds) if kinds and self._user_location() else None
+        if nearest: return nearest
         place_type_display_name = search_query.replace('_', ' ').title()
-        embed_url = self._generate_embed_link(f"{search_query} in Tiruchendur", mode="search")
+        embed_url = self._generate_embed_link(f"{search_query} in Tiruchendur")
         maps_url_html = f'<a href="{embed_url}" data-embed="true">View on Map</a>' if embed_url else "Map not available"
         return (f'{self.get_text(user_id, "nearest_place_intro", place_type_display_name=place_type_display_name)}'
                 f'{self.get_text(user_id, "place_details_maps", name=f"Results for {place_type_display_name}", address="Click the link below to see locations on the map.", maps_url=maps_url_html)}')
\ No newline at end of file
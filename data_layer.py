@@ -0,0 +1,238 @@
+# data_layer.py
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from snapshot_store import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+class CachedSource:
+    """One named dataset (a Firestore document or collection) and its cache bookkeeping."""
+
+    def __init__(self, name: str, loader: Callable[[], Any], ttl: float, default: Any = None,
+                 dump: Optional[Callable[[Any], Any]] = None, restore: Optional[Callable[[Any], Any]] = None):
+        self.name, self.loader, self.ttl, self.default = name, loader, ttl, default
+        self.dump, self.restore = dump, restore
+        self.lock = threading.Lock()
+        self.snapshot_lock = threading.Lock()
+        self.value, self.has_value, self.loaded_at = default, False, 0.0
+        self.version = 0
+        self.from_snapshot = False  # restored from disk and not yet confirmed by a refresh
+        self.inflight: Optional[threading.Event] = None
+        self.retry_after = 0.0
+        self.hits = self.stale_hits = self.misses = self.refreshes = self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_refresh_seconds: Optional[float] = None
+
+    def age(self) -> Optional[float]:
+        return (time.time() - self.loaded_at) if self.has_value else None
+
+
+class DataLayer:
+    """
+    Stale-while-revalidate cache in front of Firestore.
+
+    Fresh values are returned straight from memory. Once a value is older than its TTL
+    it is still returned, and a single background refresh is started; concurrent callers
+    never trigger a second fetch. A failed refresh keeps the last-known-good value.
+    Only the very first read of a source (nothing cached yet) blocks on the loader, and
+    after a failure no new refresh is attempted for `retry_backoff` seconds.
+
+    Each source has a version number that is bumped whenever a refresh returns different
+    data, so anything derived from the data (e.g. rendered replies) can be keyed on it.
+
+    With a SnapshotStore, sources registered with `restore` are written to disk after each
+    successful refresh and can be loaded back with restore_snapshots() before the first one.
+    """
+
+    def __init__(self, retry_backoff: float = 10.0, snapshots: Optional[SnapshotStore] = None):
+        self.retry_backoff = retry_backoff
+        self.snapshots = snapshots
+        self._sources: Dict[str, CachedSource] = {}
+        self._timings_lock = threading.Lock()
+        self._fetch_timings: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], ttl: float, default: Any = None,
+                 dump: Optional[Callable[[Any], Any]] = None, restore: Optional[Callable[[Any], Any]] = None):
+        """
+        `restore` turns snapshot data back into a value and makes the source persistent;
+        `dump` turns a value into JSON-serializable snapshot data (default: the value itself).
+        """
+        self._sources[name] = CachedSource(name, loader, ttl, default, dump, restore)
+
+    def names(self):
+        return list(self._sources.keys())
+
+    def get(self, name: str) -> Any:
+        return self.get_versioned(name)[0]
+
+    def get_versioned(self, name: str) -> Tuple[Any, int]:
+        """Like get(), but also returns the version the value belongs to."""
+        src = self._sources[name]
+        with src.lock:
+            if src.has_value:
+                if time.time() - src.loaded_at < src.ttl:
+                    src.hits += 1
+                    return src.value, src.version
+                src.stale_hits += 1
+                stale, is_stale = (src.value, src.version), True
+                should_refresh = time.time() >= src.retry_after
+            else:
+                src.misses += 1
+                # Don't make every request wait on a backend that just failed
+                if time.time() < src.retry_after: return src.value, src.version
+                stale, is_stale, should_refresh = None, False, True
+        if is_stale:
+            if should_refresh: self.refresh(name, wait=False)
+            return stale
+        self.refresh(name, wait=True)
+        with src.lock:
+            return src.value, src.version
+
+    async def get_async(self, name: str) -> Any:
+        """
+        get() for the event loop: a cached value (fresh or stale) is returned immediately,
+        and only a first load, which would block on Firestore, runs on a worker thread.
+        """
+        if self.is_loaded(name): return self.get(name)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, name)
+
+    def is_loaded(self, name: str) -> bool:
+        return self._sources[name].has_value
+
+    def version(self, name: str) -> int:
+        return self._sources[name].version
+
+    def refresh(self, name: str, wait: bool = True) -> bool:
+        """Reloads a source. Joins an already running refresh instead of starting another one."""
+        src = self._sources[name]
+        with src.lock:
+            event, leader = src.inflight, False
+            if event is None:
+                event, leader = threading.Event(), True
+                src.inflight = event
+        if leader:
+            if wait: self._run_refresh(src, event)
+            else: threading.Thread(target=self._run_refresh, args=(src, event), name=f"refresh-{name}", daemon=True).start()
+        elif wait:
+            event.wait()
+        return src.has_value
+
+    def refresh_all(self, max_workers: int = 1):
+        """Refreshes every source, `max_workers` at a time, and waits for all of them."""
+        if max_workers <= 1:
+            for name in self._sources: self.refresh(name, wait=True)
+            return
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preload") as pool:
+            list(pool.map(lambda name: self.refresh(name, wait=True), self._sources))
+
+    def peek(self, name: str) -> Any:
+        """The cached value (or the default) without counting a hit or triggering a refresh."""
+        return self._sources[name].value
+
+    def record_fetch(self, key: str, seconds: float, ok: bool = True):
+        """Records the latency of one Firestore read inside a loader (e.g. one document of a batch)."""
+        with self._timings_lock:
+            t = self._fetch_timings.setdefault(key, {"count": 0, "errors": 0, "last_seconds": None, "max_seconds": 0.0, "total_seconds": 0.0})
+            t["count"] += 1
+            if not ok: t["errors"] += 1
+            t["last_seconds"], t["max_seconds"] = seconds, max(t["max_seconds"], seconds)
+            t["total_seconds"] += seconds
+
+    def fetch_timings(self) -> Dict[str, Dict[str, Any]]:
+        with self._timings_lock:
+            return {key: {**t, "avg_seconds": t["total_seconds"] / t["count"]} for key, t in self._fetch_timings.items()}
+
+    def staleness(self, name: str) -> Optional[float]:
+        """
+        Age in seconds of a value that is past its TTL and could not be confirmed: restored
+        from a snapshot and not refreshed since, or kept after a failed refresh. None otherwise.
+        """
+        src = self._sources[name]
+        with src.lock:
+            if not src.has_value or not (src.from_snapshot or src.last_error): return None
+            age = src.age()
+            return age if age > src.ttl else None
+
+    def restore_snapshots(self) -> List[str]:
+        """Loads the snapshot of every persistent source that has no value yet; returns the names restored."""
+        if self.snapshots is None: return []
+        restored = []
+        for name, src in self._sources.items():
+            if src.restore is None or src.has_value: continue
+            started = time.perf_counter()
+            snapshot = self.snapshots.load(name)
+            if snapshot is None: continue
+            try:
+                value = src.restore(snapshot[0])
+            except Exception as e:
+                logger.warning(f"Ignoring snapshot of '{name}' that could not be restored: {e}")
+                continue
+            with src.lock:
+                if src.has_value: continue  # a refresh got there first
+                src.value, src.has_value, src.loaded_at = value, True, snapshot[1]
+                src.version += 1
+                src.from_snapshot = True
+            restored.append(name)
+            logger.info(f"Restored '{name}' from a snapshot {time.time() - snapshot[1]:.0f}s old in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return restored
+
+    def invalidate(self, name: str):
+        src = self._sources[name]
+        with src.lock: src.loaded_at = 0.0
+
+    def _run_refresh(self, src: CachedSource, event: threading.Event):
+        started, persist = time.perf_counter(), False
+        try:
+            value = src.loader()
+        except Exception as e:
+            with src.lock:
+                src.failures += 1
+                src.last_error = str(e)
+                src.retry_after = time.time() + self.retry_backoff
+            # An unreachable backend is expected now and then; anything else gets a traceback
+            logger.error(f"Refresh of '{src.name}' failed, serving last-known-good data: {e}", exc_info=not isinstance(e, ConnectionError))
+        else:
+            with src.lock:
+                if not src.has_value or value != src.value: src.version += 1
+                src.value, src.has_value, src.loaded_at = value, True, time.time()
+                src.refreshes += 1
+                src.last_error, src.retry_after = None, 0.0
+                src.last_refresh_seconds = time.perf_counter() - started
+                src.from_snapshot = False
+                version = src.version
+            # Written after waiters are released, so no caller waits on the disk
+            persist = self.snapshots is not None and src.restore is not None
+        finally:
+            with src.lock: src.inflight = None
+            event.set()
+        if persist: self._save_snapshot(src, value, version)
+
+    def _save_snapshot(self, src: CachedSource, value: Any, version: int):
+        with src.snapshot_lock:
+            # A later refresh may already have replaced the value (and written its own snapshot)
+            if src.version != version: return
+            try:
+                self.snapshots.save(src.name, src.dump(value) if src.dump is not None else value)
+            except Exception as e:
+                logger.error(f"Snapshot of '{src.name}' failed: {e}", exc_info=True)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, src in self._sources.items():
+            with src.lock:
+                result[name] = {
+                    "hits": src.hits, "stale_hits": src.stale_hits, "misses": src.misses, "version": src.version,
+                    "refreshes": src.refreshes, "failures": src.failures,
+                    "age_seconds": src.age(), "ttl_seconds": src.ttl,
+                    "refreshing": src.inflight is not None, "last_error": src.last_error,
+                    "last_refresh_seconds": src.last_refresh_seconds, "from_snapshot": src.from_snapshot,
+                }
+        return result
@@ -0,0 +1,265 @@
+# fake_firestore.py
+# -*- coding: utf-8 -*-
+"""
+In-memory stand-in for the subset of the Firestore client API that BotLogic uses.
+
+Pass an instance as `BotLogic(db=FakeFirestore(...))` to run the bot, the data layer
+and the benchmarks without credentials or network access. `latency` (seconds) is
+slept on every round trip, `path_latency` adds per-document delays ({"coll/doc": seconds}),
+and `fail_reads` / `fail_paths` make every read or reads of single documents raise, to
+simulate a slow, flaky or unreachable backend. `read_count` counts document reads the way Firestore bills them.
+
+Writes support `set(..., merge=True)`, `create`, the `Increment` transform and atomic `batch()`
+commits. `fail_writes` makes every commit raise without applying anything, and `lose_write_acks`
+applies a commit and then raises, like a timeout after the server has committed.
+
+`on_snapshot` listeners form a fake change feed: they get every existing document as
+ADDED on subscription and one change per later write, synchronously on the writer's thread.
+`break_watches()` ends every listener's stream without telling it, like a dropped connection.
+"""
+
+import copy
+import datetime
+import enum
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class AlreadyExists(Exception):
+    """Raised like google.api_core.exceptions.AlreadyExists when `create` targets an existing document."""
+
+
+class Increment:
+    """Field transform adding `value` to the stored number (or setting it if the field is missing or not a number)."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _is_increment(value) -> bool:
+    # Also accepts google.cloud.firestore.Increment, so code written for the real client runs unchanged
+    return type(value).__name__ == "Increment" and hasattr(value, "value")
+
+
+def _apply_fields(current: Dict[str, Any], fields: Dict[str, Any], merge: bool) -> Dict[str, Any]:
+    result = dict(current) if merge else {}
+    for key, value in fields.items():
+        if _is_increment(value):
+            previous = current.get(key)
+            result[key] = (previous if isinstance(previous, (int, float)) and not isinstance(previous, bool) else 0) + value.value
+        elif merge and isinstance(value, dict) and isinstance(current.get(key), dict):
+            result[key] = _apply_fields(current[key], value, merge=True)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+class ChangeType(enum.Enum):
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class FakeDocumentChange:
+    def __init__(self, type: ChangeType, document: "FakeDocumentSnapshot"):
+        self.type, self.document = type, document
+
+
+class FakeWatch:
+    def __init__(self, collection: "FakeCollectionReference", callback: Callable):
+        self.collection, self.callback = collection, callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+        self.collection.client._unwatch(self)
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference, self.id = reference, reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+
+class FakeDocumentReference:
+    def __init__(self, collection: "FakeCollectionReference", doc_id: str):
+        self.collection, self.id = collection, doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection.id}/{self.id}"
+
+    def get(self, timeout: Optional[float] = None) -> FakeDocumentSnapshot:
+        client = self.collection.client
+        client._read(1)
+        return client._snapshot(self)
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        batch = self.collection.client.batch()
+        batch.set(self, data, merge=merge)
+        batch.commit()
+
+    def create(self, data: Dict[str, Any]):
+        batch = self.collection.client.batch()
+        batch.create(self, data)
+        batch.commit()
+
+    def update(self, fields: Dict[str, Any]):
+        batch = self.collection.client.batch()
+        batch.update(self, fields)
+        batch.commit()
+
+    def delete(self):
+        self.collection.client._write(self.collection.id, self.id, None)
+
+
+class FakeWriteBatch:
+    """Writes applied together by commit(): all of them, or none if a create or update precondition fails."""
+
+    def __init__(self, client: "FakeFirestore"):
+        self.client = client
+        self._writes = []  # (op, reference, fields, merge)
+
+    def set(self, reference: FakeDocumentReference, data: Dict[str, Any], merge: bool = False):
+        self._writes.append(("set", reference, data, merge))
+
+    def create(self, reference: FakeDocumentReference, data: Dict[str, Any]):
+        self._writes.append(("create", reference, data, False))
+
+    def update(self, reference: FakeDocumentReference, fields: Dict[str, Any]):
+        self._writes.append(("update", reference, fields, True))
+
+    def delete(self, reference: FakeDocumentReference):
+        self._writes.append(("delete", reference, None, False))
+
+    def commit(self):
+        self.client._commit(self._writes)
+        self._writes = []
+
+
+class FakeCollectionReference:
+    def __init__(self, client: "FakeFirestore", collection_id: str):
+        self.client, self.id = client, collection_id
+
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self, doc_id)
+
+    def stream(self, timeout: Optional[float] = None):
+        docs = list(self.client._docs(self.id).items())
+        self.client._read(max(len(docs), 1))
+        for doc_id, data in docs:
+            yield FakeDocumentSnapshot(self.document(doc_id), data)
+
+    def on_snapshot(self, callback: Callable) -> FakeWatch:
+        watch = FakeWatch(self, callback)
+        docs = [FakeDocumentSnapshot(self.document(doc_id), data) for doc_id, data in self.client._docs(self.id).items()]
+        self.client._watch(watch)
+        callback(docs, [FakeDocumentChange(ChangeType.ADDED, d) for d in docs], datetime.datetime.now(datetime.timezone.utc))
+        return watch
+
+
+class FakeFirestore:
+    def __init__(self, data: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None, latency: float = 0.0):
+        """`data` maps collection name -> document id -> document fields."""
+        self.latency, self.fail_reads = latency, False
+        self.path_latency: Dict[str, float] = {}
+        self.fail_paths = set()
+        self.fail_writes = self.lose_write_acks = False
+        self.read_count = self.write_count = 0
+        self._lock = threading.Lock()
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = copy.deepcopy(data or {})
+        self._watches: List[FakeWatch] = []
+
+    def collection(self, collection_id: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, collection_id)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def get_all(self, references, timeout: Optional[float] = None):
+        """
+        Batched read: one round trip, with documents looked up in parallel server-side and
+        streamed back in the order they become ready (per `path_latency`).
+        """
+        references = sorted(references, key=lambda ref: self.path_latency.get(ref.path, 0.0))
+        self._read(len(references))
+        waited = 0.0
+        for ref in references:
+            delay = self.path_latency.get(ref.path, 0.0)
+            if delay > waited: time.sleep(delay - waited)
+            waited = max(waited, delay)
+            yield self._snapshot(ref, delayed=False)
+
+    def _snapshot(self, ref: FakeDocumentReference, delayed: bool = True) -> FakeDocumentSnapshot:
+        if delayed and ref.path in self.path_latency: time.sleep(self.path_latency[ref.path])
+        if ref.path in self.fail_paths: raise ConnectionError(f"FakeFirestore: reading {ref.path} failed")
+        return FakeDocumentSnapshot(ref, self._docs(ref.collection.id).get(ref.id))
+
+    def _docs(self, collection_id: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._collections.get(collection_id, {}))
+
+    def _read(self, count: int):
+        if self.latency: time.sleep(self.latency)
+        if self.fail_reads: raise ConnectionError("FakeFirestore: reads are failing")
+        with self._lock: self.read_count += count
+
+    def _watch(self, watch: FakeWatch):
+        with self._lock: self._watches.append(watch)
+
+    def break_watches(self):
+        with self._lock: watches, self._watches = self._watches, []
+        for watch in watches: watch.is_active = False
+
+    def _unwatch(self, watch: FakeWatch):
+        with self._lock:
+            if watch in self._watches: self._watches.remove(watch)
+
+    def _write(self, collection_id: str, doc_id: str, data: Optional[Dict[str, Any]]):
+        with self._lock:
+            existed = self._store(collection_id, doc_id, data)
+        self._notify(collection_id, doc_id, data, existed)
+
+    def _store(self, collection_id: str, doc_id: str, data: Optional[Dict[str, Any]]) -> bool:
+        """Stores one document (None deletes it) with the lock held; returns whether it existed before."""
+        docs = self._collections.setdefault(collection_id, {})
+        existed = doc_id in docs
+        if data is None: docs.pop(doc_id, None)
+        else: docs[doc_id] = data
+        self.write_count += 1
+        return existed
+
+    def _commit(self, writes):
+        if self.latency: time.sleep(self.latency)
+        if self.fail_writes: raise ConnectionError("FakeFirestore: writes are failing")
+        applied = []
+        with self._lock:
+            staged = {}
+            for op, ref, fields, merge in writes:
+                key = (ref.collection.id, ref.id)
+                current = staged[key] if key in staged else self._collections.get(key[0], {}).get(key[1])
+                if op == "create" and current is not None: raise AlreadyExists(f"Document already exists: {ref.path}")
+                if op == "update" and current is None: raise KeyError(f"No document to update: {ref.path}")
+                staged[key] = None if op == "delete" else _apply_fields(current or {}, fields, merge)
+            for (collection_id, doc_id), data in staged.items():
+                applied.append((collection_id, doc_id, data, self._store(collection_id, doc_id, data)))
+        for write in applied: self._notify(*write)
+        if self.lose_write_acks: raise TimeoutError("FakeFirestore: commit applied but the acknowledgement was lost")
+
+    def _notify(self, collection_id: str, doc_id: str, data: Optional[Dict[str, Any]], existed: bool):
+        with self._lock:
+            watches = [w for w in self._watches if w.collection.id == collection_id]
+        if data is None and not existed: return
+        change_type = ChangeType.REMOVED if data is None else (ChangeType.MODIFIED if existed else ChangeType.ADDED)
+        for watch in watches:
+            snapshot = FakeDocumentSnapshot(watch.collection.document(doc_id), data)
+            docs_now = [FakeDocumentSnapshot(watch.collection.document(i), d) for i, d in self._docs(collection_id).items()]
+            watch.callback(docs_now, [FakeDocumentChange(change_type, snapshot)], datetime.datetime.now(datetime.timezone.utc))
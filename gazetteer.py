@@ -0,0 +1,225 @@
+# gazetteer.py
+# -*- coding: utf-8 -*-
+"""
+Resolves a visitor's free-text origin ("Kovilpatti", "coming from Nagercoil", "தூத்துக்குடி")
+to one of the parking routes in bot_logic.OVERALL_ROUTE_MY_MAPS.
+
+Town names come from dataset/Cities and Towns in Tamil Nadu - Population statistics.csv.
+Every name (and the alternative spelling in brackets) is reduced to a phonetic key that
+ignores the spelling differences common in Tamil transliteration (th/t, zh/l, k/g, doubled
+letters, ...); Tamil script is transliterated first, so both scripts land on the same keys.
+Exact lookups are a dict hit; misspellings are found through a precomputed
+symmetric-delete index (see Gazetteer). A town's route comes from TOWN_ROUTES, else from
+its district via DISTRICT_ROUTES, else DEFAULT_ROUTE.
+"""
+
+import csv
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GAZETTEER_FILE = os.path.join(BASE_DIR, "dataset", "Cities and Towns in Tamil Nadu - Population statistics.csv")
+
+ANY_ROUTE = "any"
+DEFAULT_ROUTE = "thoothukudi"  # Most of Tamil Nadu reaches Tiruchendur from the north, through Thoothukudi
+DISTRICT_ROUTES = {
+    "Kanniyakumari": "nagercoil",
+    "Tirunelveli": "tirunelveli",  # still includes Tenkasi in this dataset
+    "Theni": "tirunelveli", "Coimbatore": "tirunelveli", "Tiruppur": "tirunelveli",
+    "Erode": "tirunelveli", "The Nilgiris": "tirunelveli",
+    "Thoothukkudi": "thoothukudi",
+}
+# Towns whose nearest approach differs from the rest of their district
+TOWN_ROUTES = {
+    "Tiruchendur": ANY_ROUTE, "Veerapandianpattinam": ANY_ROUTE,
+    "Srivaikuntam": "tirunelveli", "Alwarthirunagiri": "tirunelveli", "Thenthiruperai": "tirunelveli",
+    "Eral": "tirunelveli", "Nazerath": "tirunelveli", "Kayatharu": "tirunelveli", "Kadambur": "tirunelveli",
+    "Rajapalayam": "tirunelveli", "Srivilliputhur": "tirunelveli",
+    "Udangudi": "nagercoil", "Sathankulam": "nagercoil", "Thisayanvilai": "nagercoil",
+    "Vadakkuvalliyur": "nagercoil", "Panagudi": "nagercoil", "Vaddakkankulam": "nagercoil",
+    "Kuthankuzhi": "nagercoil", "Terkukallikulam": "nagercoil",
+}
+# Common origins missing from the towns dataset, and everyday short names
+EXTRA_PLACES = {
+    "Tuticorin": "thoothukudi", "Nellai": "tirunelveli", "Palayamkottai": "tirunelveli",
+    "Kumari": "nagercoil", "Valliyur": "nagercoil", "Radhapuram": "nagercoil", "Uvari": "nagercoil",
+    "Kulasekarapattinam": "nagercoil", "Thiruvananthapuram": "nagercoil", "Trivandrum": "nagercoil", "Kerala": "nagercoil",
+    "Trichy": "thoothukudi", "Bangalore": "thoothukudi", "Bengaluru": "thoothukudi",
+}
+_STATUS_RANK = {"Municipal Corporation": 0, "Municipality": 1, "Municipality with Outgrowth": 1, "Township": 2,
+                "Town Panchayat": 3, "Town Panchayat with Outgrowth": 3, "Cantonment (Board)": 3, "Census Town": 4}
+STOPWORDS = {"from", "coming", "come", "came", "side", "road", "route", "via", "near", "the", "and", "town", "city",
+             "district", "area", "travel", "travelling", "traveling", "going", "driving", "bus", "car", "by", "am", "are", "we", "our",
+             "know", "dont", "please", "parking", "want", "need", "where", "what", "there", "here", "other", "already"}
+
+# --- Tamil transliteration and phonetic keys ---
+
+_TA_VOWELS = {"அ": "a", "ஆ": "aa", "இ": "i", "ஈ": "ii", "உ": "u", "ஊ": "uu", "எ": "e", "ஏ": "ee", "ஐ": "ai", "ஒ": "o", "ஓ": "oo", "ஔ": "au"}
+_TA_CONSONANTS = {"க": "k", "ங": "ng", "ச": "ch", "ஞ": "nj", "ட": "t", "ண": "n", "த": "th", "ந": "n", "ப": "p", "ம": "m",
+                  "ய": "y", "ர": "r", "ல": "l", "வ": "v", "ழ": "zh", "ள": "l", "ற": "r", "ன": "n", "ஜ": "j", "ஷ": "sh", "ஸ": "s", "ஹ": "h"}
+_TA_SIGNS = {"ா": "aa", "ி": "i", "ீ": "ii", "ு": "u", "ூ": "uu", "ெ": "e", "ே": "ee", "ை": "ai", "ொ": "o", "ோ": "oo", "ௌ": "au", "்": ""}
+_DIGRAPHS = [("zh", "l"), ("sh", "s"), ("ch", "s"), ("th", "t"), ("dh", "t"), ("kh", "k"), ("gh", "k"), ("ph", "p"), ("bh", "p"), ("ng", "n"), ("nj", "n")]
+_LETTERS = str.maketrans({"c": "k", "g": "k", "q": "k", "b": "p", "d": "t", "f": "p", "w": "v", "z": "s", "j": "s", "x": "ks"})
+_REPEATS = re.compile(r"(.)\1+")
+# Case endings glued to Tamil place names ("கோவில்பட்டியிலிருந்து" = "from Kovilpatti"), as phonetic keys
+_TA_SUFFIXES = ("iliruntu", "liruntu", "iruntu", "ukku", "ku", "il", "ai")
+
+
+def transliterate_tamil(text: str) -> str:
+    out, i = [], 0
+    while i < len(text):
+        ch = text[i]
+        if ch in _TA_CONSONANTS:
+            sign = text[i + 1] if i + 1 < len(text) else ""
+            out.append(_TA_CONSONANTS[ch] + _TA_SIGNS.get(sign, "a"))
+            i += 2 if sign in _TA_SIGNS else 1
+            continue
+        out.append(_TA_VOWELS.get(ch, ch))
+        i += 1
+    return "".join(out)
+
+
+def phonetic_key(text: str) -> str:
+    """Spelling-insensitive key for one word or name: 'Thoothukkudi', 'Tuthukudi' and 'தூத்துக்குடி' agree or differ by a letter."""
+    text = transliterate_tamil(unicodedata.normalize("NFC", text.lower()))
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if "a" <= ch <= "z")
+    for digraph, letter in _DIGRAPHS: text = text.replace(digraph, letter)
+    return _REPEATS.sub(r"\1", text.translate(_LETTERS))
+
+
+def _name_variants(name: str) -> List[str]:
+    """'Colachel (Kolachal)' -> ['Colachel', 'Kolachal'] (also [..] brackets); one-letter qualifiers such as '(G)' are dropped."""
+    main, *alternates = re.split(r"[()\[\]]", name)
+    variants = [main] + [alt for alt in alternates if len(alt.strip(" .")) > 2]
+    return [re.sub(r"\s+Town$", "", v.replace("-", " ").strip()) for v in variants if v.strip()]
+
+
+class Town:
+    __slots__ = ("name", "district", "status", "route")
+
+    def __init__(self, name: str, district: str, status: str, route: str):
+        self.name, self.district, self.status, self.route = name, district, status, route
+
+    @property
+    def rank(self) -> int:
+        return _STATUS_RANK.get(self.status, 5)
+
+
+def _max_distance(key: str) -> int:
+    """Edits tolerated for a key: none for short keys, where a single edit already means a different place."""
+    return 0 if len(key) < 5 else 1 if len(key) < 8 else 2
+
+
+def _deletes(key: str, distance: int) -> Set[str]:
+    """The key and every string obtained by deleting up to `distance` of its letters."""
+    variants, frontier = {key}, {key}
+    for _ in range(distance):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        row = [i]
+        for j, cb in enumerate(b, 1):
+            row.append(min(row[j - 1] + 1, previous[j] + 1, previous[j - 1] + (ca != cb)))
+        previous = row
+    return previous[-1]
+
+
+class Gazetteer:
+    """
+    Phonetic-key index over town names, answering "which town (and route) does this text mention?".
+
+    Exact keys are a dict lookup. For misspellings every key is also stored under all of its
+    1- or 2-letter deletions (symmetric-delete indexing), so a fuzzy lookup is a few dozen dict
+    probes plus an edit-distance check of the handful of keys they return, instead of a walk
+    over every stored name.
+    """
+
+    def __init__(self, towns: Iterable[Tuple[str, Town]]):
+        self._exact: Dict[str, List[Town]] = {}
+        self._neighbours: Dict[str, Set[str]] = defaultdict(set)
+        for name, town in towns:
+            key = phonetic_key(name)
+            if len(key) < 3: continue
+            matches = self._exact.setdefault(key, [])
+            if town not in matches: matches.append(town)
+        for key in self._exact:
+            for variant in _deletes(key, _max_distance(key)): self._neighbours[variant].add(key)
+        self.size = len(self._exact)
+
+    @classmethod
+    def from_csv(cls, path: str = GAZETTEER_FILE) -> "Gazetteer":
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                variants = _name_variants(row["Name"])
+                route = next((TOWN_ROUTES[v] for v in variants if v in TOWN_ROUTES), None)
+                town = Town(variants[0], row["District"], row["Status"], route or DISTRICT_ROUTES.get(row["District"], DEFAULT_ROUTE))
+                entries.extend((variant, town) for variant in variants)
+        entries.extend((name, Town(name, "", "", route)) for name, route in EXTRA_PLACES.items())
+        return cls(entries)
+
+    def lookup(self, text: str) -> Optional[Tuple[Town, int]]:
+        """The best-matching town mentioned in `text` and its edit distance, or None."""
+        words = [w for w in re.split(r"[\s,.;:!?/()'\-]+", text) if w]
+        candidates = []
+        for n in (3, 2, 1):
+            for i in range(len(words) - n + 1):
+                if n == 1 and words[i].lower() in STOPWORDS: continue
+                key = phonetic_key("".join(words[i:i + n]))
+                if len(key) < 3: continue
+                candidates.append(key)
+                if n == 1 and not words[i].isascii():
+                    candidates.extend(key[:-len(s)] for s in _TA_SUFFIXES if key.endswith(s) and len(key) - len(s) >= 4)
+        # Exact matches first, longest (most specific) key winning
+        for key in sorted(candidates, key=len, reverse=True):
+            towns = self._exact.get(key)
+            if towns: return min(towns, key=lambda t: t.rank), 0
+        best = None
+        for key in candidates:
+            for distance, towns in self._fuzzy(key):
+                score = (distance, -len(key), min(t.rank for t in towns))
+                if best is None or score < best[0]: best = (score, min(towns, key=lambda t: t.rank), distance)
+        return (best[1], best[2]) if best else None
+
+    def resolve_route(self, text: str) -> Optional[str]:
+        match = self.lookup(text)
+        return match[0].route if match else None
+
+    def _fuzzy(self, key: str) -> List[Tuple[int, List[Town]]]:
+        """Stored names within the tolerated edit distance of `key`."""
+        limit = _max_distance(key)
+        if not limit: return []
+        found, seen = [], set()
+        for variant in _deletes(key, limit):
+            for stored in self._neighbours.get(variant, ()):
+                if stored in seen: continue
+                seen.add(stored)
+                distance = _edit_distance(key, stored)
+                if distance <= min(limit, _max_distance(stored)): found.append((distance, self._exact[stored]))
+        return found
+
+
+def load_gazetteer(path: str = GAZETTEER_FILE) -> Optional[Gazetteer]:
+    """Builds the gazetteer from the shipped CSV; returns None (route keywords only) if it can't be read."""
+    try:
+        start = time.perf_counter()
+        gazetteer = Gazetteer.from_csv(path)
+        logger.info(f"Gazetteer of {gazetteer.size} place names loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return gazetteer
+    except FileNotFoundError:
+        logger.warning(f"Towns dataset not found at {path}; origins are matched by route name only.")
+    except Exception as e:
+        logger.error(f"Failed to load the gazetteer: {e}", exc_info=True)
+    return None
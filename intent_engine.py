@@ -0,0 +1,237 @@
+# intent_engine.py
+# -*- coding: utf-8 -*-
+"""
+Offline intent + entity classifier for free-text messages, trained from dataset/intents*.json.
+
+Text is turned into hashed features (words, word bigrams and character 2-4 grams, which
+also works for Tamil script) and scored by small multinomial logistic-regression models:
+one "head" for the intent and one per entity slot (facility_type, landmark, ...), where each
+slot head predicts a value or "none". Everything is pure Python, so it runs on any CPU
+without extra dependencies.
+
+The trained model is a compact binary artifact (dataset/intent_model.bin.gz) holding only
+non-negligible weights, quantized to int8. Rebuild it after editing the datasets with:
+
+    python intent_engine.py
+"""
+
+import gzip
+import json
+import logging
+import math
+import os
+import random
+import struct
+import sys
+import time
+import unicodedata
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILES = [os.path.join(BASE_DIR, "dataset", name) for name in ("intents.json", "intents_groq_en.json", "intents_groq_ta.json")]
+MODEL_FILE = os.path.join(BASE_DIR, "dataset", "intent_model.bin.gz")
+FEATURE_BITS = 18
+ARTIFACT_VERSION = 1
+NO_ENTITY = "none"
+
+
+def normalize(text: str) -> str:
+    """Lower-cases and keeps only letters, combining marks (Tamil vowel signs) and digits."""
+    text = unicodedata.normalize("NFC", text.lower())
+    return " ".join("".join(ch if unicodedata.category(ch)[0] in "LMN" else " " for ch in text).split())
+
+
+def extract_features(text: str, bits: int = FEATURE_BITS) -> List[int]:
+    words = normalize(text).split()
+    grams = [f"w:{w}" for w in words] + [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        for n in (2, 3, 4):
+            grams.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+    mask = (1 << bits) - 1
+    return sorted({zlib.crc32(g.encode("utf-8")) & mask for g in grams})
+
+
+def _softmax(scores: List[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class LinearHead:
+    """
+    Multinomial logistic regression over sparse binary features.
+
+    Weights are one row of len(labels) floats per feature id. A trained head is packed into a
+    sorted feature-id array plus a flat int8 array, so the artifact loads without parsing.
+    """
+
+    def __init__(self, labels: List[str], rows: Optional[Dict[int, Any]] = None, bias: Optional[List[float]] = None):
+        self.labels = labels
+        self.rows = rows if rows is not None else {}
+        self.bias = bias if bias is not None else [0.0] * len(labels)
+
+    def scores(self, features: Iterable[int]) -> List[float]:
+        scores = self.bias
+        rows = self.rows
+        for f in features:
+            w = rows.get(f)
+            if w is not None: scores = [s + x for s, x in zip(scores, w)]
+        return list(scores)
+
+    def predict(self, features: Iterable[int]) -> Tuple[str, float]:
+        probs = _softmax(self.scores(features))
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+    def fit(self, examples: List[Tuple[List[int], str]], epochs: int = 8, lr: float = 0.3, seed: int = 13):
+        index = {label: i for i, label in enumerate(self.labels)}
+        zeros = [0.0] * len(self.labels)
+        order = list(range(len(examples)))
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = lr / (1 + epoch)
+            for i in order:
+                features, label = examples[i]
+                probs = _softmax(self.scores(features))
+                probs[index[label]] -= 1.0
+                if max(abs(p) for p in probs) < 1e-3: continue
+                grad = [rate * p for p in probs]
+                self.bias = [b - g for b, g in zip(self.bias, grad)]
+                for f in features:
+                    self.rows[f] = [x - g for x, g in zip(self.rows.get(f, zeros), grad)]
+        return self
+
+    def pack(self, min_weight: float = 0.01) -> Tuple[Dict[str, Any], array, array]:
+        """
+        Quantizes the head to int8 with one scale per head. Returns (header, feature ids, weights),
+        dropping features whose weights are all below `min_weight`.
+        """
+        kept = [f for f in sorted(self.rows) if max(abs(x) for x in self.rows[f]) >= min_weight]
+        scale = max((abs(x) for f in kept for x in self.rows[f]), default=1.0) / 127
+        ids, flat = array("I", kept), array("b")
+        for f in kept: flat.extend(round(x / scale) for x in self.rows[f])
+        return {"labels": self.labels, "bias": self.bias, "scale": scale, "features": len(ids)}, ids, flat
+
+
+class PackedHead(LinearHead):
+    """A trained, read-only LinearHead scoring straight from the artifact's int8 arrays."""
+
+    def __init__(self, header: Dict[str, Any], ids: array, flat: array):
+        super().__init__(header["labels"], bias=header["bias"])
+        self.scale, self.flat = header["scale"], flat
+        self.offsets = dict(zip(ids, range(0, len(flat), len(self.labels))))
+
+    def scores(self, features: Iterable[int]) -> List[float]:
+        n, flat, offsets = len(self.labels), self.flat, self.offsets
+        totals = [0] * n
+        for f in features:
+            i = offsets.get(f)
+            if i is not None: totals = [t + x for t, x in zip(totals, flat[i:i + n])]
+        return [b + self.scale * t for b, t in zip(self.bias, totals)]
+
+
+class IntentEngine:
+    """An intent head plus one head per entity slot, sharing one feature extraction."""
+
+    def __init__(self, intent_head: LinearHead, entity_heads: Dict[str, LinearHead], bits: int = FEATURE_BITS):
+        self.intent_head, self.entity_heads, self.bits = intent_head, entity_heads, bits
+
+    def predict(self, text: str) -> Dict[str, Any]:
+        """Returns {"intent", "confidence", "entities"}; entity slots predicted as "none" are left out."""
+        features = extract_features(text, self.bits)
+        intent, confidence = self.intent_head.predict(features)
+        entities = {}
+        for slot, head in self.entity_heads.items():
+            value, _ = head.predict(features)
+            if value != NO_ENTITY: entities[slot] = value
+        return {"intent": intent, "confidence": confidence, "entities": entities}
+
+    @classmethod
+    def train(cls, samples: List[Dict[str, Any]], bits: int = FEATURE_BITS, epochs: int = 8) -> "IntentEngine":
+        featurized = [extract_features(s["text"], bits) for s in samples]
+        intents = sorted({s["intent"] for s in samples})
+        intent_head = LinearHead(intents).fit([(f, s["intent"]) for f, s in zip(featurized, samples)], epochs=epochs)
+        slot_values = defaultdict(set)
+        for s in samples:
+            for slot, value in (s.get("entities") or {}).items(): slot_values[slot].add(str(value))
+        entity_heads = {}
+        for slot, values in sorted(slot_values.items()):
+            labelled = [(f, str((s.get("entities") or {}).get(slot, NO_ENTITY))) for f, s in zip(featurized, samples)]
+            entity_heads[slot] = LinearHead([NO_ENTITY] + sorted(values)).fit(labelled, epochs=epochs)
+        return cls(intent_head, entity_heads, bits)
+
+    def save(self, path: str = MODEL_FILE):
+        """Writes a gzip stream: 4-byte header length, JSON header, then each head's id and weight arrays."""
+        heads = [("intent", self.intent_head)] + sorted(self.entity_heads.items())
+        packed = [(name, *head.pack()) for name, head in heads]
+        header = {"version": ARTIFACT_VERSION, "bits": self.bits, "heads": [dict(h, name=name) for name, h, _, _ in packed]}
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with gzip.open(path, "wb", compresslevel=9) as f:
+            f.write(struct.pack("<I", len(header_bytes)) + header_bytes)
+            for _, _, ids, flat in packed:
+                if sys.byteorder != "little": ids.byteswap()
+                f.write(ids.tobytes() + flat.tobytes())
+
+    @classmethod
+    def load(cls, path: str = MODEL_FILE) -> "IntentEngine":
+        with gzip.open(path, "rb") as f:
+            payload = f.read()
+        (header_len,) = struct.unpack_from("<I", payload)
+        header = json.loads(payload[4:4 + header_len].decode("utf-8"))
+        if header.get("version") != ARTIFACT_VERSION: raise ValueError(f"Unsupported intent model version {header.get('version')}")
+        offset, heads = 4 + header_len, {}
+        for h in header["heads"]:
+            ids, flat = array("I"), array("b")
+            ids.frombytes(payload[offset:offset + 4 * h["features"]]); offset += 4 * h["features"]
+            flat.frombytes(payload[offset:offset + h["features"] * len(h["labels"])]); offset += len(flat)
+            if sys.byteorder != "little": ids.byteswap()
+            heads[h["name"]] = PackedHead(h, ids, flat)
+        intent_head = heads.pop("intent")
+        return cls(intent_head, heads, header["bits"])
+
+
+def load_samples(paths: Iterable[str] = DATASET_FILES) -> List[Dict[str, Any]]:
+    samples = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            samples.extend(s for s in json.load(f) if s.get("text") and s.get("intent"))
+    return samples
+
+
+def split_samples(samples: List[Dict[str, Any]], holdout_percent: int = 20):
+    """Deterministic train / held-out split keyed on the utterance text."""
+    train, held_out = [], []
+    for s in samples:
+        (held_out if zlib.crc32(s["text"].encode("utf-8")) % 100 < holdout_percent else train).append(s)
+    return train, held_out
+
+
+def load_engine(path: str = MODEL_FILE) -> Optional[IntentEngine]:
+    """Loads the shipped artifact; returns None (free text disabled) if it is missing or unreadable."""
+    try:
+        start = time.perf_counter()
+        engine = IntentEngine.load(path)
+        logger.info(f"Intent model loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return engine
+    except FileNotFoundError:
+        logger.warning(f"Intent model not found at {path}; run 'python intent_engine.py' to build it.")
+    except Exception as e:
+        logger.error(f"Failed to load intent model: {e}", exc_info=True)
+    return None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    all_samples = load_samples()
+    started = time.perf_counter()
+    IntentEngine.train(all_samples).save()
+    logger.info(f"Trained on {len(all_samples)} utterances in {time.perf_counter() - started:.1f}s; "
+                f"wrote {MODEL_FILE} ({os.path.getsize(MODEL_FILE) / 1024:.0f} KB)")
@@ -0,0 +1,255 @@
+# metrics.py
+# -*- coding: utf-8 -*-
+"""
+In-process metrics with Prometheus text exposition, and a per-request sampling profiler.
+
+Counters and histograms aggregate in memory, in per-thread shards, so recording is a couple
+of dict lookups and additions with no lock; nothing is exported until /metrics is scraped. Values
+that other components already count (cache hits, session totals) are read at scrape time
+through callback metrics instead of being counted twice. Set METRICS_ENABLED=false to
+turn every timer and counter into a no-op.
+"""
+
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from functools import wraps
+from threading import get_ident
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds between stack samples taken by SamplingProfiler
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.0005"))
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _ShardedMetric(_Metric):
+    """
+    Each thread records into its own {labels: values} shard, so recording takes no lock;
+    shards are keyed by thread id (reused by later threads, so they stay bounded) and
+    summed when the metric is read.
+    """
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._shards: Dict[int, Dict[Tuple, list]] = {}
+
+    def _shard(self) -> Dict[Tuple, list]:
+        shard = self._shards.get(get_ident())
+        if shard is None: shard = self._shards.setdefault(get_ident(), {})
+        return shard
+
+    def _merged(self) -> Dict[Tuple, list]:
+        merged = {}
+        for shard in list(self._shards.values()):
+            for labels, values in list(shard.items()):
+                total = merged.get(labels)
+                if total is None: merged[labels] = list(values)
+                else:
+                    for i, v in enumerate(values): total[i] += v
+        return merged
+
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        if not METRICS_ENABLED: return
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None: shard[labels] = [amount]
+        else: values[0] += amount
+
+    def value(self, *labels) -> float:
+        return self._merged().get(labels, [0])[0]
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {_number(v[0])}" for k, v in sorted(self._merged().items())]
+
+
+class Histogram(_ShardedMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        if not METRICS_ENABLED: return
+        shard = self._shard()
+        series = shard.get(labels)  # [per-bucket counts..., +Inf count, sum]
+        if series is None: series = shard[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def count(self, *labels) -> int:
+        series = self._merged().get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, series in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram, self.labels = histogram, labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge whose samples ({label values: value}) are read from `fn` at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], Dict[Tuple, float]], labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.kind, self.fn = kind, fn
+
+    def render(self) -> List[str]:
+        try: samples = self.fn()
+        except Exception as e: return [f"# {self.name} unavailable: {_escape(e)}"]
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in sorted(samples.items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            # Callbacks are replaced (e.g. by a new BotLogic); recorded metrics are shared
+            if existing is not None and not isinstance(metric, CallbackMetric): return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def callback(self, name: str, help: str, kind: str, fn: Callable[[], Dict[Tuple, float]], labels: Iterable[str] = ()):
+        return self._add(CallbackMetric(name, help, kind, fn, labels))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock: metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+FUNCTION_SECONDS = REGISTRY.histogram("tiruchendur_function_seconds", "Time spent in instrumented BotLogic functions.", ("function",))
+
+
+def timed(name: Optional[str] = None, histogram: Histogram = FUNCTION_SECONDS):
+    """Decorator recording each call's duration in `histogram`, labelled with `name` (default: the function name)."""
+    def decorate(fn):
+        label = name or fn.__name__
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS_ENABLED: return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try: return fn(*args, **kwargs)
+            finally: histogram.observe(time.perf_counter() - started, label)
+        return wrapper
+    return decorate
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a helper thread while
+    active. Cheap enough to switch on for a single request; the result is a list of
+    folded stacks ("outer;inner;leaf", samples), the input format of flame-graph tools.
+    """
+
+    _active, _active_lock, _saved_switch_interval = 0, threading.Lock(), None
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, max_depth: int = 40):
+        self.interval, self.max_depth = interval, max_depth
+        self.samples = 0
+        self._stacks: _Tally = _Tally()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        # A busy request thread holds the GIL for up to the switch interval (5 ms by default), which
+        # would starve the sampler; shorten it while any profile is running.
+        with SamplingProfiler._active_lock:
+            if SamplingProfiler._active == 0:
+                SamplingProfiler._saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval, SamplingProfiler._saved_switch_interval))
+            SamplingProfiler._active += 1
+        target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, args=(target,), name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        with SamplingProfiler._active_lock:
+            SamplingProfiler._active -= 1
+            if SamplingProfiler._active == 0: sys.setswitchinterval(SamplingProfiler._saved_switch_interval)
+
+    def _run(self, target: int):
+        while True:
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self._stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+            if self._stop.wait(self.interval): return
+
+    def folded(self, limit: int = 25) -> List[Tuple[str, int]]:
+        return self._stacks.most_common(limit)
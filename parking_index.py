@@ -0,0 +1,178 @@
+# parking_index.py
+# -*- coding: utf-8 -*-
+
+import bisect
+import itertools
+import logging
+import threading
+from math import radians, sin, cos, sqrt, atan2
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ANY_ROUTE = "any"
+# Net exits minus entries reported by gate counters (see parking_ingest.py), added to Total_Space
+GATE_DELTA_FIELD = "Gate_Delta"
+_generations = itertools.count(1)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    R = 6371; dLat, dLon = radians(lat2 - lat1), radians(lon2 - lon1)
+    a = sin(dLat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dLon / 2)**2
+    return R * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+class ParkingLot:
+    """
+    Parsed, read-only view of one `parking_lots` document.
+
+    Records are never mutated once they are in an index; an update replaces the record.
+    """
+    __slots__ = ("doc_id", "names", "routes", "available", "capacity", "percentage_full",
+                 "priority", "latitude", "longitude", "distance")
+
+    def __init__(self, doc_id, names, routes, available, capacity, priority, latitude, longitude, distance):
+        self.doc_id, self.names, self.routes = doc_id, names, routes
+        self.available, self.capacity, self.priority = available, capacity, priority
+        self.percentage_full = (capacity - available) / capacity * 100 if capacity > 0 else 100.0
+        self.latitude, self.longitude, self.distance = latitude, longitude, distance
+
+    @property
+    def sort_key(self) -> Tuple[float, int, str]:
+        return (self.percentage_full, self.priority, self.doc_id)
+
+    def name(self, lang: str = "en") -> str:
+        return self.names.get(lang) or self.names.get("en") or self.doc_id
+
+    def is_usable(self, full_threshold: float) -> bool:
+        return self.capacity > 0 and self.available > 0 and self.percentage_full < full_threshold
+
+    @classmethod
+    def from_document(cls, doc_id: str, data: Dict[str, Any], routes: Iterable[str], origin: Tuple[float, float],
+                      previous: Optional["ParkingLot"] = None, adjustment: int = 0) -> Optional["ParkingLot"]:
+        """
+        Parses a document, or returns None if the lot is closed or its data is unusable.
+        `adjustment` is a change in free spaces not yet written to the document.
+        """
+        try:
+            if str(data.get('IsParkingAvailable', 'FALSE')).upper() not in ['TRUE', '1']: return None
+            latitude, longitude = float(data['Latitude']), float(data['Longitude'])
+            if previous is not None and (previous.latitude, previous.longitude) == (latitude, longitude):
+                distance = previous.distance
+            else:
+                distance = haversine_km(origin[0], origin[1], latitude, longitude)
+            try: priority = int(data.get('Priority', 99))
+            except (ValueError, TypeError): priority = 99
+            route_text = str(data.get("Route_en", ANY_ROUTE)).lower()
+            names = {k[len("Parking_name_"):]: str(v) for k, v in data.items() if k.startswith("Parking_name_") and v}
+            available, capacity = int(data.get('Total_Space', 0)), int(data.get('TotalCapacity', 0))
+            counted = int(data.get(GATE_DELTA_FIELD) or 0) + adjustment
+            # Gate counts drift (missed or doubled events); never report more than 0..capacity
+            if counted: available = max(0, min(available + counted, capacity))
+            return cls(doc_id, names, tuple([ANY_ROUTE] + [r for r in routes if r in route_text]),
+                       available, capacity, priority, latitude, longitude, distance)
+        except (ValueError, TypeError, KeyError):
+            logger.warning(f"Skipping parking lot due to invalid data: {data.get('Parking_name_en', doc_id)}")
+            return None
+
+
+class ParkingIndex:
+    """
+    Usable parking lots bucketed by route, each bucket kept sorted by (PercentageFull, Priority).
+
+    Built once per data refresh (or kept current by ParkingView). Distances from `origin` are
+    computed when a lot is parsed, so a query is a slice of a pre-sorted list, and a single-lot
+    update is a binary search plus a list insert/delete rather than a full re-sort.
+
+    `offsets(doc_id, data)` returns changes in free spaces that are known in memory but not yet
+    written to that document (gate events waiting to be flushed); they are added when a lot is parsed.
+    """
+
+    def __init__(self, routes: Iterable[str], origin: Tuple[float, float], full_threshold: float,
+                 offsets: Optional[Callable[[str, Dict[str, Any]], int]] = None):
+        self.routes, self.origin, self.full_threshold = tuple(routes), origin, full_threshold
+        self.offsets = offsets
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}  # every document seen, usable or not, so a lot can be re-parsed
+        self._lots: Dict[str, ParkingLot] = {}
+        self._ordered: Dict[str, List[Tuple[float, int, str]]] = {r: [] for r in (ANY_ROUTE,) + self.routes}
+        # (generation, version) identifies the index contents: generation is unique per index, version counts updates
+        self.generation, self.version = next(_generations), 0
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[Tuple[str, Dict[str, Any]]], routes: Iterable[str],
+                       origin: Tuple[float, float], full_threshold: float,
+                       offsets: Optional[Callable[[str, Dict[str, Any]], int]] = None) -> "ParkingIndex":
+        index = cls(routes, origin, full_threshold, offsets)
+        for doc_id, data in docs:
+            index._docs[doc_id] = data
+            lot = index._parse(doc_id, data)
+            if lot is not None and lot.is_usable(full_threshold): index._lots[doc_id] = lot
+        for lot in index._lots.values():
+            for route in lot.routes: index._ordered[route].append(lot.sort_key)
+        for ordered in index._ordered.values(): ordered.sort()
+        return index
+
+    @property
+    def state(self) -> Tuple[int, int]:
+        return (self.generation, self.version)
+
+    def __len__(self):
+        return len(self._lots)
+
+    def get(self, doc_id: str) -> Optional[ParkingLot]:
+        return self._lots.get(doc_id)
+
+    def documents(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Every document the index holds, usable or not, as (doc_id, data); enough to rebuild it."""
+        with self._lock:
+            return list(self._docs.items())
+
+    def has_document(self, doc_id: str) -> bool:
+        """True for every known lot, including closed and full ones that are not listed."""
+        return doc_id in self._docs
+
+    def _parse(self, doc_id: str, data: Dict[str, Any], previous: Optional[ParkingLot] = None) -> Optional[ParkingLot]:
+        adjustment = self.offsets(doc_id, data) if self.offsets is not None else 0
+        return ParkingLot.from_document(doc_id, data, self.routes, self.origin, previous, adjustment)
+
+    def upsert(self, doc_id: str, data: Dict[str, Any]):
+        """Applies the latest version of one document; unusable lots are dropped from the index."""
+        with self._lock:
+            self._docs[doc_id] = data
+            self._reparse(doc_id)
+
+    def refresh_lot(self, doc_id: str):
+        """Re-parses a known lot, e.g. after its offset changed."""
+        with self._lock:
+            if doc_id in self._docs: self._reparse(doc_id)
+
+    def _reparse(self, doc_id: str):
+        previous = self._remove(doc_id)
+        lot = self._parse(doc_id, self._docs[doc_id], previous)
+        if lot is not None and lot.is_usable(self.full_threshold):
+            self._lots[doc_id] = lot
+            for route in lot.routes: bisect.insort(self._ordered[route], lot.sort_key)
+        self.version += 1
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._docs.pop(doc_id, None)
+            if self._remove(doc_id) is not None: self.version += 1
+
+    def _remove(self, doc_id: str) -> Optional[ParkingLot]:
+        lot = self._lots.pop(doc_id, None)
+        if lot is None: return None
+        key = lot.sort_key
+        for route in lot.routes:
+            ordered = self._ordered[route]
+            i = bisect.bisect_left(ordered, key)
+            if i < len(ordered) and ordered[i] == key: del ordered[i]
+        return lot
+
+    def top(self, route: Optional[str] = None, limit: Optional[int] = None) -> List[ParkingLot]:
+        """Best lots for a route (or for all routes), emptiest first."""
+        with self._lock:
+            ordered = self._ordered.get(route or ANY_ROUTE, self._ordered[ANY_ROUTE])
+            keys = ordered[:limit] if limit else list(ordered)
+            return [self._lots[doc_id] for _, _, doc_id in keys]
@@ -0,0 +1,239 @@
+# parking_ingest.py
+# -*- coding: utf-8 -*-
+"""
+Gate-counter ingest for parking lots, with write-behind to Firestore.
+
+Gates POST batches of entry/exit events. They are summed per lot in memory and shown
+straight away: the ParkingIndex adds them to each lot as an offset (see ParkingIndex.offsets).
+A background thread flushes the summed deltas every PARKING_FLUSH_INTERVAL seconds, as
+one batched write per up to FLUSH_MAX_LOTS lots:
+
+* each lot gets `Gate_Delta: Increment(delta)` plus `Ingest_Seq.<worker>: seq`, so
+  workers never overwrite each other and a document says which of this worker's
+  flushes it already includes;
+* the batch also creates `parking_ingest_flushes/<worker>-<seq>`. The create fails if
+  that flush was already committed, so a batch retried after a lost acknowledgement
+  is rejected as a whole instead of being counted twice.
+
+A lot's offset is the sum of its unflushed deltas and of the flushes newer than the
+`Ingest_Seq` of the document the index holds. This stays correct however a polled
+refresh or a live snapshot interleaves with a flush. Batches that fail are retried
+in order, with the same sequence numbers.
+
+Flush records accumulate in `parking_ingest_flushes`, one per flush. Give that collection
+a Firestore TTL policy on `created_at`. `Ingest_Seq` gains one key per worker process.
+
+Retried batches are recognised by `batch_id`, but only by the worker process that accepted
+the original: the last `dedupe_window` ids are kept in memory, not in Firestore, so that
+ingest never waits on a round trip. With several workers, a retry that lands on another
+worker is counted again; route each gate to one worker (e.g. sticky by client address) if
+that matters.
+"""
+
+import atexit
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from metrics import REGISTRY
+from parking_index import GATE_DELTA_FIELD, ParkingIndex
+
+logger = logging.getLogger(__name__)
+
+FLUSH_COLLECTION = "parking_ingest_flushes"
+SEQ_FIELD = "Ingest_Seq"
+# Firestore allows 500 writes per batch; one is the flush record
+FLUSH_MAX_LOTS = 499
+# Flushed batches are forgotten once every lot in them has been seen with its new Ingest_Seq, or after this long
+FLUSH_RETENTION_SECONDS = 600.0
+EVENT_DELTAS = {"entry": -1, "exit": 1}
+
+EVENTS_TOTAL = REGISTRY.counter("tiruchendur_parking_events_total", "Gate events received, by outcome.", ("outcome",))
+FLUSHES_TOTAL = REGISTRY.counter("tiruchendur_parking_flushes_total", "Write-behind flush batches, by outcome.", ("outcome",))
+FLUSHED_LOTS = REGISTRY.counter("tiruchendur_parking_flushed_lot_writes_total", "Lot documents written by flushes.")
+
+
+def _increment(value: int):
+    # The real transform is imported lazily, like the rest of the Firebase SDK; the fake client accepts either
+    try:
+        from google.cloud.firestore import Increment
+    except ImportError:
+        from fake_firestore import Increment
+    return Increment(value)
+
+
+def _already_exists(error: Exception) -> bool:
+    # google.api_core.exceptions.AlreadyExists (a Conflict), or fake_firestore.AlreadyExists
+    return type(error).__name__ in ("AlreadyExists", "Conflict")
+
+
+class _Flush:
+    """One batched write: the deltas of up to FLUSH_MAX_LOTS lots under one sequence number."""
+    __slots__ = ("seq", "deltas", "committed", "created_at", "unseen")
+
+    def __init__(self, seq: int, deltas: Dict[str, int]):
+        self.seq, self.deltas = seq, deltas
+        self.committed, self.created_at = False, time.time()
+        self.unseen = set(deltas)  # lots not yet seen in a document that includes this flush
+
+
+class ParkingIngest:
+    """In-memory counter table for gate events, flushed to `parking_lots` as batched increments."""
+
+    def __init__(self, db_getter: Callable[[], Any], index_getter: Callable[[], ParkingIndex],
+                 flush_interval: float = 2.0, worker_id: Optional[str] = None, dedupe_window: int = 10000):
+        self._db, self._index = db_getter, index_getter
+        self.flush_interval = flush_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{int(time.time())}"
+        self.dedupe_window = dedupe_window
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._batch_lock = threading.Lock()  # a retry racing its original waits for it instead of both being applied
+        self._unflushed: Dict[str, int] = {}
+        self._flushes: "OrderedDict[int, _Flush]" = OrderedDict()
+        self._seq = itertools.count(1)
+        self._seen_batches: "OrderedDict[str, None]" = OrderedDict()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.events_applied = self.flushes_committed = self.flush_failures = 0
+
+    # --- Ingest ---
+
+    def record(self, events: Iterable[Dict[str, Any]], batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Applies a batch of {"lot_id", "type": "entry"|"exit", "count"} events. A batch_id this
+        worker already accepted events for is acknowledged again without being applied twice;
+        a batch that was rejected as a whole can be retried under the same id.
+        """
+        if batch_id is None: return self._apply(events)
+        with self._batch_lock:
+            with self._lock:
+                if batch_id in self._seen_batches:
+                    self._seen_batches.move_to_end(batch_id)
+                    return {"accepted": 0, "rejected": [], "duplicate": True}
+            result = self._apply(events)
+            if result["accepted"]:
+                with self._lock:
+                    self._seen_batches[batch_id] = None
+                    if len(self._seen_batches) > self.dedupe_window: self._seen_batches.popitem(last=False)
+        return result
+
+    def _apply(self, events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        index = self._index()
+        accepted, deltas, rejected = 0, {}, []
+        for position, event in enumerate(events):
+            problem, lot_id, delta = self._parse_event(event, index)
+            if problem:
+                rejected.append({"index": position, "error": problem})
+                continue
+            deltas[lot_id] = deltas.get(lot_id, 0) + delta
+            accepted += 1
+        with self._lock:
+            for lot_id, delta in deltas.items():
+                self._unflushed[lot_id] = self._unflushed.get(lot_id, 0) + delta
+            self.events_applied += accepted
+        for lot_id in deltas: index.refresh_lot(lot_id)
+        if accepted: EVENTS_TOTAL.inc("accepted", amount=accepted)
+        if rejected: EVENTS_TOTAL.inc("rejected", amount=len(rejected))
+        if deltas: self.start()
+        return {"accepted": accepted, "rejected": rejected, "duplicate": False}
+
+    @staticmethod
+    def _parse_event(event: Any, index: ParkingIndex) -> Tuple[Optional[str], Optional[str], int]:
+        if not isinstance(event, dict): return "event must be an object", None, 0
+        lot_id, kind, count = event.get("lot_id"), event.get("type"), event.get("count", 1)
+        if not isinstance(lot_id, str) or not index.has_document(lot_id): return "unknown lot_id", None, 0
+        if kind not in EVENT_DELTAS: return "type must be 'entry' or 'exit'", None, 0
+        if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= 10000: return "count must be an integer from 1 to 10000", None, 0
+        return None, lot_id, EVENT_DELTAS[kind] * count
+
+    def offset(self, doc_id: str, data: Dict[str, Any]) -> int:
+        """Free spaces counted here but not yet in this version of the document (the ParkingIndex offsets hook)."""
+        applied = (data.get(SEQ_FIELD) or {}).get(self.worker_id, 0)
+        with self._lock:
+            total = self._unflushed.get(doc_id, 0)
+            for flush in self._flushes.values():
+                if doc_id not in flush.deltas: continue
+                if flush.seq > applied: total += flush.deltas[doc_id]
+                elif flush.committed: flush.unseen.discard(doc_id)
+        return total
+
+    # --- Write-behind ---
+
+    def start(self):
+        if self._thread is not None: return
+        with self._lock:
+            if self._thread is not None: return
+            self._thread = threading.Thread(target=self._run, name="parking-flush", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stops the flush thread after one last flush."""
+        self._stop.set()
+        if self._thread is not None: self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try: self.flush()
+            except Exception as e: logger.error(f"Parking flush failed: {e}", exc_info=True)
+
+    def flush(self) -> int:
+        """Writes pending deltas (and retries failed batches) now; returns the number of batches committed."""
+        with self._flush_lock:
+            with self._lock:
+                self._forget_flushed()
+                pending = sorted((lot, d) for lot, d in self._unflushed.items() if d)
+                self._unflushed = {}
+                for start in range(0, len(pending), FLUSH_MAX_LOTS):
+                    seq = next(self._seq)
+                    self._flushes[seq] = _Flush(seq, dict(pending[start:start + FLUSH_MAX_LOTS]))
+                todo = [flush for flush in self._flushes.values() if not flush.committed]
+            db = self._db()
+            if not todo or not db: return 0
+            committed = 0
+            for flush in todo:
+                try:
+                    self._commit(db, flush)
+                except Exception as e:
+                    if not _already_exists(e):
+                        # Keep the order: later batches wait until this one is in
+                        self.flush_failures += 1
+                        FLUSHES_TOTAL.inc("failed")
+                        logger.warning(f"Parking flush {flush.seq} failed, will retry: {e}")
+                        break
+                    logger.info(f"Parking flush {flush.seq} was already committed")
+                with self._lock: flush.committed = True
+                committed += 1
+                self.flushes_committed += 1
+                FLUSHES_TOTAL.inc("committed")
+                FLUSHED_LOTS.inc(amount=len(flush.deltas))
+            return committed
+
+    def _commit(self, db, flush: _Flush):
+        batch = db.batch()
+        batch.create(db.collection(FLUSH_COLLECTION).document(f"{self.worker_id}-{flush.seq}"),
+                     {"worker": self.worker_id, "seq": flush.seq, "deltas": flush.deltas, "created_at": time.time()})
+        lots = db.collection("parking_lots")
+        for lot_id, delta in flush.deltas.items():
+            batch.set(lots.document(lot_id), {GATE_DELTA_FIELD: _increment(delta), SEQ_FIELD: {self.worker_id: flush.seq}}, merge=True)
+        batch.commit()
+
+    def _forget_flushed(self):
+        cutoff = time.time() - FLUSH_RETENTION_SECONDS
+        for seq in [s for s, f in self._flushes.items() if f.committed and (not f.unseen or f.created_at < cutoff)]:
+            del self._flushes[seq]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "worker_id": self.worker_id, "events_applied": self.events_applied,
+                "unflushed_lots": len(self._unflushed), "flushes_committed": self.flushes_committed,
+                "flush_failures": self.flush_failures, "flushes_pending": sum(1 for f in self._flushes.values() if not f.committed),
+            }
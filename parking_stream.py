@@ -0,0 +1,231 @@
+# parking_stream.py
+# -*- coding: utf-8 -*-
+"""
+Server-Sent Events fan-out of parking availability, per (route, language).
+
+One producer thread watches the active ParkingIndex. When its state changes, the producer
+renders each subscribed channel's lots once and works out which lots changed. It then hands
+the delta to every subscriber of that channel; subscribers never touch Firestore or render
+anything themselves.
+
+Each subscriber has a single pending delta rather than a queue. A new delta is merged into
+it (latest HTML per lot, latest order), so a client that reads slowly skips intermediate
+states instead of building a backlog. The buffer never holds more than the listed lots, and
+the producer never waits on a client.
+
+Streams need a long-running server. Through asgi.py a subscriber costs a coroutine. Through
+Flask each one holds a worker thread, and serverless hosts cut the connection; the browser
+then just keeps the last numbers it received.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from parking_index import ANY_ROUTE, ParkingIndex, ParkingLot
+
+logger = logging.getLogger(__name__)
+
+# Tells EventSource how long to wait before reconnecting after the stream drops (ms)
+RECONNECT_MS = 5000
+
+
+class TooManySubscribers(RuntimeError):
+    pass
+
+
+def format_event(route: str, delta: Dict[str, Any]) -> str:
+    payload = json.dumps({"route": route, "version": delta["version"], "order": delta["order"], "lots": delta["lots"]})
+    return f"event: parking\nid: {delta['version']}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """One client's stream: a coalescing single-slot buffer plus a wake-up event for its thread or event loop."""
+    __slots__ = ("key", "loop", "closed", "_lock", "_pending", "_event")
+
+    def __init__(self, key: Tuple[str, str], loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.key, self.loop, self.closed = key, loop, False
+        self._lock = threading.Lock()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._event = asyncio.Event() if loop is not None else threading.Event()
+
+    def offer(self, lots: Dict[str, str], order: List[str], version: int, text: Optional[str] = None):
+        """
+        Queues a delta. `text` is its pre-formatted event, shared by every subscriber that was
+        caught up; a subscriber that is behind gets the merge of its pending delta and this one.
+        """
+        with self._lock:
+            if self._pending is None:
+                self._pending = {"lots": lots, "order": order, "version": version, "text": text}
+                return
+            merged = {**self._pending["lots"], **lots}
+            listed = set(order)
+            self._pending = {"lots": {i: h for i, h in merged.items() if i in listed}, "order": order, "version": version, "text": None}
+
+    def take(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            pending, self._pending = self._pending, None
+        return pending
+
+    def close(self):
+        """Ends the stream; call from the subscriber's own thread or event loop."""
+        self.closed = True
+        self._event.set()
+
+
+class _Channel:
+    """The lots currently listed for one (route, language), as rendered HTML per lot."""
+
+    def __init__(self, key: Tuple[str, str]):
+        self.key = key
+        self.subscribers = set()
+        self.lots: Dict[str, str] = {}
+        self.order: List[str] = []
+        self.version = 0
+
+    def update(self, index: ParkingIndex, render_lot: Callable[[ParkingLot, str], str], limit: int) -> Optional[Dict[str, str]]:
+        """Re-renders the channel from `index`; returns the lots whose HTML changed, or None if nothing did."""
+        route, lang = self.key
+        lots = index.top(None if route == ANY_ROUTE else route, limit=limit)
+        rendered = {lot.doc_id: render_lot(lot, lang) for lot in lots}
+        changed = {lot_id: html for lot_id, html in rendered.items() if self.lots.get(lot_id) != html}
+        order = [lot.doc_id for lot in lots]
+        if not changed and order == self.order: return None
+        self.lots, self.order = rendered, order
+        self.version += 1
+        return changed
+
+
+def _set_all(events: Iterable[asyncio.Event]):
+    for event in events: event.set()
+
+
+class ParkingBroadcaster:
+    """
+    Shared producer: polls the parking index every `interval` seconds and fans out changes to
+    subscribers. It idles without reading the index while nobody is subscribed.
+    """
+
+    def __init__(self, index_getter: Callable[[], ParkingIndex], render_lot: Callable[[ParkingLot, str], str],
+                 routes: Iterable[str], languages: Iterable[str], limit: int = 10, interval: float = 1.0,
+                 heartbeat: float = 15.0, max_subscribers: int = 5000):
+        self._index, self._render_lot = index_getter, render_lot
+        self.routes, self.languages = (ANY_ROUTE,) + tuple(routes), tuple(languages)
+        self.limit, self.interval, self.heartbeat, self.max_subscribers = limit, interval, heartbeat, max_subscribers
+        self._lock = threading.Lock()
+        self._channels: Dict[Tuple[str, str], _Channel] = {}
+        self._subscribers = 0
+        self._state = None
+        self._thread: Optional[threading.Thread] = None
+        self._active = threading.Event()  # set while anyone is subscribed
+        self.deltas_published = 0
+
+    def __len__(self):
+        return self._subscribers
+
+    def subscribe(self, route: str, lang: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> Subscription:
+        """Registers a client; its first delta (already pending) is the full current list."""
+        if route not in self.routes: raise ValueError(f"Unknown route: {route}")
+        if lang not in self.languages: raise ValueError(f"Unknown language: {lang}")
+        key = (route, lang)
+        sub, index = Subscription(key, loop), self._index()
+        with self._lock:
+            if self._subscribers >= self.max_subscribers: raise TooManySubscribers(f"{self._subscribers} parking streams are open")
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = self._channels[key] = _Channel(key)
+                channel.update(index, self._render_lot, self.limit)
+            channel.subscribers.add(sub)
+            self._subscribers += 1
+            self._active.set()
+            sub.offer(channel.lots, channel.order, channel.version)
+        self._start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        """Idempotent; closes the channel with its last subscriber."""
+        with self._lock:
+            channel = self._channels.get(sub.key)
+            if channel is None or sub not in channel.subscribers: return
+            channel.subscribers.discard(sub)
+            self._subscribers -= 1
+            if not channel.subscribers: del self._channels[sub.key]
+            if not self._subscribers: self._active.clear()
+
+    def _start(self):
+        if self._thread is not None: return
+        with self._lock:
+            if self._thread is not None: return
+            self._thread = threading.Thread(target=self._run, name="parking-stream", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            try: self.publish_once()
+            except Exception as e: logger.error(f"Parking stream update failed: {e}", exc_info=True)
+
+    def publish_once(self) -> int:
+        """One producer tick: returns the number of subscribers handed a delta."""
+        # In polled mode reading the index is a data layer get, which can start a Firestore refresh
+        if not self._channels: return 0
+        index = self._index()
+        with self._lock:
+            if index.state == self._state or not self._channels: return 0
+            self._state = index.state
+            channels = list(self._channels.values())
+        delivered = 0
+        for channel in channels:
+            with self._lock:
+                changed = channel.update(index, self._render_lot, self.limit)
+                subscribers = list(channel.subscribers) if changed is not None else []
+                order, version = channel.order, channel.version
+            if not subscribers: continue
+            text = format_event(channel.key[0], {"lots": changed, "order": order, "version": version})
+            wake = defaultdict(list)
+            for sub in subscribers:
+                sub.offer(changed, order, version, text)
+                if sub.loop is None: sub._event.set()
+                else: wake[sub.loop].append(sub._event)
+            for loop, events in wake.items():
+                # One hop onto each event loop per channel, however many of its coroutines are waiting
+                try: loop.call_soon_threadsafe(_set_all, events)
+                except RuntimeError: pass  # loop already closed; those subscribers are going away
+            delivered += len(subscribers)
+            self.deltas_published += 1
+        return delivered
+
+    def events(self, sub: Subscription) -> Iterator[str]:
+        """SSE text for a thread-per-client server; unsubscribes when the client goes away."""
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            while not sub.closed:
+                delta = sub.take()
+                if delta is not None: yield delta["text"] or format_event(sub.key[0], delta)
+                elif sub._event.wait(self.heartbeat): sub._event.clear()
+                else: yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(sub)
+
+    async def events_async(self, sub: Subscription) -> AsyncIterator[str]:
+        """SSE text for an event loop, until sub.close(); the caller unsubscribes."""
+        yield f"retry: {RECONNECT_MS}\n\n"
+        while not sub.closed:
+            delta = sub.take()
+            if delta is not None:
+                yield delta["text"] or format_event(sub.key[0], delta)
+                continue
+            try:
+                await asyncio.wait_for(sub._event.wait(), self.heartbeat)
+                sub._event.clear()
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"subscribers": self._subscribers, "channels": len(self._channels), "deltas_published": self.deltas_published}
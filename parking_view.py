@@ -0,0 +1,67 @@
+# parking_view.py
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from parking_index import ParkingIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ParkingView:
+    """
+    In-process materialized view of the `parking_lots` collection.
+
+    Fed by a Firestore `on_snapshot` listener: each document change is applied
+    incrementally to a ParkingIndex, which keeps usable lots per route already
+    sorted by (PercentageFull, Priority). Reads never touch Firestore.
+
+    The view is live while it has synced and the watch is still active. A listener is quiet
+    while nothing changes, so silence does not end liveness unless `max_silence` is set.
+    """
+
+    def __init__(self, routes: Iterable[str], origin: Tuple[float, float], full_threshold: float,
+                 offsets: Optional[Callable[[str, Dict[str, Any]], int]] = None, max_silence: Optional[float] = None):
+        self.index = ParkingIndex(routes, origin, full_threshold, offsets)
+        self.max_silence = max_silence
+        self._watch = None
+        self.ready = False
+        self.changes_applied = 0
+        self.last_update = 0.0
+
+    def subscribe(self, db):
+        """Starts listening to `parking_lots`. The first snapshot marks the view as ready."""
+        self._watch = db.collection("parking_lots").on_snapshot(self.on_snapshot)
+
+    def close(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self.ready = False
+
+    @property
+    def listening(self) -> bool:
+        """False once the watch has been closed or its stream has died."""
+        return self._watch is not None and getattr(self._watch, "is_active", True)
+
+    def is_live(self) -> bool:
+        """Synced, still listening, and not silent for longer than `max_silence`."""
+        if not (self.ready and self.listening): return False
+        return not self.max_silence or time.time() - self.last_update < self.max_silence
+
+    def on_snapshot(self, docs, changes, read_time):
+        """Callback for `on_snapshot`; runs on the listener's thread."""
+        try:
+            for change in changes:
+                self.apply_change(change.type.name, change.document.id, change.document.to_dict())
+            self.ready, self.last_update = True, time.time()
+        except Exception as e:
+            logger.error(f"Failed to apply parking snapshot: {e}", exc_info=True)
+
+    def apply_change(self, change_type: str, doc_id: str, data: Optional[Dict[str, Any]]):
+        """Applies one ADDED / MODIFIED / REMOVED document change."""
+        if change_type == "REMOVED" or data is None: self.index.remove(doc_id)
+        else: self.index.upsert(doc_id, data)
+        self.changes_applied += 1
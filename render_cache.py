@@ -0,0 +1,42 @@
+# render_cache.py
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class RenderCache:
+    """
+    Memoizes fully formatted replies.
+
+    Keys must include everything the text depends on - typically (kind, item, lang,
+    data version) - so a bumped data version simply makes old entries unreachable;
+    they age out of the LRU instead of being invalidated explicitly.
+    """
+
+    def __init__(self, max_entries: int = 512, enabled: bool = True):
+        self.max_entries, self.enabled = max_entries, enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        if not self.enabled: return render()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = render()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries: self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock: self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses, "enabled": self.enabled}
@@ -0,0 +1,188 @@
+# session_store.py
+# -*- coding: utf-8 -*-
+"""
+Conversation state storage for BotLogic.
+
+A session is a small dict ({"lang": ..., "menu_level": ...}). Stores keep only the
+fields listed in SESSION_FIELDS, packed into a tuple, and are bounded both by age
+(idle TTL) and by count, so memory stays flat no matter how many visitors arrive.
+
+  * MemorySessionStore - per-process LRU + TTL; the default.
+  * SQLiteSessionStore - a file on local disk shared by every worker process on
+    the same machine (e.g. several gunicorn workers), so a user is not bounced back
+    to language selection when consecutive requests land on different workers.
+
+Use create_session_store("memory") or create_session_store("sqlite:///path/to/file.db").
+"""
+
+import abc
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_FIELDS = ("lang", "menu_level")
+
+
+def _pack(state: Dict[str, Any]) -> tuple:
+    # Language codes and menu levels repeat across every session, so share one string object each.
+    return tuple(sys.intern(v) if isinstance(v, str) else v for v in (state.get(field) for field in SESSION_FIELDS))
+
+
+def _unpack(record: tuple) -> Dict[str, Any]:
+    return {field: value for field, value in zip(SESSION_FIELDS, record) if value is not None}
+
+
+class SessionStore(abc.ABC):
+    """Interface shared by the session backends."""
+
+    def __init__(self, ttl: float, max_sessions: int):
+        self.ttl, self.max_sessions = ttl, max_sessions
+        self.hits = self.misses = self.expired_evictions = self.capacity_evictions = 0
+
+    @abc.abstractmethod
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """The state of `user_id`, or None if there is none or it has expired."""
+
+    @abc.abstractmethod
+    def put(self, user_id: str, state: Dict[str, Any]):
+        """Stores the SESSION_FIELDS of `state` and marks the session as just used."""
+
+    @abc.abstractmethod
+    def delete(self, user_id: str):
+        """Forgets `user_id`; a no-op if it has no session."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Number of sessions held, including expired ones not purged yet."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__, "sessions": len(self), "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl, "hits": self.hits, "misses": self.misses,
+            "expired_evictions": self.expired_evictions, "capacity_evictions": self.capacity_evictions,
+        }
+
+
+class MemorySessionStore(SessionStore):
+    """LRU + idle-TTL store. Entries are (last_seen, *fields) tuples in an OrderedDict kept in access order."""
+
+    def __init__(self, ttl: float = 1800, max_sessions: int = 50000):
+        super().__init__(ttl, max_sessions)
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            record = self._sessions.get(user_id)
+            if record is None:
+                self.misses += 1
+                return None
+            if now - record[0] > self.ttl:
+                del self._sessions[user_id]
+                self.expired_evictions += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            return _unpack(record[1:])
+
+    def put(self, user_id: str, state: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._sessions[user_id] = (now,) + _pack(state)
+            self._sessions.move_to_end(user_id)
+            # The least recently used entries sit at the front: drop expired ones, then any over capacity.
+            while self._sessions:
+                oldest_id, oldest = next(iter(self._sessions.items()))
+                if now - oldest[0] > self.ttl: self.expired_evictions += 1
+                elif len(self._sessions) > self.max_sessions: self.capacity_evictions += 1
+                else: break
+                del self._sessions[oldest_id]
+
+    def delete(self, user_id: str):
+        with self._lock: self._sessions.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a local SQLite file, shared between processes on one host.
+
+    Expired and over-capacity rows are purged every `purge_every` writes rather than
+    on each request, so the table can briefly exceed `max_sessions`.
+    """
+
+    def __init__(self, path: str, ttl: float = 1800, max_sessions: int = 200000, purge_every: int = 1000):
+        super().__init__(ttl, max_sessions)
+        self.path, self.purge_every = path, purge_every
+        self._local = threading.local()
+        self._lock = threading.Lock()  # guards the counters; SQLite does its own locking
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (user_id TEXT PRIMARY KEY, state TEXT NOT NULL, last_seen REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT state, last_seen FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            with self._lock: self.misses += 1
+            return None
+        with self._lock: self.hits += 1
+        return _unpack(tuple(json.loads(row[0])))
+
+    def put(self, user_id: str, state: Dict[str, Any]):
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO sessions (user_id, state, last_seen) VALUES (?, ?, ?)",
+                     (user_id, json.dumps(_pack(state)), time.time()))
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.purge_every == 0
+        if due: self.purge()
+
+    def purge(self):
+        conn = self._connect()
+        expired = conn.execute("DELETE FROM sessions WHERE last_seen < ?", (time.time() - self.ttl,)).rowcount
+        excess, evicted = len(self) - self.max_sessions, 0
+        if excess > 0:
+            evicted = conn.execute(
+                "DELETE FROM sessions WHERE user_id IN (SELECT user_id FROM sessions ORDER BY last_seen LIMIT ?)", (excess,)).rowcount
+        with self._lock:
+            self.expired_evictions += expired
+            self.capacity_evictions += evicted
+
+    def delete(self, user_id: str):
+        self._connect().execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(url: str = "memory", ttl: float = 1800, max_sessions: int = 50000) -> SessionStore:
+    """Builds a store from a URL: "memory" or "sqlite:///path/to/sessions.db"."""
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        logger.info(f"Using SQLite session store at {path}")
+        return SQLiteSessionStore(path, ttl=ttl, max_sessions=max_sessions)
+    if url != "memory":
+        logger.warning(f"Unknown SESSION_STORE_URL '{url}', using the in-memory session store.")
+    return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
@@ -0,0 +1,97 @@
+# snapshot_store.py
+# -*- coding: utf-8 -*-
+"""
+Last-known-good copies of Firestore data on local disk.
+
+After each refresh, the data layer hands a source's raw documents to SnapshotStore.save().
+They are written to `<directory>/<name>.json` (BotLogic uses one directory per Firebase
+project) as one compact JSON object
+{"format": SNAPSHOT_FORMAT, "name": ..., "data": ...}. The file's modification time records
+when the data was last confirmed by Firestore. Files are written under a temporary name and
+renamed into place, so a reader (or another worker process on the same host) never sees a
+half-written snapshot. Unchanged data is not rewritten; only its modification time is bumped.
+
+At start-up BotLogic loads the snapshots before it connects to Firestore. Loading takes a
+few milliseconds, so the first replies come from disk while Firestore is still starting up,
+or when it cannot be reached at all. A snapshot with another format version, or one that
+fails to parse, is ignored.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of "data" changes, so older snapshots are ignored instead of misread
+SNAPSHOT_FORMAT = 1
+
+
+def _jsonable(value: Any) -> Any:
+    # Firestore timestamps and geo points; everything else the bot reads is plain JSON
+    if isinstance(value, (datetime.date, datetime.datetime)): return value.isoformat()
+    if hasattr(value, "latitude") and hasattr(value, "longitude"): return {"latitude": value.latitude, "longitude": value.longitude}
+    return str(value)
+
+
+class SnapshotStore:
+    """One JSON file per data-layer source in `directory`."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._digests: Dict[str, bytes] = {}  # name -> digest of the data last written, to skip identical rewrites
+        self._lock = threading.Lock()
+        self.saves = self.unchanged = self.failures = 0
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, name: str) -> Optional[Tuple[Any, float]]:
+        """(data, saved_at) from the snapshot of `name`, or None if there is no usable one."""
+        path = self.path(name)
+        try:
+            with open(path, "rb") as f:
+                saved_at = os.fstat(f.fileno()).st_mtime
+                snapshot = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+            return None
+        if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("name") != name:
+            logger.warning(f"Ignoring snapshot {path}: not a format {SNAPSHOT_FORMAT} snapshot of '{name}'")
+            return None
+        return snapshot.get("data"), saved_at
+
+    def save(self, name: str, data: Any) -> bool:
+        """Writes the snapshot of `name`; returns False if it was unchanged or could not be written."""
+        encoded = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_jsonable)
+        digest = hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).digest()
+        path = self.path(name)
+        temporary = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            if self._digests.get(name) == digest and os.path.exists(path):
+                os.utime(path)
+                with self._lock: self.unchanged += 1
+                return False
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(f'{{"format":{SNAPSHOT_FORMAT},"name":{json.dumps(name)},"data":{encoded}}}')
+            os.replace(temporary, path)
+        except OSError as e:
+            with self._lock: self.failures += 1
+            logger.warning(f"Could not write snapshot {path}: {e}")
+            if os.path.exists(temporary): os.remove(temporary)
+            return False
+        with self._lock:
+            self._digests[name] = digest
+            self.saves += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"directory": self.directory, "saves": self.saves, "unchanged": self.unchanged, "failures": self.failures}
@@ -0,0 +1,170 @@
+# spatial_index.py
+# -*- coding: utf-8 -*-
+"""
+k-nearest lookup over everything with coordinates: parking lots and local_info items.
+
+Points are bucketed per kind into a fixed lat/lon grid. A query walks rings of cells around
+the user until it has k candidates, then widens to the radius that provably contains the
+true k nearest and ranks only those candidates by great-circle distance. Ranking uses NumPy
+when it is installed (it is optional) and falls back to plain Python otherwise. NumPy is
+imported when the first grid is built, not with this module, to keep it off the cold-start path.
+"""
+
+import heapq
+from collections import defaultdict
+from math import cos, floor, radians
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from parking_index import haversine_km
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+DEFAULT_CELL_DEG = 0.005  # about 550 m
+_numpy_module: Any = False  # False until the first import attempt, then the module or None
+
+
+def _numpy():
+    """NumPy, or None if it is not installed."""
+    global _numpy_module
+    if _numpy_module is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
+
+class Place:
+    """One point of interest: a parking lot or a local_info item."""
+    __slots__ = ("kind", "key", "names", "latitude", "longitude")
+
+    def __init__(self, kind: str, key: str, names: Dict[str, str], latitude: float, longitude: float):
+        self.kind, self.key, self.names = kind, key, names
+        self.latitude, self.longitude = latitude, longitude
+
+    def name(self, lang: str = "en") -> str:
+        return self.names.get(lang) or self.names.get("en") or self.key
+
+    @classmethod
+    def from_item(cls, kind: str, key: str, item: Dict[str, Any]) -> Optional["Place"]:
+        """Builds a place from a document with Latitude/Longitude and Name_<lang> fields, or None without coordinates."""
+        try:
+            latitude, longitude = float(item["Latitude"]), float(item["Longitude"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180): return None
+        names = {k[len("Name_"):]: str(v) for k, v in item.items() if k.startswith("Name_") and v}
+        return cls(kind, key, names, latitude, longitude)
+
+
+class _Grid:
+    """The places of one kind, bucketed into cell_deg x cell_deg cells."""
+
+    def __init__(self, places: List[Place], cell_deg: float):
+        self.places, self.cell_deg = places, cell_deg
+        self.cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, p in enumerate(places): self.cells[self._cell(p.latitude, p.longitude)].append(i)
+        rows, cols = [r for r, _ in self.cells], [c for _, c in self.cells]
+        self.bounds = (min(rows), max(rows), min(cols), max(cols))
+        self.np = np = _numpy()
+        if np is not None:
+            self.lat_rad = np.radians(np.fromiter((p.latitude for p in places), dtype=np.float64, count=len(places)))
+            self.lon_rad = np.radians(np.fromiter((p.longitude for p in places), dtype=np.float64, count=len(places)))
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return floor(latitude / self.cell_deg), floor(longitude / self.cell_deg)
+
+    def _rings(self, row: int, col: int, first: int, last: int) -> List[int]:
+        """Indices of the places in the cells `first`..`last` rings (Chebyshev distance) away from (row, col)."""
+        found = []
+        if (2 * last + 1) ** 2 - max(2 * first - 1, 0) ** 2 > len(self.cells):
+            # Sparse grid: cheaper to scan the occupied cells than to enumerate the rings
+            for (r, c), members in self.cells.items():
+                if first <= max(abs(r - row), abs(c - col)) <= last: found.extend(members)
+            return found
+        cells = self.cells
+        for ring in range(first, last + 1):
+            if ring == 0:
+                found.extend(cells.get((row, col), ()))
+                continue
+            for c in range(col - ring, col + ring + 1):
+                found.extend(cells.get((row - ring, c), ()))
+                found.extend(cells.get((row + ring, c), ()))
+            for r in range(row - ring + 1, row + ring):
+                found.extend(cells.get((r, col - ring), ()))
+                found.extend(cells.get((r, col + ring), ()))
+        return found
+
+    def _distances(self, latitude: float, longitude: float, indices: List[int]):
+        np = self.np
+        if np is None:
+            places = self.places
+            return [haversine_km(latitude, longitude, places[i].latitude, places[i].longitude) for i in indices]
+        idx = np.fromiter(indices, dtype=np.intp, count=len(indices))
+        lat1, lat2, lon2 = radians(latitude), self.lat_rad[idx], self.lon_rad[idx]
+        a = np.sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * np.cos(lat2) * np.sin((lon2 - radians(longitude)) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def nearest(self, latitude: float, longitude: float, k: int) -> List[Tuple[float, Place]]:
+        np = self.np
+        row, col = self._cell(latitude, longitude)
+        min_row, max_row, min_col, max_col = self.bounds
+        max_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+
+        ring, indices, visited = 0, [], 0
+        while len(indices) < k and ring <= max_ring:
+            if visited > len(self.cells):
+                # Far from the data: take everything that is left in one scan of the occupied cells
+                indices.extend(self._rings(row, col, ring, max_ring))
+                ring = max_ring + 1
+                break
+            indices.extend(self._rings(row, col, ring, ring))
+            visited += max(8 * ring, 1)
+            ring += 1
+        if not indices: return []
+        distances = self._distances(latitude, longitude, indices)
+
+        if len(indices) >= k and ring <= max_ring:
+            # A place `q` rings away is at least (q - 1) cell widths away, so every place closer than
+            # the current k-th candidate lies within `needed` rings.
+            kth = float(np.partition(distances, k - 1)[k - 1]) if np is not None else heapq.nsmallest(k, distances)[-1]
+            cell_km = KM_PER_DEGREE * self.cell_deg * cos(radians(min(abs(latitude) + (ring + 1) * self.cell_deg, 89.0)))
+            needed = min(int(kth / cell_km) + 1, max_ring)
+            if needed >= ring:
+                extra = self._rings(row, col, ring, needed)
+                if extra:
+                    indices.extend(extra)
+                    extra_distances = self._distances(latitude, longitude, extra)
+                    distances = np.concatenate((distances, extra_distances)) if np is not None else distances + extra_distances
+
+        if np is not None:
+            order = np.argpartition(distances, k - 1)[:k] if len(indices) > k else np.arange(len(indices))
+            best = sorted((float(distances[i]), indices[i]) for i in order)
+        else:
+            best = heapq.nsmallest(k, zip(distances, indices))
+        return [(d, self.places[i]) for d, i in best]
+
+
+class SpatialIndex:
+    """Per-kind grids answering "the k places nearest to (lat, lon)", optionally limited to some kinds."""
+
+    def __init__(self, places: Iterable[Place], cell_deg: float = DEFAULT_CELL_DEG):
+        by_kind = defaultdict(list)
+        for place in places: by_kind[place.kind].append(place)
+        self._grids = {kind: _Grid(members, cell_deg) for kind, members in by_kind.items()}
+        self._size = sum(len(members) for members in by_kind.values())
+
+    def __len__(self):
+        return self._size
+
+    def kinds(self) -> List[str]:
+        return list(self._grids)
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5, kinds: Optional[Iterable[str]] = None,
+                max_km: Optional[float] = None) -> List[Tuple[float, Place]]:
+        """Up to k (distance_km, place) pairs, nearest first."""
+        if k <= 0: return []
+        grids = self._grids.values() if kinds is None else [self._grids[kind] for kind in kinds if kind in self._grids]
+        results = heapq.nsmallest(k, (hit for grid in grids for hit in grid.nearest(latitude, longitude, k)), key=lambda hit: hit[0])
+        return [hit for hit in results if max_km is None or hit[0] <= max_km]
@@ -0,0 +1,258 @@
+// --- DOM ELEMENT REFERENCES ---
+const contentViewer = document.getElementById('content-viewer');
+const chatOpener = document.getElementById('chat-opener');
+const openChatPrompt = document.getElementById('open-chat-prompt'); // New element
+const chatWindow = document.getElementById('chat-window');
+const chatCloser = document.getElementById('chat-closer');
+const chatBox = document.getElementById('chat-box');
+const messageForm = document.getElementById('message-form');
+const userInput = document.getElementById('user-input');
+const sendButton = document.getElementById('send-button');
+const typingIndicator = document.getElementById('typing-indicator');
+
+// Last known position of the visitor, sent with each message for "nearest to me" answers
+let userLocation = null;
+// Server-Sent Events stream keeping the latest parking reply current
+let parkingStream = null;
+
+// --- INITIALIZATION ---
+document.addEventListener('DOMContentLoaded', () => {
+    // Send an empty string as the initial "question" to trigger the
+    // new user flow in the backend and get the welcome message.
+    sendMessageToServer(""); 
+});
+
+// --- EVENT LISTENERS ---
+chatOpener.addEventListener('click', () => {
+    toggleChatWindow(true);
+    if (typeof gtag === 'function') {
+        gtag('event', 'chat_opened', { 'event_category': 'Engagement' });
+    }
+});
+openChatPrompt.addEventListener('click', () => {
+    toggleChatWindow(true);
+    if (typeof gtag === 'function') {
+        gtag('event', 'chat_opened', { 'event_category': 'Engagement' });
+    }
+});
+chatCloser.addEventListener('click', () => toggleChatWindow(false));
+messageForm.addEventListener('submit', handleFormSubmit);
+chatBox.addEventListener('click', handleChatBoxClick);
+
+// --- CORE FUNCTIONS ---
+function toggleChatWindow(show) {
+    chatWindow.classList.toggle('visible', show);
+    if (show) {
+        userInput.focus();
+        requestUserLocation();
+    }
+}
+
+function requestUserLocation() {
+    if (userLocation || !navigator.geolocation) return;
+    navigator.geolocation.getCurrentPosition(
+        (position) => {
+            userLocation = { lat: position.coords.latitude, lon: position.coords.longitude };
+        },
+        () => { /* Location is optional; answers fall back to map searches */ },
+        { enableHighAccuracy: true, timeout: 10000, maximumAge: 60000 }
+    );
+}
+
+function handleFormSubmit(event) {
+    event.preventDefault();
+    const question = userInput.value.trim();
+    if (!question) return;
+    if (typeof gtag === 'function') {
+        gtag('event', 'typed_query', {
+            'event_category': 'Chat Interaction',
+            'event_label': question.substring(0, 100) // Limit to 100 chars
+        });
+    }
+    addMessage(question, 'user');
+    userInput.value = '';
+    sendMessageToServer(question);
+}
+
+function handleChatBoxClick(event) {
+    const target = event.target;
+
+    const embedLink = target.closest('a[data-embed="true"]');
+    if (embedLink) {
+        event.preventDefault();
+
+        if (typeof gtag === 'function') {
+            gtag('event', 'map_link_clicked', {
+                'event_category': 'Map Interaction',
+                'event_label': embedLink.href
+            });
+        }
+
+        loadMapInIframe(embedLink.href);
+        return;
+    }
+
+    // This handles regular links that should open in a new tab
+    const regularLink = target.closest('a:not([data-embed="true"])');
+    if (regularLink) {
+        // Let the browser handle its default behavior (e.g., open in new tab for target="_blank")
+        return;
+    }
+
+    const chatButton = target.closest('.chat-button');
+    if (chatButton) {
+        event.preventDefault();
+        const payload = chatButton.dataset.payload;
+        const buttonText = chatButton.textContent.trim();
+        if (typeof gtag === 'function') {
+            gtag('event', 'button_click', {
+                'event_category': 'Chat Interaction',
+                'event_label': buttonText,
+                'payload': payload
+            });
+        }
+
+        addMessage(buttonText, 'user');
+
+        const buttonContainer = chatButton.closest('.button-container');
+        if (buttonContainer) {
+            buttonContainer.querySelectorAll('.chat-button').forEach(btn => btn.disabled = true);
+        }
+
+        sendMessageToServer(payload);
+    }
+}
+
+function loadMapInIframe(mapUrl) {
+    console.log("Loading map in iframe:", mapUrl);
+    contentViewer.innerHTML = '';
+    const iframe = document.createElement('iframe');
+    iframe.src = mapUrl;
+    iframe.setAttribute('allowfullscreen', '');
+    iframe.setAttribute('loading', 'lazy');
+    iframe.setAttribute('referrerpolicy', 'no-referrer-when-downgrade');
+    contentViewer.appendChild(iframe);
+    toggleChatWindow(false);
+}
+
+async function sendMessageToServer(message) {
+    const isInitialMessage = message === "";
+
+    toggleInput(false);
+    if (!isInitialMessage) {
+        showTypingIndicator(true);
+    }
+
+    try {
+        const response = await fetch('/ask', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ question: message, user_id: USER_ID, ...(userLocation || {}) })
+        });
+        if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
+
+        const data = await response.json();
+
+        if (!isInitialMessage) {
+            showTypingIndicator(false);
+        }
+        addMessage(data.text, 'bot', data.buttons);
+
+    } catch (error) {
+        console.error('Error fetching bot response:', error);
+        if (!isInitialMessage) showTypingIndicator(false);
+        addMessage('Sorry, I encountered a communication error. Please try again.', 'bot');
+    } finally {
+        toggleInput(true);
+    }
+}
+
+function addMessage(text, sender, buttons = []) {
+    if (!text) return;
+
+    const shouldScroll = isScrolledToBottom();
+
+    const messageElement = document.createElement('div');
+    messageElement.classList.add('message', `${sender}-message`);
+
+    const bubbleElement = document.createElement('div');
+    bubbleElement.classList.add('bubble');
+
+    const textElement = document.createElement('div');
+    textElement.innerHTML = text; 
+    bubbleElement.appendChild(textElement);
+
+    if (buttons && buttons.length > 0) {
+        const buttonContainer = document.createElement('div');
+        buttonContainer.className = 'button-container';
+        buttons.forEach(btnData => {
+            const button = document.createElement('button');
+            button.className = 'chat-button';
+            button.textContent = btnData.text;
+            button.dataset.payload = btnData.payload;
+            buttonContainer.appendChild(button);
+        });
+        bubbleElement.appendChild(buttonContainer);
+    }
+
+    messageElement.appendChild(bubbleElement);
+    chatBox.insertBefore(messageElement, typingIndicator);
+    if (sender === 'bot' && PARKING_STREAM_ENABLED) watchParkingView(bubbleElement);
+
+    if (shouldScroll) {
+        scrollToBottom();
+    }
+}
+
+// Only the newest parking reply is live; older ones keep the numbers they were sent with
+function watchParkingView(bubbleElement) {
+    const view = bubbleElement.querySelector('.parking-view');
+    if (!view || !window.EventSource) return;
+    if (parkingStream) parkingStream.close();
+    const params = new URLSearchParams({ route: view.dataset.route, lang: view.dataset.lang });
+    const stream = parkingStream = new EventSource(`/parking/stream?${params}`);
+    stream.addEventListener('parking', (event) => applyParkingUpdate(view, JSON.parse(event.data)));
+    // No reconnecting: the reply keeps its last numbers rather than retrying against a busy or stream-less server
+    stream.addEventListener('error', () => {
+        stream.close();
+        if (parkingStream === stream) parkingStream = null;
+    });
+}
+
+function applyParkingUpdate(view, update) {
+    const lotElement = (lotId) => view.querySelector(`[data-lot="${CSS.escape(lotId)}"]`);
+    for (const [lotId, html] of Object.entries(update.lots)) {
+        const template = document.createElement('template');
+        template.innerHTML = html;
+        const existing = lotElement(lotId);
+        if (existing) existing.replaceWith(template.content);
+        else view.appendChild(template.content);
+    }
+    const listed = new Set(update.order);
+    view.querySelectorAll('[data-lot]').forEach(el => { if (!listed.has(el.dataset.lot)) el.remove(); });
+    // Re-appending in order moves each lot to its new position
+    update.order.forEach(lotId => { const el = lotElement(lotId); if (el) view.appendChild(el); });
+}
+
+function showTypingIndicator(show) {
+    const shouldScroll = isScrolledToBottom();
+    typingIndicator.classList.toggle('visible', show); 
+    if (show && shouldScroll) {
+        scrollToBottom();
+    }
+}
+
+function toggleInput(enabled) {
+    userInput.disabled = !enabled;
+    sendButton.disabled = !enabled;
+    if (enabled) userInput.focus();
+}
+
+function isScrolledToBottom() {
+    const threshold = 15;
+    return chatBox.scrollHeight - chatBox.clientHeight <= chatBox.scrollTop + threshold;
+}
+
+function scrollToBottom() {
+    chatBox.scrollTo({ top: chatBox.scrollHeight, behavior: 'smooth' });
+}
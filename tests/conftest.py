@@ -0,0 +1,9 @@
+# tests/conftest.py
+# -*- coding: utf-8 -*-
+"""Puts the repo root on sys.path, like benchmarks/common.py does for the benchmarks."""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path: sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,75 @@
+# tests/test_asgi.py
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("asgiref")
+import app as web_app
+import asgi
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+
+
+@pytest.fixture
+def built_on(monkeypatch):
+    """Replaces the bot factory with one over FakeFirestore; collects the threads it ran on."""
+    threads = []
+
+    def get_bot_logic():
+        threads.append(threading.current_thread())
+        return BotLogic(db=FakeFirestore({"local_info": {}, "parking_lots": {}}))
+    monkeypatch.setattr(asgi, "get_bot_logic", get_bot_logic)
+    monkeypatch.setattr(asgi, "_bot_logic", None)
+    return threads
+
+
+def call(scope, messages):
+    """Runs the ASGI app for one connection; returns the messages it sent."""
+    sent, incoming = [], list(messages)
+
+    async def receive():
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent
+
+
+def http(method, path, body=b"", headers=()):
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"", "headers": list(headers),
+             "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1), "root_path": ""}
+    return call(scope, [{"type": "http.request", "body": body, "more_body": False}])
+
+
+def test_lifespan_startup_builds_the_bot_off_the_event_loop(built_on):
+    sent = call({"type": "lifespan"}, [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    assert [m["type"] for m in sent] == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert len(built_on) == 1 and built_on[0] is not threading.main_thread()
+
+
+def test_first_ask_builds_the_bot_off_the_event_loop_once(built_on):
+    for question in ("", "en"):
+        sent = http("POST", "/ask", json.dumps({"user_id": "u", "question": question}).encode())
+        assert sent[0]["status"] == 200
+        assert json.loads(sent[1]["body"])["text"]
+    assert len(built_on) == 1 and built_on[0] is not threading.main_thread()
+
+
+def test_other_paths_are_served_by_the_flask_app(built_on):
+    sent = http("GET", "/")
+    assert sent[0]["status"] == 200
+    assert b"<html" in b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body").lower()
+    assert not built_on
+
+
+def test_metrics_need_the_bearer_token(monkeypatch):
+    monkeypatch.setattr(web_app, "METRICS_TOKEN", "scrape")
+    assert http("GET", "/metrics")[0]["status"] == 401
+    sent = http("GET", "/metrics", headers=[(b"authorization", b"Bearer scrape")])
+    assert sent[0]["status"] == 200 and b"# TYPE" in sent[1]["body"]
@@ -0,0 +1,51 @@
+# tests/test_assets.py
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+
+import pytest
+
+import app as web_app
+from assets import DIST_DIR, ENCODINGS, HASH_LENGTH, IMMUTABLE, MANIFEST_FILE, SOURCE_DIRS, _source_files
+
+REBUILD = "static/dist is out of date: run `python assets.py` and commit static/dist"
+
+
+@pytest.fixture(scope="module")
+def manifest():
+    with open(os.path.join(DIST_DIR, MANIFEST_FILE), encoding="utf-8") as f: return json.load(f)
+
+
+def test_committed_build_matches_the_sources(manifest):
+    sources = dict(_source_files(SOURCE_DIRS, DIST_DIR))
+    assert set(manifest["assets"]) == set(sources), REBUILD
+    for name, path in sources.items():
+        with open(path, "rb") as f: digest = hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+        assert f".{digest}." in manifest["assets"][name]["file"], f"{name}: {REBUILD}"
+
+
+def test_every_file_in_the_manifest_is_committed(manifest):
+    suffixes = dict(ENCODINGS)
+    for name, info in manifest["files"].items():
+        assert os.path.isfile(os.path.join(DIST_DIR, name)), name
+        for encoding in info["encodings"]: assert os.path.isfile(os.path.join(DIST_DIR, name + suffixes[encoding])), name
+
+
+def test_page_links_to_the_build_and_serves_it_immutable():
+    client = web_app.app.test_client()
+    page = client.get("/").get_data(as_text=True)
+    css = web_app.ASSETS.url("index.css")
+    assert css.startswith("/assets/") and css in page
+    response = client.get(css, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == IMMUTABLE
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert client.get(css, headers={"If-None-Match": response.headers["ETag"], "Accept-Encoding": "gzip"}).status_code == 304
+
+
+def test_every_built_asset_is_linked_from_the_page(manifest):
+    page = web_app.app.test_client().get("/").get_data(as_text=True)
+    unused = [name for name in manifest["assets"] if web_app.ASSETS.url(name) not in page]
+    assert not unused, f"{unused} would be built and committed without being served; remove them from static/"
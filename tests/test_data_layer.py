@@ -0,0 +1,133 @@
+# tests/test_data_layer.py
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from data_layer import DataLayer
+from fake_firestore import FakeFirestore
+
+
+def counting_loader(values=None, gate=None):
+    """A loader returning successive `values` (or the call count); waits on `gate` when given one."""
+    calls = []
+
+    def loader():
+        calls.append(time.time())
+        if gate is not None: gate.wait(5)
+        return values[min(len(calls), len(values)) - 1] if values else len(calls)
+    return loader, calls
+
+
+def firestore_loader(db):
+    def loader():
+        return {doc.id: doc.to_dict() for doc in db.collection("parking_lots").stream()}
+    return loader
+
+
+def test_fresh_value_is_served_from_memory():
+    layer = DataLayer()
+    loader, calls = counting_loader()
+    layer.register("source", loader, ttl=60)
+    assert [layer.get("source") for _ in range(5)] == [1] * 5
+    assert len(calls) == 1
+    stats = layer.stats()["source"]
+    assert (stats["misses"], stats["hits"], stats["refreshes"]) == (1, 4, 1)
+
+
+def test_concurrent_first_reads_share_one_load():
+    layer, gate = DataLayer(), threading.Event()
+    loader, calls = counting_loader(gate=gate)
+    layer.register("source", loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(layer.get("source"))) for _ in range(20)]
+    for t in threads: t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads: t.join(5)
+    assert results == [1] * 20
+    assert len(calls) == 1
+
+
+def test_stale_reads_return_immediately_and_start_one_refresh():
+    layer, gate = DataLayer(), threading.Event()
+    loader, calls = counting_loader(values=["old", "new"], gate=gate)
+    gate.set()
+    layer.register("source", loader, ttl=60)
+    assert layer.get_versioned("source") == ("old", 1)
+    gate.clear()
+    layer.invalidate("source")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(layer.get_versioned("source"))) for _ in range(20)]
+    for t in threads: t.start()
+    for t in threads: t.join(5)
+    # Nobody waited on the refresh, and only one was started
+    assert results == [("old", 1)] * 20
+    assert len(calls) == 2
+    assert layer.stats()["source"]["refreshing"]
+    gate.set()
+    assert layer.refresh("source", wait=True)  # joins the running refresh
+    assert len(calls) == 2
+    assert layer.get_versioned("source") == ("new", 2)
+
+
+def test_failed_refresh_keeps_last_known_good_value_and_version():
+    db = FakeFirestore({"parking_lots": {"P1": {"Name": "North", "PercentageFull": 40}}})
+    layer = DataLayer(retry_backoff=60)
+    layer.register("parking_lots", firestore_loader(db), ttl=0.01, default={})
+    value, version = layer.get_versioned("parking_lots")
+    assert value["P1"]["PercentageFull"] == 40
+    db.fail_reads = True
+    time.sleep(0.02)
+    assert layer.refresh("parking_lots", wait=True)  # failed, but still has a value
+    assert layer.get_versioned("parking_lots") == (value, version)
+    stats = layer.stats()["parking_lots"]
+    assert stats["failures"] == 1 and "failing" in stats["last_error"]
+    assert layer.staleness("parking_lots") is not None
+
+
+def test_retry_backoff_after_a_failed_refresh():
+    db = FakeFirestore({"parking_lots": {"P1": {"PercentageFull": 40}}})
+    layer = DataLayer(retry_backoff=0.2)
+    layer.register("parking_lots", firestore_loader(db), ttl=0.01, default={})
+    layer.get("parking_lots")
+    db.fail_reads = True
+    time.sleep(0.02)
+    layer.refresh("parking_lots", wait=True)
+    reads = db.read_count
+    # Stale reads inside the backoff don't start refreshes
+    for _ in range(10): layer.get("parking_lots")
+    assert not layer.stats()["parking_lots"]["refreshing"]
+    assert layer.stats()["parking_lots"]["failures"] == 1
+    db.fail_reads = False
+    time.sleep(0.25)
+    layer.get("parking_lots")  # past the backoff: refreshes in the background
+    layer.refresh("parking_lots", wait=True)
+    assert db.read_count > reads
+    assert layer.stats()["parking_lots"]["last_error"] is None
+    assert layer.staleness("parking_lots") is None
+
+
+def test_failed_first_load_does_not_block_callers_during_backoff():
+    db = FakeFirestore({"parking_lots": {"P1": {"PercentageFull": 40}}})
+    db.fail_reads = True
+    layer = DataLayer(retry_backoff=60)
+    layer.register("parking_lots", firestore_loader(db), ttl=60, default={})
+    assert layer.get("parking_lots") == {}
+    db.latency = 5  # a waiting caller would now hang
+    started = time.perf_counter()
+    assert layer.get("parking_lots") == {}
+    assert time.perf_counter() - started < 0.5
+    assert layer.stats()["parking_lots"]["failures"] == 1
+
+
+def test_version_changes_only_with_the_data():
+    db = FakeFirestore({"parking_lots": {"P1": {"PercentageFull": 40}}})
+    layer = DataLayer()
+    layer.register("parking_lots", firestore_loader(db), ttl=60, default={})
+    _, version = layer.get_versioned("parking_lots")
+    layer.refresh("parking_lots")
+    assert layer.version("parking_lots") == version
+    db.collection("parking_lots").document("P1").set({"PercentageFull": 90})
+    layer.refresh("parking_lots")
+    assert layer.get_versioned("parking_lots") == ({"P1": {"PercentageFull": 90}}, version + 1)
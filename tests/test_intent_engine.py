@@ -0,0 +1,43 @@
+# tests/test_intent_engine.py
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from intent_engine import MODEL_FILE, IntentEngine, load_engine, load_samples
+
+
+def is_tamil(text):
+    return any("஀" <= ch <= "௿" for ch in text)
+
+
+@pytest.fixture(scope="module")
+def samples():
+    return load_samples()[::10]  # every 10th utterance: trains in about a second
+
+
+def test_shipped_artifact_loads_and_answers(samples):
+    engine = load_engine(MODEL_FILE)
+    assert engine is not None
+    labels = set(engine.intent_head.labels)
+    assert {s["intent"] for s in samples} <= labels
+    prediction = engine.predict("where can I park my car")
+    assert prediction["intent"] in labels and 0 < prediction["confidence"] <= 1
+
+
+def test_int8_artifact_agrees_with_the_float_model(samples, tmp_path):
+    trained = IntentEngine.train(samples, epochs=4)
+    path = str(tmp_path / "model.bin.gz")
+    trained.save(path)
+    packed = IntentEngine.load(path)
+    english = [s["text"] for s in samples if not is_tamil(s["text"])][:10]
+    tamil = [s["text"] for s in samples if is_tamil(s["text"])][:10]
+    assert len(tamil) == 10
+    for text in english + tamil:
+        assert packed.predict(text)["intent"] == trained.predict(text)["intent"], text
+        assert packed.predict(text)["confidence"] == pytest.approx(trained.predict(text)["confidence"], abs=0.05), text
+
+
+def test_unreadable_artifact_disables_free_text(tmp_path):
+    path = tmp_path / "model.bin.gz"
+    path.write_bytes(b"not a model")
+    assert load_engine(str(path)) is None
@@ -0,0 +1,77 @@
+# tests/test_local_info_fetch.py
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+
+import bot_logic
+from bot_logic import BotLogic, INFO_CATEGORIES
+from fake_firestore import FakeFirestore
+
+
+def local_info(tag):
+    return {name: {"items": [{"Name_en": f"{name} {tag}"}]} for name in INFO_CATEGORIES}
+
+
+def path(name):
+    return f"local_info/{name}"
+
+
+def names(bot):
+    return {category: [item["Name_en"] for item in items] for category, items in bot.data.peek("local_info").items()}
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    return BotLogic(db=FakeFirestore({"local_info": local_info("v1")}))
+
+
+def reload(bot, tag):
+    """Replaces every local_info document with a `tag` version and refreshes; returns the seconds it took."""
+    for name, doc in local_info(tag).items(): bot.db.collection("local_info").document(name).set(doc)
+    started = time.perf_counter()
+    assert bot.data.refresh("local_info", wait=True)
+    return time.perf_counter() - started
+
+
+@pytest.mark.parametrize("mode", ["batch", "concurrent"])
+def test_slow_documents_are_read_in_parallel(bot, monkeypatch, mode):
+    monkeypatch.setattr(bot_logic, "LOCAL_INFO_FETCH_MODE", mode)
+    bot.db.path_latency = {path("Help_Centres"): 0.2, path("Toilets_Near_Temple"): 0.2}
+    elapsed = reload(bot, "v2")
+    assert elapsed < 0.35
+    assert names(bot) == {name: [f"{name} v2"] for name in INFO_CATEGORIES}
+
+
+def test_document_slower_than_the_timeout_keeps_its_last_good_value(bot, monkeypatch):
+    monkeypatch.setattr(bot_logic, "LOCAL_INFO_FETCH_MODE", "concurrent")
+    monkeypatch.setattr(bot_logic, "LOCAL_INFO_FETCH_TIMEOUT", 0.1)
+    bot.db.path_latency = {path("Temp_Bus_Stands"): 0.5}
+    assert reload(bot, "v2") < 0.3
+    assert names(bot)["Temp_Bus_Stands"] == ["Temp_Bus_Stands v1"]
+    assert all(names(bot)[name] == [f"{name} v2"] for name in INFO_CATEGORIES if name != "Temp_Bus_Stands")
+
+
+@pytest.mark.parametrize("mode", ["batch", "concurrent"])
+@pytest.mark.parametrize("failing", ["Help_Centres", "Annadhanam_Details"])
+def test_failing_document_keeps_its_last_good_value_without_dropping_the_rest(bot, monkeypatch, mode, failing):
+    monkeypatch.setattr(bot_logic, "LOCAL_INFO_FETCH_MODE", mode)
+    # A fast failure is the first document a batch streams back; a slow one is the last
+    bot.db.path_latency = {path("Annadhanam_Details"): 0.05}
+    bot.db.fail_paths = {path(failing)}
+    reload(bot, "v2")
+    assert names(bot)[failing] == [f"{failing} v1"]
+    assert all(names(bot)[name] == [f"{name} v2"] for name in INFO_CATEGORIES if name != failing)
+    assert bot.data.fetch_timings()[path(failing)]["errors"] >= 1
+
+
+def test_refresh_fails_and_keeps_everything_when_no_document_can_be_read(bot):
+    bot.db.fail_paths = {path(name) for name in INFO_CATEGORIES}
+    for name, doc in local_info("v2").items(): bot.db.collection("local_info").document(name).set(doc)
+    version = bot.data.version("local_info")
+    bot.data.refresh("local_info", wait=True)
+    assert bot.data.stats()["local_info"]["failures"] == 1
+    assert bot.data.version("local_info") == version
+    assert names(bot) == {name: [f"{name} v1"] for name in INFO_CATEGORIES}
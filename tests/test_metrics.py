@@ -0,0 +1,67 @@
+# tests/test_metrics.py
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import app as web_app
+import bot_logic
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+from metrics import MetricsRegistry
+
+
+def test_counter_renders_labels_with_escaping():
+    registry = MetricsRegistry()
+    reads = registry.counter("reads_total", "Reads.", ("collection",))
+    reads.inc("local_info", amount=2)
+    reads.inc('say "hi"\\\n')
+    reads.inc("local_info")
+    assert registry.render().splitlines() == [
+        "# HELP reads_total Reads.", "# TYPE reads_total counter",
+        "reads_total{collection=\"local_info\"} 3",
+        "reads_total{collection=\"say \\\"hi\\\"\\\\\\n\"} 1",
+    ]
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    latency = registry.histogram("fetch_seconds", "Fetches.", ("document",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 2.0): latency.observe(seconds, "a")
+    assert registry.render().splitlines() == [
+        "# HELP fetch_seconds Fetches.", "# TYPE fetch_seconds histogram",
+        'fetch_seconds_bucket{document="a",le="0.1"} 2',
+        'fetch_seconds_bucket{document="a",le="1.0"} 3',
+        'fetch_seconds_bucket{document="a",le="+Inf"} 4',
+        'fetch_seconds_sum{document="a"} 2.65',
+        'fetch_seconds_count{document="a"} 4',
+    ]
+
+
+def test_failing_callback_is_reported_as_a_comment():
+    registry = MetricsRegistry()
+    registry.callback("sessions", "Sessions.", "gauge", lambda: {(): 3})
+    registry.callback("broken", "Broken.", "gauge", lambda: 1 / 0)
+    assert registry.render().splitlines() == [
+        "# HELP sessions Sessions.", "# TYPE sessions gauge", "sessions 3", "# broken unavailable: division by zero",
+    ]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    bot = BotLogic(db=FakeFirestore({"local_info": {"Help_Centres": {"items": []}}}))
+    monkeypatch.setattr(web_app, "_bot_logic", bot)
+    return web_app.app.test_client()
+
+
+def test_metrics_need_the_bearer_token(client, monkeypatch):
+    monkeypatch.setattr(web_app, "METRICS_TOKEN", "")
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+    monkeypatch.setattr(web_app, "METRICS_TOKEN", "scrape")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape"})
+    assert response.status_code == 200 and response.mimetype == "text/plain"
+    scrape = response.get_data(as_text=True)
+    assert "# TYPE tiruchendur_firestore_fetch_seconds histogram" in scrape
+    assert 'tiruchendur_firestore_fetch_seconds_count{document="local_info/Help_Centres",outcome="ok"}' in scrape
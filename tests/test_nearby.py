@@ -0,0 +1,56 @@
+# tests/test_nearby.py
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import bot_logic
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+
+NEAR_TEMPLE = (8.4967, 78.1245)
+TOILETS = [{"Name_en": "Toilet block A", "Notes_en": "Open 24 hours"}, {"Name_en": "Toilet block B"}]
+PARKING = {"P1": {"Parking_name_en": "Beach Road Parking", "Route_en": "Tirunelveli", "IsParkingAvailable": "TRUE",
+                  "Total_Space": "50", "TotalCapacity": "100", "Latitude": "8.4990", "Longitude": "78.1260"}}
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    db = FakeFirestore({"local_info": {"Toilets_Near_Temple": {"items": TOILETS}}, "parking_lots": PARKING})
+    bot = BotLogic(db=db)
+    bot.process_user_input("u", "start_command", "")
+    bot.process_user_input("u", "text", "en")
+    return bot
+
+
+def ask(bot, text, location=NEAR_TEMPLE):
+    return bot.process_user_input("u", "text", text, location=location)["text"]
+
+
+def test_located_visitor_gets_the_category_list_when_items_have_no_coordinates(bot):
+    reply = ask(bot, "where is the nearest toilet")
+    assert "Toilet block A" in reply and "Toilet block B" in reply
+    assert "No information currently available" not in reply
+    assert reply.split("\n\n")[0] == ask(bot, "where is the nearest toilet", location=None).split("\n\n")[0]
+
+
+def test_located_visitor_gets_the_nearest_places_that_have_coordinates(bot):
+    bot._local.location = NEAR_TEMPLE
+    try:
+        reply = bot.find_nearby_place("parking near me", user_id="u")
+    finally:
+        bot._local.location = None
+    assert "Beach Road Parking" in reply and "km" in reply
+
+
+def test_nearby_search_without_located_places_falls_back_to_the_map_search(bot):
+    bot._local.location = NEAR_TEMPLE
+    try:
+        reply = bot.find_nearby_place("first aid", user_id="u")
+        mixed = bot.find_nearby_place("parking or toilet", user_id="u")
+    finally:
+        bot._local.location = None
+    assert "No information currently available" not in reply
+    assert "Results for First Aid" in reply
+    # Only the kinds that have coordinates are ranked and named
+    assert "Beach Road Parking" in mixed and "Toilets" not in mixed.split("\n")[0]
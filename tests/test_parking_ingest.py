@@ -0,0 +1,51 @@
+# tests/test_parking_ingest.py
+# -*- coding: utf-8 -*-
+
+import threading
+
+from fake_firestore import FakeFirestore
+from parking_index import ParkingIndex
+from parking_ingest import ParkingIngest
+
+ORIGIN = (8.4967, 78.1245)
+LOT = {"Parking_name_en": "North", "IsParkingAvailable": "TRUE", "Total_Space": "50", "TotalCapacity": "100",
+       "Latitude": "8.50", "Longitude": "78.13"}
+
+
+def make_ingest(docs=(("P1", LOT),)):
+    holder = {"index": ParkingIndex.from_documents(docs, (), ORIGIN, 95.0)}
+    ingest = ParkingIngest(lambda: FakeFirestore(), lambda: holder["index"], flush_interval=60, worker_id="w1")
+    holder["index"].offsets = ingest.offset
+    return ingest, holder
+
+
+def test_retried_batch_id_is_not_counted_twice():
+    ingest, holder = make_ingest()
+    events = [{"lot_id": "P1", "type": "entry", "count": 3}]
+    assert ingest.record(events, batch_id="b1")["accepted"] == 1
+    assert ingest.record(events, batch_id="b1") == {"accepted": 0, "rejected": [], "duplicate": True}
+    holder["index"].refresh_lot("P1")
+    assert holder["index"].get("P1").available == 47
+
+
+def test_batch_rejected_as_a_whole_can_be_retried_under_the_same_id():
+    ingest, holder = make_ingest(docs=())  # first load failed: no lots known yet
+    events = [{"lot_id": "P1", "type": "exit", "count": 2}]
+    result = ingest.record(events, batch_id="b1")
+    assert result["accepted"] == 0 and result["rejected"][0]["error"] == "unknown lot_id"
+    holder["index"] = ParkingIndex.from_documents([("P1", LOT)], (), ORIGIN, 95.0, offsets=ingest.offset)
+    result = ingest.record(events, batch_id="b1")
+    assert result["accepted"] == 1 and not result["duplicate"]
+    assert holder["index"].get("P1").available == 52
+
+
+def test_concurrent_retries_of_one_batch_are_applied_once():
+    ingest, holder = make_ingest()
+    events = [{"lot_id": "P1", "type": "entry"}] * 10
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ingest.record(events, batch_id="b1"))) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join(5)
+    assert sum(r["accepted"] for r in results) == 10
+    assert sum(r["duplicate"] for r in results) == 7
+    assert holder["index"].get("P1").available == 40
@@ -0,0 +1,57 @@
+# tests/test_parking_stream.py
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+
+import app as web_app
+import bot_logic
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+
+LOT = {"Parking_name_en": "North", "Route_en": "Tirunelveli", "IsParkingAvailable": "TRUE",
+       "Total_Space": "50", "TotalCapacity": "100", "Latitude": "8.50", "Longitude": "78.13"}
+
+
+def make_bot(monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    monkeypatch.setattr(bot_logic, "PARKING_CACHE_TTL", 0.02)
+    monkeypatch.setattr(bot_logic, "PARKING_STREAM_INTERVAL", 0.01)
+    db = FakeFirestore({"parking_lots": {"P1": LOT}})
+    return BotLogic(db=db), db
+
+
+def test_stream_delivers_changes_to_a_subscriber(monkeypatch):
+    bot, db = make_bot(monkeypatch)
+    sub = bot.parking_stream.subscribe("any", "en")
+    assert list(sub.take()["lots"]) == ["P1"]
+    db.collection("parking_lots").document("P1").set({"Total_Space": "10"}, merge=True)
+    deadline = time.time() + 2
+    delta = None
+    while delta is None and time.time() < deadline:
+        time.sleep(0.01)
+        delta = sub.take()
+    assert delta is not None and "10" in delta["lots"]["P1"]
+    bot.parking_stream.unsubscribe(sub)
+
+
+def test_producer_stops_reading_parking_data_after_the_last_subscriber_leaves(monkeypatch):
+    bot, db = make_bot(monkeypatch)
+    sub = bot.parking_stream.subscribe("any", "en")
+    time.sleep(0.1)
+    assert db.read_count > 1  # polled while subscribed
+    bot.parking_stream.unsubscribe(sub)
+    time.sleep(0.05)  # lets a tick that was already running finish
+    counters = ("hits", "stale_hits", "misses", "refreshes")
+    reads, before = db.read_count, {k: bot.data.stats()["parking_lots"][k] for k in counters}
+    time.sleep(0.2)
+    assert db.read_count == reads
+    assert {k: bot.data.stats()["parking_lots"][k] for k in counters} == before
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_page_opens_parking_streams_only_when_enabled(monkeypatch, enabled):
+    monkeypatch.setattr(web_app, "PARKING_STREAM_ENABLED", enabled)
+    page = web_app.app.test_client().get("/").get_data(as_text=True)
+    assert f"const PARKING_STREAM_ENABLED = {'true' if enabled else 'false'};" in page
@@ -0,0 +1,100 @@
+# tests/test_parking_view.py
+# -*- coding: utf-8 -*-
+
+import time
+
+import bot_logic
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+from parking_view import ParkingView
+
+ORIGIN = (8.4967, 78.1245)
+ROUTES = ("tirunelveli", "thoothukudi", "nagercoil")
+
+
+def lot(name, free, capacity=100, route="Tirunelveli", priority=1, available="TRUE"):
+    return {"Parking_name_en": name, "Route_en": route, "IsParkingAvailable": available,
+            "Total_Space": str(free), "TotalCapacity": str(capacity), "Priority": str(priority),
+            "Latitude": str(ORIGIN[0] + 0.01), "Longitude": str(ORIGIN[1] + 0.01)}
+
+
+def make_view(docs, max_silence=None):
+    db = FakeFirestore({"parking_lots": docs})
+    view = ParkingView(ROUTES, ORIGIN, full_threshold=95.0, max_silence=max_silence)
+    view.subscribe(db)
+    return db, view
+
+
+def names(view, route=None):
+    return [lot.doc_id for lot in view.index.top(route)]
+
+
+def test_initial_snapshot_fills_the_index_sorted_by_fullness():
+    _, view = make_view({"A": lot("A", 10), "B": lot("B", 80), "C": lot("C", 50, route="Nagercoil")})
+    assert view.is_live()
+    assert names(view) == ["B", "C", "A"]
+    assert names(view, "tirunelveli") == ["B", "A"]
+    assert names(view, "nagercoil") == ["C"]
+
+
+def test_added_modified_and_removed_documents_update_the_index():
+    db, view = make_view({"A": lot("A", 10), "B": lot("B", 80)})
+    lots = db.collection("parking_lots")
+    lots.document("C").set(lot("C", 50))
+    assert names(view) == ["B", "C", "A"]
+    lots.document("A").set({"Total_Space": "90"}, merge=True)
+    assert names(view) == ["A", "B", "C"]
+    lots.document("B").delete()
+    assert names(view) == ["A", "C"]
+    assert view.changes_applied == 5
+
+
+def test_lot_crossing_the_full_threshold_leaves_and_rejoins_the_index():
+    db, view = make_view({"A": lot("A", 10), "B": lot("B", 80)})
+    ref = db.collection("parking_lots").document("A")
+    ref.set({"Total_Space": "4"}, merge=True)  # 96% full
+    assert names(view) == ["B"]
+    assert view.index.has_document("A")
+    ref.set({"Total_Space": "6"}, merge=True)  # 94% full
+    assert names(view) == ["B", "A"]
+    ref.set({"IsParkingAvailable": "FALSE"}, merge=True)
+    assert names(view) == ["B"]
+
+
+def test_changing_a_lots_route_moves_it_between_buckets():
+    db, view = make_view({"A": lot("A", 10), "B": lot("B", 80, route="Thoothukudi")})
+    db.collection("parking_lots").document("A").set({"Route_en": "Thoothukudi, Nagercoil"}, merge=True)
+    assert names(view, "tirunelveli") == []
+    assert names(view, "thoothukudi") == ["B", "A"]
+    assert names(view, "nagercoil") == ["A"]
+    assert names(view) == ["B", "A"]
+
+
+def test_view_stops_being_live_when_the_stream_dies_or_goes_silent():
+    db, view = make_view({"A": lot("A", 10)})
+    db.break_watches()
+    assert view.ready and not view.listening and not view.is_live()
+
+    db, view = make_view({"A": lot("A", 10)}, max_silence=0.05)
+    assert view.is_live()
+    time.sleep(0.06)
+    assert not view.is_live()
+    db.collection("parking_lots").document("A").set({"Total_Space": "20"}, merge=True)
+    assert view.is_live()
+
+
+def test_bot_polls_and_resubscribes_when_the_listener_dies(monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    monkeypatch.setattr(bot_logic, "PARKING_LIVE_UPDATES", True)
+    db = FakeFirestore({"parking_lots": {"A": lot("A", 10)}})
+    bot = BotLogic(db=db)
+    first = bot.parking_view
+    assert bot.parking_index() is first.index
+    db.break_watches()
+    db.collection("parking_lots").document("B").set(lot("B", 80))
+    # The next read resubscribes; the new view has the write the dead one missed
+    assert [l.doc_id for l in bot.parking_index().top()] == ["B", "A"]
+    assert bot.parking_view is not first and bot.parking_view.is_live()
+    db.break_watches()
+    # Resubscribing is rate-limited, so until then replies come from the polled index
+    assert bot.parking_index() is bot.data.get("parking_lots")
@@ -0,0 +1,82 @@
+# tests/test_render_cache.py
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import bot_logic
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+from render_cache import RenderCache
+
+HELP_CENTRES = [{"Name_en": "North Gate Desk"}]
+PARKING = {"P1": {"Parking_name_en": "Beach Road Parking", "Route_en": "Tirunelveli", "IsParkingAvailable": "TRUE",
+                  "Total_Space": "50", "TotalCapacity": "100", "Latitude": "8.4990", "Longitude": "78.1260"}}
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    monkeypatch.setattr(bot_logic, "PARKING_LIVE_UPDATES", False)
+    return BotLogic(db=FakeFirestore({"local_info": {"Help_Centres": {"items": HELP_CENTRES}}, "parking_lots": PARKING}))
+
+
+def start(bot, user_id, lang):
+    bot.process_user_input(user_id, "start_command", "")
+    bot.process_user_input(user_id, "text", lang)
+
+
+def help_centres(bot, user_id):
+    return bot._get_formatted_firestore_data(user_id, "Help_Centres")
+
+
+def test_repeated_replies_are_served_from_the_cache(bot):
+    start(bot, "u", "en")
+    first = help_centres(bot, "u")
+    assert "North Gate Desk" in first
+    misses = bot.render_cache.misses
+    assert help_centres(bot, "u") == first
+    assert (bot.render_cache.misses, bot.render_cache.hits) == (misses, 1)
+
+
+def test_data_version_bump_invalidates_a_cached_reply(bot):
+    start(bot, "u", "en")
+    assert "North Gate Desk" in help_centres(bot, "u")
+    bot.db.collection("local_info").document("Help_Centres").set({"items": [{"Name_en": "Beach Desk"}]})
+    bot.data.refresh("local_info", wait=True)
+    reply = help_centres(bot, "u")
+    assert "Beach Desk" in reply and "North Gate Desk" not in reply
+
+
+def test_language_change_gets_its_own_reply(bot):
+    start(bot, "en-user", "en")
+    start(bot, "ta-user", "ta")
+    english, tamil = help_centres(bot, "en-user"), help_centres(bot, "ta-user")
+    assert "North Gate Desk" in english and tamil != english
+    assert help_centres(bot, "en-user") == english
+    start(bot, "en-user", "ta")
+    assert help_centres(bot, "en-user") == tamil
+
+
+def test_parking_write_invalidates_a_cached_parking_reply(bot):
+    start(bot, "u", "en")
+    assert "50" in bot.find_available_parking("u", "tirunelveli")
+    bot.db.collection("parking_lots").document("P1").set({"Total_Space": "35"}, merge=True)
+    bot.data.refresh("parking_lots", wait=True)
+    reply = bot.find_available_parking("u", "tirunelveli")
+    assert "35" in reply and "50" not in reply
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = RenderCache(max_entries=2)
+    for key in ("a", "b"): cache.get_or_render(key, lambda: key.upper())
+    cache.get_or_render("a", lambda: "stale")
+    cache.get_or_render("c", lambda: "C")
+    assert cache.get_or_render("a", lambda: "new") == "A"
+    assert cache.get_or_render("b", lambda: "new") == "new"
+    assert cache.stats()["entries"] == 2
+
+
+def test_disabled_cache_always_renders():
+    cache = RenderCache(enabled=False)
+    assert [cache.get_or_render("a", lambda: n) for n in range(3)] == [0, 1, 2]
+    assert cache.stats()["entries"] == 0
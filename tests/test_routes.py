@@ -0,0 +1,54 @@
+# tests/test_routes.py
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+
+import bot_logic
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+
+
+@pytest.fixture(scope="module")
+def bot():
+    lazy_start, bot_logic.LAZY_START = bot_logic.LAZY_START, False
+    try:
+        yield BotLogic(db=FakeFirestore({}))
+    finally:
+        bot_logic.LAZY_START = lazy_start
+
+
+@pytest.mark.parametrize("text, route", [
+    ("1", "tirunelveli"), ("1.", "tirunelveli"), (" 2 ", "thoothukudi"), ("option 2", "thoothukudi"),
+    ("(3)", "nagercoil"), ("4)", "any"), ("Route 1.", "tirunelveli"),
+    ("Nagercoil", "nagercoil"), ("12", "any"), ("", "any"),
+])
+def test_menu_numbers_and_route_names(bot, text, route):
+    assert bot._resolve_route(text) == route
+
+
+@pytest.mark.parametrize("text, route", [
+    ("Kovilpatti", "thoothukudi"), ("Srivaikuntam", "tirunelveli"), ("Tuticorin", "thoothukudi"),
+    ("kovilpati", "thoothukudi"), ("Nagarkovil", "nagercoil"), ("coming from Kovilpatti", "thoothukudi"),
+    ("we are from srivaikuntam side", "tirunelveli"), ("from kanyakumari by car", "nagercoil"),
+    ("திருநெல்வேலி", "tirunelveli"), ("கோவில்பட்டி", "thoothukudi"), ("ஸ்ரீவைகுண்டம்", "tirunelveli"),
+    ("கோவில்பட்டியிலிருந்து வருகிறோம்", "thoothukudi"),
+])
+def test_home_towns_resolve_to_their_route(bot, text, route):
+    assert bot._resolve_route(text) == route
+
+
+@pytest.mark.parametrize("text", ["hello", "parking please", "yes", "ok", "I don't know", "10"])
+def test_ordinary_words_do_not_match_a_town(bot, text):
+    assert bot.gazetteer.resolve_route(text) is None
+    assert bot._resolve_route(text) == "any"
+
+
+def test_gazetteer_does_not_wait_for_the_data_preload(monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", True)
+    slow = BotLogic(db=FakeFirestore({}, latency=1.0))
+    deadline = time.time() + 0.5
+    while slow.gazetteer is None and time.time() < deadline: time.sleep(0.01)
+    assert slow._resolve_route("Kovilpatti") == "thoothukudi"
+    assert not slow.data.is_loaded("local_info")
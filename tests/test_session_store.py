@@ -0,0 +1,62 @@
+# tests/test_session_store.py
+# -*- coding: utf-8 -*-
+
+import os
+import time
+
+import pytest
+
+from session_store import MemorySessionStore, SQLiteSessionStore, create_session_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(ttl=1800, max_sessions=100):
+        if request.param == "memory": return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl=ttl, max_sessions=max_sessions, purge_every=1)
+    return make
+
+
+def test_round_trip_keeps_only_session_fields(make_store):
+    store = make_store()
+    store.put("u1", {"lang": "ta", "menu_level": "main_menu", "scratch": "dropped"})
+    assert store.get("u1") == {"lang": "ta", "menu_level": "main_menu"}
+    assert store.get("nobody") is None
+    store.delete("u1")
+    assert store.get("u1") is None
+    assert (store.hits, store.misses) == (1, 2)
+
+
+def test_idle_sessions_expire(make_store):
+    store = make_store(ttl=0.05)
+    store.put("u1", {"lang": "en"})
+    assert store.get("u1") is not None
+    time.sleep(0.06)
+    assert store.get("u1") is None
+    store.put("u2", {"lang": "en"})  # a write purges what has expired
+    assert len(store) == 1
+    assert store.expired_evictions == 1
+
+
+def test_least_recently_used_sessions_are_evicted_at_capacity(make_store):
+    store = make_store(max_sessions=3)
+    for user in ("a", "b", "c"):
+        store.put(user, {"lang": "en"})
+        time.sleep(0.002)  # SQLite orders by last_seen
+    store.put("a", {"lang": "ta"})  # a is now the most recently used
+    time.sleep(0.002)
+    store.put("d", {"lang": "en"})
+    assert len(store) == 3
+    assert store.get("b") is None
+    assert store.get("a") == {"lang": "ta"} and store.get("d") is not None
+    assert store.capacity_evictions == 1
+    assert store.stats()["sessions"] == 3
+
+
+def test_sqlite_sessions_survive_a_new_store_instance(tmp_path):
+    path = str(tmp_path / "shared" / "sessions.db")
+    first = create_session_store(f"sqlite:///{path}")
+    first.put("u1", {"lang": "ta", "menu_level": "parking_awaiting_route"})
+    second = create_session_store(f"sqlite:///{path}")  # another worker process on the same host
+    assert isinstance(second, SQLiteSessionStore) and os.path.exists(path)
+    assert second.get("u1") == {"lang": "ta", "menu_level": "parking_awaiting_route"}
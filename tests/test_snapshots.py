@@ -0,0 +1,102 @@
+# tests/test_snapshots.py
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+
+import pytest
+
+import bot_logic
+from bot_logic import BotLogic
+from fake_firestore import FakeFirestore
+from snapshot_store import SNAPSHOT_FORMAT, SnapshotStore
+
+HELP_CENTRES = [{"Name_en": "North Gate Desk"}]
+LOT = {"Parking_name_en": "Beach Road Parking", "Route_en": "Tirunelveli", "IsParkingAvailable": "TRUE",
+       "Total_Space": "50", "TotalCapacity": "100", "Latitude": "8.4990", "Longitude": "78.1260"}
+
+
+def data():
+    return {"local_info": {"Help_Centres": {"items": HELP_CENTRES}}, "parking_lots": {"P1": LOT}}
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    """A directory holding the snapshots of one bot that read `data()` from Firestore."""
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    BotLogic(db=FakeFirestore(data()), snapshot_dir=str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["local_info.json", "parking_lots.json"]
+    return str(tmp_path)
+
+
+def ask_help_centres(bot):
+    bot.process_user_input("u", "start_command", "")
+    bot.process_user_input("u", "text", "en")
+    return bot.process_user_input("u", "text", "3")["text"]
+
+
+def test_snapshots_are_served_before_firestore_connects(snapshot_dir, monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", True)
+    bot = BotLogic(db=FakeFirestore(data(), latency=1.0), snapshot_dir=snapshot_dir)
+    started = time.perf_counter()
+    assert "North Gate Desk" in ask_help_centres(bot)
+    assert [l.doc_id for l in bot.data.peek("parking_lots").top()] == ["P1"]
+    assert time.perf_counter() - started < 0.5
+    assert bot.data.stats()["local_info"]["from_snapshot"]
+
+
+def test_bot_answers_from_snapshots_while_firestore_reads_fail(snapshot_dir):
+    db = FakeFirestore(data())
+    db.fail_reads = True
+    bot = BotLogic(db=db, snapshot_dir=snapshot_dir)
+    assert "North Gate Desk" in ask_help_centres(bot)
+    assert bot.data.stats()["local_info"]["failures"] >= 1
+    assert "Beach Road Parking" in bot.find_available_parking("u", "tirunelveli")
+
+
+@pytest.mark.parametrize("contents", [
+    b"{not json", b"[]", json.dumps({"format": SNAPSHOT_FORMAT + 1, "name": "local_info", "data": {}}).encode(),
+    json.dumps({"format": SNAPSHOT_FORMAT, "name": "parking_lots", "data": {}}).encode(),
+])
+def test_unreadable_or_foreign_snapshots_are_ignored(tmp_path, contents):
+    (tmp_path / "local_info.json").write_bytes(contents)
+    assert SnapshotStore(str(tmp_path)).load("local_info") is None
+
+
+def test_snapshot_that_cannot_be_restored_leaves_the_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_logic, "LAZY_START", False)
+    SnapshotStore(str(tmp_path)).save("local_info", ["not", "a", "dict"])
+    db = FakeFirestore(data())
+    db.fail_reads = True
+    bot = BotLogic(db=db, snapshot_dir=str(tmp_path))
+    assert bot.data.peek("local_info") == {}
+    assert not bot.data.stats()["local_info"]["from_snapshot"]
+
+
+def test_unchanged_save_only_bumps_the_modification_time(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    assert store.save("local_info", {"Help_Centres": HELP_CENTRES})
+    path = store.path("local_info")
+    os.utime(path, (1000, 1000))
+    contents = open(path, "rb").read()
+    assert not store.save("local_info", {"Help_Centres": HELP_CENTRES})
+    assert open(path, "rb").read() == contents
+    assert os.path.getmtime(path) > 1000
+    assert store.load("local_info") == ({"Help_Centres": HELP_CENTRES}, os.path.getmtime(path))
+    assert (store.stats()["saves"], store.stats()["unchanged"]) == (1, 1)
+    assert store.save("local_info", {"Help_Centres": []})
+
+
+def test_each_project_gets_its_own_snapshot_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_logic, "DATA_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(bot_logic, "FIRESTORE_CREDENTIALS_FILE", str(tmp_path / "missing.json"))
+    for project_id in ("temple-prod", "temple-staging"):
+        monkeypatch.setenv("GOOGLE_CREDENTIALS_JSON", json.dumps({"project_id": project_id}))
+        assert BotLogic._default_snapshot_dir() == str(tmp_path / project_id)
+    monkeypatch.setenv("GOOGLE_CREDENTIALS_JSON", json.dumps({"project_id": "../elsewhere"}))
+    assert os.path.dirname(BotLogic._default_snapshot_dir()) == str(tmp_path)
+    monkeypatch.delenv("GOOGLE_CREDENTIALS_JSON")
+    assert BotLogic._default_snapshot_dir() == str(tmp_path)
+    monkeypatch.setattr(bot_logic, "DATA_SNAPSHOT_DIR", "")
+    assert BotLogic._default_snapshot_dir() == ""